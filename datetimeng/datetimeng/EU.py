@@ -18,6 +18,7 @@ switches on the first Sunday in April.  Cuba switches on April
 
 from datetime import date, time, timedelta, datetime, tzinfo
 from dateutil import MARCH, OCTOBER, SUNDAY, weekday_of_month
+from datetimeng import _wall_seconds
 
 HOUR = timedelta(hours=1)
 ZERO = timedelta()
@@ -27,6 +28,30 @@ ZERO = timedelta()
 _dston = datetime(1, MARCH, 1, 1)
 _dstoff = datetime(1, OCTOBER, 1, 1)
 
+# year -> (switch on, switch off) as _wall_seconds() of the naive UTC times.
+# The switches happen at the same instant everywhere, so this is shared
+# by all zones.
+_transitions = {}
+_MAX_CACHED_YEARS = 500
+
+def _year_transitions(year):
+    try:
+        return _transitions[year]
+    except KeyError:
+        pass
+    dston = weekday_of_month(SUNDAY, _dston.replace(year=year), -1)
+    dstoff = weekday_of_month(SUNDAY, _dstoff.replace(year=year), -1)
+    if len(_transitions) >= _MAX_CACHED_YEARS:
+        _transitions.clear()
+    result = _transitions[year] = _wall_seconds(dston), _wall_seconds(dstoff)
+    return result
+
+def _check_fromutc(tz, dt):
+    if not isinstance(dt, datetime):
+        raise TypeError("fromutc() requires a datetime argument")
+    if dt.tzinfo is not tz:
+        raise ValueError("dt.tzinfo is not self")
+
 class Fixed(tzinfo):
 
     def __init__(self, offset, name):
@@ -42,38 +67,60 @@ class Fixed(tzinfo):
     def dst(self, dt):
         return ZERO
 
+    def fromutc(self, dt):
+        _check_fromutc(self, dt)
+        return dt + self.offset
+
 class Europe(tzinfo):
 
     def __init__(self, offset, stdname, dstname):
         self.offset = offset
+        self.dstoffset = offset + HOUR
         self.stdname = stdname
         self.dstname = dstname
+        self._offset_seconds = offset.days * 86400 + offset.seconds
 
     def tzname(self, dt):
-        if self.dst(dt):
+        if self._isdst(dt):
             return self.dstname
         else:
             return self.stdname
 
     def utcoffset(self, dt):
-        return self.offset + self.dst(dt)
+        if self._isdst(dt):
+            return self.dstoffset
+        else:
+            return self.offset
 
     def dst(self, dt):
-        if dt is None or dt.tzinfo is None:
-            return ZERO
-        assert dt.tzinfo is self
-        dston = _dston.replace(year=dt.year)
-        dstoff = _dstoff.replace(year=dt.year)
-        dston = weekday_of_month(SUNDAY, dston,  -1)
-        dstoff = weekday_of_month(SUNDAY, dstoff, -1)
-        # Convert dt to a naive UTC too (we have to strip the tzinfo member
-        # in order to compare to the naive dston and dstoff).
-        dt -= self.offset
-        if dston <= dt.replace(tzinfo=None) < dstoff:
+        if self._isdst(dt):
             return HOUR
         else:
             return ZERO
 
+    def _isdst(self, dt):
+        if dt is None or dt.tzinfo is None:
+            return False
+        assert dt.tzinfo is self
+        try:
+            dston, dstoff = _transitions[dt.year]
+        except KeyError:
+            dston, dstoff = _year_transitions(dt.year)
+        # Convert dt to a naive UTC too (standard time, so the last hour of
+        # DST can't be spelled; see below).
+        return dston <= _wall_seconds(dt) - self._offset_seconds < dstoff
+
+    def fromutc(self, dt):
+        _check_fromutc(self, dt)
+        try:
+            dston, dstoff = _transitions[dt.year]
+        except KeyError:
+            dston, dstoff = _year_transitions(dt.year)
+        if dston <= _wall_seconds(dt) < dstoff:
+            return dt + self.dstoffset
+        else:
+            return dt + self.offset
+
 UTC = Fixed(ZERO, "UTC")
 WesternEU = Europe(ZERO, "WET", "WEST")
 CentralEU = Europe(HOUR, "CET", "CEST")
@@ -1,8 +1,10 @@
 """A tzinfo object mirroring local time."""
 
 import time as _time
+from bisect import bisect_right as _bisect_right
 
 from datetime import date, time, timedelta, datetime, tzinfo
+from datetimeng import _wall_seconds
 
 STDOFFSET = timedelta(seconds = -_time.timezone)
 if _time.daylight:
@@ -13,24 +15,77 @@ else:
 ZERO = timedelta()
 DSTDIFF = DSTOFFSET - STDOFFSET
 
+_EPOCH = date(1970, 1, 1).toordinal() * 86400
+_DAY = 86400
+_HOUR = 3600
+
 class LocalTimezone(tzinfo):
+    """The C library's idea of local time.
+
+    Rather than calling mktime() and localtime() for every query, the
+    changes of a year are found once, by probing localtime() an hour at a
+    time and bisecting to the second, and kept in a table.  A change is any
+    change of the UTC offset or of the DST flag, so zones whose standard
+    offset moved over the years get the offset of the time.  Two changes
+    less than an hour apart that return to the same setting are missed.
+    Call refresh() after changing the TZ environment variable (or the
+    system zone).
+
+    A change takes effect at the local clock reading just before it, so the
+    hour skipped in spring and the hour repeated in autumn are both taken
+    as DST, as mktime() does with tm_isdst == -1.
+
+    Aware datetimeng objects normally keep the offset they are given (see
+    datetimeng.TzInfo); since refresh() can change the answers, this class
+    sets cache_offsets to False and is asked every time.
+    """
+
+    cache_offsets = False
+
+    def __init__(self):
+        self.refresh()
+
+    def refresh(self):
+        "Re-read the C library's time zone settings and forget the tables."
+        if hasattr(_time, 'tzset'):
+            _time.tzset()
+        stdoffset = -_time.timezone
+        if _time.daylight:
+            dstoffset = -_time.altzone
+        else:
+            dstoffset = stdoffset
+        self._tznames = tuple(_time.tzname)
+        # (utcoffset, dst, tzname) by isdst, for years localtime() can't do.
+        self._fallback = (self._info(stdoffset, stdoffset, False),
+                          self._info(dstoffset, stdoffset, True))
+        # year -> (switch times as _wall_seconds() values, info before each)
+        self._years = {}
+
+    def _info(self, offset, stdoffset, isdst):
+        return (timedelta(seconds=offset), timedelta(seconds=offset - stdoffset),
+                self._tznames[isdst])
 
     def utcoffset(self, dt):
-        if self._isdst(dt):
-            return DSTOFFSET
-        else:
-            return STDOFFSET
+        return self._find(dt)[0]
 
     def dst(self, dt):
-        if self._isdst(dt):
-            return DSTDIFF
-        else:
-            return ZERO
+        return self._find(dt)[1]
 
     def tzname(self, dt):
-        return _time.tzname[self._isdst(dt)]
-
-    def _isdst(self, dt):
+        return self._find(dt)[2]
+
+    def _find(self, dt):
+        try:
+            switches, infos = self._years[dt.year]
+        except KeyError:
+            try:
+                switches, infos = self._probe_year(dt.year)
+            except (ValueError, OverflowError, EnvironmentError):
+                # Outside what the platform's localtime() handles.
+                return self._fallback[self._mktime_isdst(dt)]
+        return infos[_bisect_right(switches, _wall_seconds(dt))]
+
+    def _mktime_isdst(self, dt):
         tt = (dt.year, dt.month, dt.day,
               dt.hour, dt.minute, dt.second,
               dt.weekday(), 0, -1)
@@ -38,6 +93,47 @@ class LocalTimezone(tzinfo):
         tt = _time.localtime(stamp)
         return tt[8] > 0
 
+    def _probe_year(self, year):
+        """Find the changes in (a day either side of) the given year and add
+        them to the table.
+        """
+        def setting(stamp):
+            "(UTC offset in seconds, isdst) at a POSIX timestamp."
+            y, m, d, hh, mm, ss, wd, yd, isdst = _time.localtime(stamp)
+            local = (((date(y, m, d).toordinal() * 24 + hh) * 60 + mm) * 60 +
+                     ss - _EPOCH)
+            return local - stamp, isdst > 0
+        start = date(year, 1, 1).toordinal() * 86400 - _EPOCH - _DAY
+        end = start + (date(year + 1, 1, 1).toordinal() -
+                       date(year, 1, 1).toordinal() + 2) * _DAY
+        switches = []
+        settings = [setting(start)]
+        for hour in range(start, end, _HOUR):
+            new = setting(hour + _HOUR)
+            if new == settings[-1]:
+                continue
+            # Bisect for the first second with the new setting.
+            lo, hi = hour, hour + _HOUR
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if setting(mid) == new:
+                    hi = mid
+                else:
+                    lo = mid
+            switches.append(_EPOCH + hi + settings[-1][0])
+            settings.append(new)
+        # dst() is measured from the standard time offset before, or failing
+        # that the one after.
+        standard = [offset for offset, isdst in settings if not isdst]
+        stdoffset = standard and standard[0] or -_time.timezone
+        infos = []
+        for offset, isdst in settings:
+            if not isdst:
+                stdoffset = offset
+            infos.append(self._info(offset, stdoffset, isdst))
+        result = self._years[year] = switches, infos
+        return result
+
 Local = LocalTimezone()
 
 demo = """
@@ -3,6 +3,7 @@ from datetime import tzinfo
 from datetime import timedelta
 
 from dateutil import SUNDAY, MARCH, APRIL, OCTOBER, NOVEMBER, weekday_of_month
+from datetimeng import _wall_seconds
 
 __all__ = ['USTimeZone', 'Eastern', 'Central', 'Mountain', 'Pacific']
 
@@ -102,56 +103,94 @@ class USTimeZone(tzinfo):
     # Ensure that the rules are in reverse chronological order:
     dst_rules.sort(reverse=True)
 
+    # Most years cached per zone; the cache is emptied when it fills up.
+    max_cached_years = 500
+
     def __init__(self, stdhours, stdname, dstname):
         self.stdoff = timedelta(hours=stdhours)
+        self.dstoffset = self.stdoff + self.dstoff
         self.stdname = stdname
         self.dstname = dstname
+        # year -> (start, end) of DST as _wall_seconds() values, or None
+        self._transitions = {}
 
     def utcoffset(self, dt):
-        return self.stdoff + self.dst(dt)
+        if self._isdst(dt):
+            return self.dstoffset
+        else:
+            return self.stdoff
+
+    def utcoffsets(self, dts):
+        """Return the utcoffset() of each datetime in the iterable dts, as
+        a list.
+        """
+        isdst = self._isdst
+        offsets = (self.stdoff, self.dstoffset)
+        return [offsets[isdst(dt)] for dt in dts]
 
     def tzname(self, dt):
-        if self.dst(dt):
+        if self._isdst(dt):
             return self.dstname
         else:
             return self.stdname
 
     def dst(self, dt):
+        if self._isdst(dt):
+            return self.dstoff
+        else:
+            return self.zero
+
+    def _isdst(self, dt):
         if dt is None or dt.tzinfo is None:
             # An exception instead may be sensible here, in one or more of
             # the cases.
-            return self.zero
+            return False
 
         assert dt.tzinfo is self
 
+        try:
+            transitions = self._transitions[dt.year]
+        except KeyError:
+            transitions = self._year_transitions(dt.year)
+        if transitions is None:
+            return False
+        # Naive comparison: the start and end are local times.
+        start, end = transitions
+        return start <= _wall_seconds(dt) < end
+
+    def _year_transitions(self, year):
+        """Compute and cache the (start, end) of DST in the given year, as
+        _wall_seconds() values; None if there's no DST that year.
+        """
         for (first_year, dst_start, dst_end) in self.dst_rules:
-            if dt.year >= first_year:
+            if year >= first_year:
                 break
         else:
             # As above, an exception instead may be sensible here.
-            return self.zero
+            dst_start = None
 
-        start = dst_start.date(dt.year)
-        assert start.weekday() == 6
-        if dt.year >= 2007:
-            #import pdb ; pdb.set_trace()
-            assert 8 <= start.day <= 14
+        if dst_start is None:
+            transitions = None
         else:
-            assert start.day <= 7
-
-        end = dst_end.date(dt.year)
-        assert end.weekday() == 6
-        if dt.year >= 2007:
-            assert end.day <= 7
-        else:
-            assert end.day >= 25
-
-        # Can't compare naive to aware objects, so strip the timezone from
-        # dt first.
-        if start <= dt.replace(tzinfo=None) < end:
-            return self.dstoff
-        else:
-            return self.zero
+            start = dst_start.date(year)
+            assert start.weekday() == 6
+            if year >= 2007:
+                assert 8 <= start.day <= 14
+            else:
+                assert start.day <= 7
+
+            end = dst_end.date(year)
+            assert end.weekday() == 6
+            if year >= 2007:
+                assert end.day <= 7
+            else:
+                assert end.day >= 25
+            transitions = _wall_seconds(start), _wall_seconds(end)
+
+        if len(self._transitions) >= self.max_cached_years:
+            self._transitions.clear()
+        self._transitions[year] = transitions
+        return transitions
 
 
 Eastern  = USTimeZone(-5, "EST", "EDT")
@@ -314,6 +353,12 @@ Right when DST starts.
 EDT
 (2007, 3, 11, 2, 0, 0, 6, 70, 1)
 Sun Mar 11 02:00:00 2007
+
+Offsets for many datetimes at once:
+
+>>> day = [datetime(2007, 3, 11, h, tzinfo=Eastern) for h in (0, 1, 2, 3)]
+>>> [off.seconds // 3600 - 24 for off in Eastern.utcoffsets(day)]
+[-5, -5, -4, -4]
  """
 
 __test__ = {'brainbuster': brainbuster_test}
@@ -1 +1,3 @@
 from datetimeng import *
+from arrays import *
+from tzfile import *
@@ -0,0 +1,509 @@
+"""Column types holding many DateTime or TimeDelta values as machine integers.
+
+A DateTimeArray stores each element as the integer DateTime._sortkey()
+returns -- nanoseconds since 1970-01-01 00:00, naive (wall clock) time --
+in a stdlib array of 64 bit integers, plus at most one tzinfo shared by
+every element.  Elements only become DateTime objects when they are asked
+for, so a column of millions of timestamps costs 8 bytes per value.
+
+The buffer is exposed as the `nanoseconds` attribute; it supports the
+buffer protocol, so numpy.frombuffer(arr.nanoseconds, 'int64') gives a
+zero-copy NumPy view where NumPy is available.  The representable range is
+that of int64 nanoseconds: roughly the years 1677..2262.
+
+A TimeDeltaArray likewise stores durations as int64 nanoseconds, so it
+holds up to about 292 years either way.
+
+Arithmetic, comparisons and field extraction are plain Python loops over
+the stored integers, fed straight into the result array: one interpreter
+iteration per element, with no DateTime or TimeDelta built along the way.
+That avoids the object construction that dominates work on lists of
+scalars, but they are not vectorized as NumPy operations are; expect on
+the order of 0.1 microseconds per element rather than nanoseconds.
+
+Both pickle as a small header plus the buffer in one piece, rather than
+an object per element.  Under pickle protocol 5 the buffer goes out of
+band as a pickle.PickleBuffer, so it can reach another process without
+being copied into the pickle stream.
+"""
+
+import sys
+from array import array
+from fractions import Fraction
+from itertools import izip
+from operator import eq, ne, lt, le, gt, ge
+
+from datetimeng import DateTime, TimeDelta, TzInfo, _ORD1970, _ord2ymd
+from datetimeng import _offset_lookup
+
+__all__ = ['DateTimeArray', 'TimeDeltaArray']
+
+try:
+    array('q')
+    _INT64 = 'q'
+except ValueError:
+    # No 'long long' typecode (Python 2); C long is 64 bits on LP64 systems.
+    _INT64 = 'l'
+if array(_INT64).itemsize != 8:
+    # e.g. Python 2 on Windows, where C long is 32 bits.
+    raise ImportError("arrays needs a 64 bit integer array typecode; "
+                      "%r is %d bytes here" % (_INT64, array(_INT64).itemsize))
+
+_NS_PER_DAY = 86400000000000
+
+try:
+    from pickle import PickleBuffer as _PickleBuffer
+except ImportError:
+    # Protocol 5 is Python 3.8 and later.
+    _PickleBuffer = None
+
+if hasattr(array, 'frombytes'):
+    _tobytes = array.tobytes
+    _frombytes = array.frombytes
+else:
+    _tobytes = array.tostring
+    _frombytes = array.fromstring
+
+def _unpickle(cls, data, byteorder, *args):
+    "Rebuild an array pickled by _NanosecondArray.__reduce_ex__()."
+    values = array(_INT64)
+    _frombytes(values, data)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return cls.fromnanoseconds(values, *args)
+
+
+def _comparison(op, equality=False):
+    def compare(self, other):
+        if equality and not isinstance(other, self._operands):
+            return NotImplemented
+        mine, theirs = self._keys_against(other)
+        if isinstance(theirs, (int, long)):
+            return [op(x, theirs) for x in mine]
+        return [op(x, y) for x, y in izip(mine, theirs)]
+    return compare
+
+
+class _NanosecondArray(object):
+    """Sequence protocol shared by the array types.  Subclasses keep their
+    elements in self.nanoseconds and define _scalar() to build one.
+    """
+
+    __hash__ = None
+
+    def __len__(self):
+        return len(self.nanoseconds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._new(self.nanoseconds[index])
+        return self._scalar(self.nanoseconds[index])
+
+    def __iter__(self):
+        scalar = self._scalar
+        for x in self.nanoseconds:
+            yield scalar(x)
+
+    def tolist(self):
+        "Return the elements as a list of scalar objects."
+        return list(self)
+
+    def _same_length(self, other):
+        """Return other.nanoseconds, provided other (the right operand) is as
+        long as self.
+        """
+        if len(self) != len(other):
+            raise ValueError("%s lengths differ: %d and %d" %
+                             (self.__class__.__name__, len(self), len(other)))
+        return other.nanoseconds
+
+    def _repr_extra(self):
+        return ""
+
+    def __repr__(self):
+        return "%s([%s]%s)" % (self.__class__.__name__,
+                               ", ".join([repr(x) for x in self]),
+                               self._repr_extra())
+
+    def _pickle_args(self):
+        "Arguments for fromnanoseconds() besides the values."
+        return ()
+
+    def __reduce_ex__(self, protocol):
+        values = self.nanoseconds
+        if protocol >= 5 and _PickleBuffer is not None:
+            data = _PickleBuffer(values)
+        else:
+            data = _tobytes(values)
+        return (_unpickle, (self.__class__, data, sys.byteorder) +
+                self._pickle_args())
+
+    __eq__ = _comparison(eq, True)
+    __ne__ = _comparison(ne, True)
+    __lt__ = _comparison(lt)
+    __le__ = _comparison(le)
+    __gt__ = _comparison(gt)
+    __ge__ = _comparison(ge)
+
+
+class DateTimeArray(_NanosecondArray):
+    """A fixed length sequence of DateTime values sharing one tzinfo.
+
+    DateTimeArray(values, tzinfo=None)
+
+    values is an iterable of DateTime.  They must all be naive, or all carry
+    the same tzinfo object; tzinfo defaults to that of the first element.
+
+    Arithmetic and comparisons work element-wise, as in NumPy: comparisons
+    return a list of bools rather than a single truth value.  Each is one
+    Python loop over the stored integers (see the module docstring).
+    """
+
+    def __init__(self, values=(), tzinfo=None):
+        keys = array(_INT64)
+        append = keys.append
+        for i, dt in enumerate(values):
+            if not isinstance(dt, DateTime):
+                raise TypeError("DateTimeArray elements must be DateTime, "
+                                "not %s" % type(dt).__name__)
+            if i == 0 and tzinfo is None:
+                tzinfo = dt.tzinfo
+            if dt.tzinfo is not tzinfo:
+                raise ValueError("all elements must share the tzinfo %r" %
+                                 (tzinfo,))
+            append(dt._sortkey())
+        self.nanoseconds = keys
+        self.tzinfo = tzinfo
+
+    @classmethod
+    def fromnanoseconds(cls, values, tzinfo=None):
+        """Construct from integers as stored (naive nanoseconds since
+        1970-01-01), given as any iterable.  An array of the right type is
+        used without copying.
+        """
+        self = object.__new__(cls)
+        if not (isinstance(values, array) and values.typecode == _INT64):
+            values = array(_INT64, values)
+        self.nanoseconds = values
+        self.tzinfo = tzinfo
+        return self
+
+    def _new(self, values):
+        return self.fromnanoseconds(values, self.tzinfo)
+
+    def _pickle_args(self):
+        return self.tzinfo,
+
+    def _scalar(self, key):
+        return DateTime._fromsortkey(key, self.tzinfo)
+
+    def __iter__(self):
+        fromsortkey = DateTime._fromsortkey
+        tzinfo = self.tzinfo
+        for key in self.nanoseconds:
+            yield fromsortkey(key, tzinfo)
+
+    def _repr_extra(self):
+        if self.tzinfo is None:
+            return ""
+        return ", tzinfo=%r" % (self.tzinfo,)
+
+    # Arithmetic
+
+    def __add__(self, other):
+        if isinstance(other, TimeDelta):
+            delta = other._tonanoseconds()
+            return self._new(x + delta for x in self.nanoseconds)
+        if isinstance(other, TimeDeltaArray):
+            return self._new(x + y for x, y in
+                             izip(self.nanoseconds, self._same_length(other)))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        """Subtracting a TimeDelta (or TimeDeltaArray) shifts the elements.
+        Subtracting a DateTime or an equally long DateTimeArray gives the
+        differences as a TimeDeltaArray.
+        """
+        if isinstance(other, TimeDelta):
+            delta = other._tonanoseconds()
+            return self._new(x - delta for x in self.nanoseconds)
+        if isinstance(other, TimeDeltaArray):
+            return self._new(x - y for x, y in
+                             izip(self.nanoseconds, self._same_length(other)))
+        if not isinstance(other, (DateTime, DateTimeArray)):
+            return NotImplemented
+        mine, theirs = self._keys_against(other)
+        if isinstance(theirs, (int, long)):
+            return TimeDeltaArray.fromnanoseconds(x - theirs for x in mine)
+        return TimeDeltaArray.fromnanoseconds(x - y for x, y in
+                                              izip(mine, theirs))
+
+    def __rsub__(self, other):
+        "DateTime - DateTimeArray gives the differences as a TimeDeltaArray."
+        if not isinstance(other, DateTime):
+            return NotImplemented
+        mine, theirs = self._keys_against(other)
+        return TimeDeltaArray.fromnanoseconds(theirs - x for x in mine)
+
+    # Comparisons
+
+    def _utckeys(self):
+        "The stored keys shifted to UTC, as an iterable."
+        tzinfo = self.tzinfo
+        keys = self.nanoseconds
+        if tzinfo is None:
+            return keys
+        offset = _offset_lookup(tzinfo, False)
+        return (x - offset(x) for x in keys)
+
+    def _keys_against(self, other):
+        """Return integer keys for self and other that can be compared or
+        subtracted directly: a sequence for self, and an int (DateTime) or
+        a sequence of the same length (DateTimeArray) for other.
+        """
+        if isinstance(other, DateTime):
+            if other.tzinfo is self.tzinfo:
+                return self.nanoseconds, other._sortkey()
+            off = other._utcoffset()
+            aware = off is not None
+        elif isinstance(other, DateTimeArray):
+            self._same_length(other)
+            if other.tzinfo is self.tzinfo:
+                return self.nanoseconds, other.nanoseconds
+            aware = other.tzinfo is not None
+        else:
+            raise TypeError("can't compare DateTimeArray to %s" %
+                            type(other).__name__)
+        if (self.tzinfo is not None) != aware:
+            raise TypeError("can't compare offset-naive and offset-aware "
+                            "times")
+        if isinstance(other, DateTime):
+            theirs = other._sortkey() - off * 60000000000
+        else:
+            theirs = other._utckeys()
+        return self._utckeys(), theirs
+
+    def astimezone(self, tz):
+        """Convert every element to tz, as DateTime.astimezone() does.  The
+        zones are asked for an offset once per transition interval, not
+        once per element.
+        """
+        if not isinstance(tz, TzInfo):
+            raise TypeError("tz argument must be an instance of tzinfo")
+        if self.tzinfo is None:
+            raise ValueError("astimezone() requires an aware DateTime")
+        if tz is self.tzinfo:
+            return self
+        offset = _offset_lookup(tz, True)
+        return self.fromnanoseconds((x + offset(x) for x in self._utckeys()),
+                                    tz)
+
+    # Field extraction; each returns an integer array as long as self.
+
+    def _ymd(self, index):
+        cache = {}
+        result = array(_INT64)
+        append = result.append
+        for x in self.nanoseconds:
+            days = x // _NS_PER_DAY
+            try:
+                ymd = cache[days]
+            except KeyError:
+                ymd = cache[days] = _ord2ymd(int(days) + _ORD1970)
+            append(ymd[index])
+        return result
+
+    def _field(self, unit, modulus):
+        return array(_INT64, (x // unit % modulus for x in self.nanoseconds))
+
+    year = property(lambda self: self._ymd(0), doc="year of each element")
+    month = property(lambda self: self._ymd(1), doc="month of each element")
+    day = property(lambda self: self._ymd(2), doc="day of each element")
+    hour = property(lambda self: self._field(3600000000000, 24),
+                    doc="hour of each element")
+    minute = property(lambda self: self._field(60000000000, 60),
+                      doc="minute of each element")
+    second = property(lambda self: self._field(1000000000, 60),
+                      doc="second of each element")
+    microsecond = property(lambda self: self._field(1000, 1000000),
+                           doc="microsecond of each element")
+    nanosecond = property(lambda self: self._field(1, 1000000000),
+                          doc="nanosecond (0-999999999) of each element")
+
+    def isoformat(self, sep='T'):
+        "Return a list of the elements formatted by DateTime.isoformat()."
+        if self.tzinfo is not None:
+            return [dt.isoformat(sep) for dt in self]
+        result = []
+        append = result.append
+        template = "%04d-%02d-%02d" + sep + "%02d:%02d:%02d"
+        cache = {}
+        for x in self.nanoseconds:
+            days, ns = divmod(x, _NS_PER_DAY)
+            try:
+                y, m, d = cache[days]
+            except KeyError:
+                y, m, d = cache[days] = _ord2ymd(int(days) + _ORD1970)
+            ss, ns = divmod(ns, 1000000000)
+            mm, ss = divmod(ss, 60)
+            hh, mm = divmod(mm, 60)
+            s = template % (y, m, d, hh, mm, ss)
+            us = ns // 1000
+            if us:
+                s += '.%06d' % us
+            append(s)
+        return result
+
+
+class TimeDeltaArray(_NanosecondArray):
+    """A fixed length sequence of TimeDelta values.
+
+    TimeDeltaArray(values)
+
+    values is an iterable of TimeDelta.  As with DateTimeArray, arithmetic
+    and comparisons work element-wise, one Python loop each; the reductions
+    (sum, mean, min, max, percentile) return TimeDelta.
+    """
+
+    def __init__(self, values=()):
+        keys = array(_INT64)
+        append = keys.append
+        for td in values:
+            if not isinstance(td, TimeDelta):
+                raise TypeError("TimeDeltaArray elements must be TimeDelta, "
+                                "not %s" % type(td).__name__)
+            append(td._tonanoseconds())
+        self.nanoseconds = keys
+
+    @classmethod
+    def fromnanoseconds(cls, values):
+        """Construct from integer nanoseconds, given as any iterable.  An
+        array of the right type is used without copying.
+        """
+        self = object.__new__(cls)
+        if not (isinstance(values, array) and values.typecode == _INT64):
+            values = array(_INT64, values)
+        self.nanoseconds = values
+        return self
+
+    def _new(self, values):
+        return self.fromnanoseconds(values)
+
+    _scalar = staticmethod(TimeDelta._fromnanoseconds)
+
+    def _keys_against(self, other):
+        if isinstance(other, TimeDelta):
+            return self.nanoseconds, other._tonanoseconds()
+        if isinstance(other, TimeDeltaArray):
+            return self.nanoseconds, self._same_length(other)
+        raise TypeError("can't compare TimeDeltaArray to %s" %
+                        type(other).__name__)
+
+    # Arithmetic
+
+    def __add__(self, other):
+        if isinstance(other, TimeDelta):
+            delta = other._tonanoseconds()
+            return self._new(x + delta for x in self.nanoseconds)
+        if isinstance(other, TimeDeltaArray):
+            return self._new(x + y for x, y in
+                             izip(self.nanoseconds, self._same_length(other)))
+        if isinstance(other, DateTime):
+            key = other._sortkey()
+            return DateTimeArray.fromnanoseconds(
+                (key + x for x in self.nanoseconds), other.tzinfo)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, TimeDelta):
+            delta = other._tonanoseconds()
+            return self._new(x - delta for x in self.nanoseconds)
+        if isinstance(other, TimeDeltaArray):
+            return self._new(x - y for x, y in
+                             izip(self.nanoseconds, self._same_length(other)))
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, TimeDelta):
+            return -self + other
+        return NotImplemented
+
+    def __neg__(self):
+        return self._new(-x for x in self.nanoseconds)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return self._new(abs(x) for x in self.nanoseconds)
+
+    def __mul__(self, other):
+        if isinstance(other, (int, long)):
+            return self._new(x * other for x in self.nanoseconds)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __div__(self, other):
+        if isinstance(other, (int, long)):
+            return self._new(x // other for x in self.nanoseconds)
+        return NotImplemented
+
+    __floordiv__ = __div__
+
+    def total_seconds(self):
+        "Return the length of each element in seconds, as a float array."
+        return array('d', (x / 1e9 for x in self.nanoseconds))
+
+    # Reductions
+
+    def sum(self):
+        return TimeDelta._fromnanoseconds(sum(self.nanoseconds))
+
+    def mean(self):
+        "The arithmetic mean, rounded down to a whole nanosecond."
+        if not self.nanoseconds:
+            raise ValueError("mean of an empty TimeDeltaArray")
+        return TimeDelta._fromnanoseconds(sum(self.nanoseconds) //
+                                          len(self.nanoseconds))
+
+    def min(self):
+        return TimeDelta._fromnanoseconds(min(self.nanoseconds))
+
+    def max(self):
+        return TimeDelta._fromnanoseconds(max(self.nanoseconds))
+
+    def percentile(self, q):
+        """Return the q-th percentile (0 <= q <= 100), interpolating
+        linearly between neighbouring values like numpy.percentile does,
+        and rounding down to a whole nanosecond.
+
+        q may also be a sequence, giving a list of TimeDelta; the values
+        are sorted only once.
+        """
+        if not self.nanoseconds:
+            raise ValueError("percentile of an empty TimeDeltaArray")
+        ordered = sorted(self.nanoseconds)
+        if isinstance(q, (list, tuple)):
+            return [self._percentile(ordered, x) for x in q]
+        return self._percentile(ordered, q)
+
+    @staticmethod
+    def _percentile(ordered, q):
+        q = Fraction(q)
+        if not 0 <= q <= 100:
+            raise ValueError("percentile must be in 0..100", q)
+        pos = q * (len(ordered) - 1) / 100
+        lo = int(pos)
+        result = ordered[lo]
+        if lo < pos:
+            result += int((ordered[lo + 1] - result) * (pos - lo) // 1)
+        return TimeDelta._fromnanoseconds(result)
+
+# What == and != compare against; anything else is NotImplemented.
+DateTimeArray._operands = (DateTime, DateTimeArray)
+TimeDeltaArray._operands = (TimeDelta, TimeDeltaArray)
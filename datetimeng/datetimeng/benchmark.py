@@ -0,0 +1,268 @@
+"""benchmark.py [name] ...
+
+Time the hot paths of datetimeng.  With no arguments every benchmark is
+run; otherwise only the named ones.  Each line reports the best of a few
+repeats, in microseconds per call.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+import datetimeng
+
+NUMBER = 100000
+REPEAT = 5
+
+def report(label, stmt, number=NUMBER, calls=1):
+    "stmt makes `calls` calls of the thing being measured."
+    best = min(timeit.repeat(stmt, number=number, repeat=REPEAT))
+    print("%-40s %8.3f usec" % (label, best * 1e6 / (number * calls)))
+
+def bench_array():
+    "DateTimeArray/TimeDeltaArray against lists of objects, per element"
+    from arrays import DateTimeArray
+    start = datetimeng.DateTime(2012, 7, 14, 9, 30)
+    tick = datetimeng.TimeDelta(microseconds=1234)
+    values = [start + tick * i for i in range(10000)]
+    arr = DateTimeArray(values)
+    n = len(values)
+    report("DateTimeArray(list)", lambda: DateTimeArray(values),
+           number=20, calls=n)
+    report("list + TimeDelta", lambda: [dt + tick for dt in values],
+           number=20, calls=n)
+    report("DateTimeArray + TimeDelta", lambda: arr + tick,
+           number=20, calls=n)
+    report("[dt.hour for dt in list]", lambda: [dt.hour for dt in values],
+           number=20, calls=n)
+    report("DateTimeArray.hour", lambda: arr.hour, number=20, calls=n)
+    deltas = [dt - start for dt in values]
+    latencies = arr - start
+    report("sorted(list)[p99]", lambda: sorted(deltas)[n * 99 // 100],
+           number=20, calls=n)
+    report("TimeDeltaArray.percentile(99)", lambda: latencies.percentile(99),
+           number=20, calls=n)
+    import cPickle
+    report("cPickle round trip, list", lambda:
+           cPickle.loads(cPickle.dumps(values, 2)), number=20, calls=n)
+    report("cPickle round trip, DateTimeArray", lambda:
+           cPickle.loads(cPickle.dumps(arr, 2)), number=20, calls=n)
+
+def bench_astimezone():
+    "astimezone() per DateTime vs. astimezone_many() and DateTimeArray"
+    from arrays import DateTimeArray
+    from tzfile import TzFile
+    utc = datetimeng.UTC
+    start = datetimeng.DateTime(2012, 1, 1, tzinfo=utc)
+    step = datetimeng.TimeDelta(seconds=3163)
+    values = [start + step * i for i in range(10000)]
+    arr = DateTimeArray(values)
+    n = len(values)
+    zones = [("FixedOffset", datetimeng.FixedOffset(330))]
+    try:
+        zones.append(("TzFile", TzFile("America/New_York")))
+    except ValueError:
+        pass
+    for name, tz in zones:
+        report("[dt.astimezone(%s)]" % name,
+               lambda: [dt.astimezone(tz) for dt in values],
+               number=10, calls=n)
+        report("astimezone_many(list, %s)" % name,
+               lambda: datetimeng.astimezone_many(values, tz),
+               number=10, calls=n)
+        report("DateTimeArray.astimezone(%s)" % name,
+               lambda: arr.astimezone(tz), number=10, calls=n)
+
+def bench_codec():
+    "binary codec vs. cPickle, per DateTime"
+    import cPickle
+    start = datetimeng.DateTime(2012, 7, 14, 9, 30)
+    step = datetimeng.TimeDelta(microseconds=1234567)
+    values = [start + step * i for i in range(10000)]
+    n = len(values)
+    dt = values[1]
+    data = dt.to_bytes()
+    pickled = cPickle.dumps(dt, 2)
+    report("cPickle.dumps(dt, 2)", lambda: cPickle.dumps(dt, 2))
+    report("dt.to_bytes()", dt.to_bytes)
+    report("cPickle.loads", lambda: cPickle.loads(pickled))
+    report("DateTime.from_bytes", lambda: datetimeng.DateTime.from_bytes(data))
+    pickled = cPickle.dumps(values, 2)
+    packed = datetimeng.DateTime.pack_many(values)
+    print("%-40s %8d bytes" % ("cPickle.dumps(list, 2)", len(pickled)))
+    print("%-40s %8d bytes" % ("DateTime.pack_many(list)", len(packed)))
+    report("cPickle.dumps(list, 2)", lambda: cPickle.dumps(values, 2),
+           number=10, calls=n)
+    report("DateTime.pack_many(list)",
+           lambda: datetimeng.DateTime.pack_many(values), number=10, calls=n)
+    report("cPickle.loads(list)", lambda: cPickle.loads(pickled),
+           number=10, calls=n)
+    report("DateTime.unpack_many(memoryview)",
+           lambda: datetimeng.DateTime.unpack_many(memoryview(packed)),
+           number=10, calls=n)
+
+def bench_calendar():
+    "ordinal <-> (year, month, day), arithmetic vs. lookup tables"
+    ordinals = range(datetimeng._ymd2ord_arith(2000, 1, 1),
+                     datetimeng._ymd2ord_arith(2000, 1, 1) + 1000)
+    ymds = [datetimeng._ord2ymd_arith(n) for n in ordinals]
+    for suffix in "arith", "table":
+        ymd2ord = getattr(datetimeng, "_ymd2ord_" + suffix)
+        ord2ymd = getattr(datetimeng, "_ord2ymd_" + suffix)
+        report("_ymd2ord_%s" % suffix,
+               lambda: [ymd2ord(y, m, d) for y, m, d in ymds],
+               number=NUMBER // len(ymds), calls=len(ymds))
+        report("_ord2ymd_%s" % suffix,
+               lambda: [ord2ymd(n) for n in ordinals],
+               number=NUMBER // len(ordinals), calls=len(ordinals))
+    dt = datetimeng.Date(2012, 7, 14)
+    report("Date.toordinal", dt.toordinal)
+    report("Date.fromordinal", lambda: datetimeng.Date.fromordinal(734698))
+    start = datetimeng.DateTime(2012, 7, 14, 9, 30)
+    step = datetimeng.TimeDelta(seconds=347)
+    values = [start + step * i for i in range(10000)]
+    def group_by_day():
+        counts = {}
+        for dt in values:
+            day = dt.date()
+            counts[day] = counts.get(day, 0) + 1
+    report("group by DateTime.date()", group_by_day, number=10,
+           calls=len(values))
+
+def bench_epoch():
+    "epoch nanoseconds in and out vs. fromtimestamp()/to_timestamp()"
+    ns = 1342258215123456789
+    dt = datetimeng.DateTime.from_epoch_ns(ns)
+    report("DateTime.utcfromtimestamp", lambda:
+           datetimeng.DateTime.utcfromtimestamp(1342258215.123456))
+    report("DateTime.from_epoch_ns", lambda:
+           datetimeng.DateTime.from_epoch_ns(ns))
+    report("DateTime.to_timestamp", dt.to_timestamp)
+    report("DateTime.to_epoch_ns", dt.to_epoch_ns)
+
+def bench_fields():
+    "nanosecond/microsecond accessors, per element of a 10000-value list"
+    start = datetimeng.DateTime(2012, 7, 14, 9, 30, 15, 123456)
+    step = datetimeng.TimeDelta(microseconds=1234)
+    dts = [start + step * i for i in range(10000)]
+    n = len(dts)
+    for label, values, micro in (
+            ("DateTime", dts, "microsecond"),
+            ("Time", [dt.time() for dt in dts], "microsecond"),
+            ("TimeDelta", [dt - start for dt in dts], "microseconds")):
+        report("%s.nanosecond" % label,
+               lambda: [x.nanosecond for x in values], number=20, calls=n)
+        report("%s.%s" % (label, micro),
+               lambda: [getattr(x, micro) for x in values], number=20,
+               calls=n)
+    def bucket():
+        counts = [0] * 10
+        for dt in dts:
+            counts[dt.nanosecond // 100000000] += 1
+    report("bucket by DateTime.nanosecond", bucket, number=20, calls=n)
+
+def bench_fixed():
+    "naive vs. UTC and FixedOffset aware DateTimes"
+    naive = datetimeng.DateTime(2012, 7, 14, 9, 30, 15, 123456)
+    utc = naive.replace(tzinfo=datetimeng.UTC)
+    ist = datetimeng.FixedOffset(330)
+    for label, dt in ("naive", naive), ("UTC", utc):
+        report("hash(%s)" % label, lambda: hash(dt))
+        report("%s.isoformat()" % label, dt.isoformat)
+        report("%s - %s" % (label, label), lambda: dt - dt)
+    report("UTC.astimezone(+05:30)", lambda: utc.astimezone(ist))
+
+def bench_hash():
+    "hash() of each value type, and set() dedup of event timestamps"
+    dt = datetimeng.DateTime(2012, 7, 14, 9, 30, 15, 123456)
+    ist = datetimeng.FixedOffset(330)
+    for label, value in [("Date", dt.date()), ("Time", dt.time()),
+                         ("Time, +05:30", dt.timetz().replace(tzinfo=ist)),
+                         ("DateTime", dt),
+                         ("DateTime, +05:30", dt.replace(tzinfo=ist)),
+                         ("TimeDelta", dt - dt.replace(hour=0))]:
+        report("hash(%s)" % label, lambda: hash(value))
+    step = datetimeng.TimeDelta(milliseconds=250)
+    values = [dt.replace(tzinfo=datetimeng.UTC) + step * (i // 3)
+              for i in range(10000)]
+    report("set(list of DateTime)", lambda: set(values), number=20,
+           calls=len(values))
+
+def bench_now():
+    "current time: fromtimestamp(time.time()) vs. now()"
+    import time
+    report("DateTime.fromtimestamp(time.time())", lambda:
+           datetimeng.DateTime.fromtimestamp(time.time()))
+    report("DateTime.now()", datetimeng.DateTime.now)
+    report("DateTime.utcnow()", datetimeng.DateTime.utcnow)
+    report("now_ns()", datetimeng.now_ns)
+    clock = datetimeng.AnchoredClock()
+    previous = datetimeng.set_clock(clock)
+    try:
+        report("now_ns(), anchored clock", datetimeng.now_ns)
+        report("DateTime.now(), anchored clock", datetimeng.DateTime.now)
+    finally:
+        datetimeng.set_clock(previous)
+
+def bench_parse():
+    "parsing: strptime() vs. compile_format() vs. fromisoformat()"
+    s = "2012-07-14T09:30:15.123456"
+    report("DateTime.strptime", lambda:
+           datetimeng.DateTime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f"),
+           number=NUMBER // 10)
+    report("DateTime.fromisoformat", lambda:
+           datetimeng.DateTime.fromisoformat(s))
+    parser = datetimeng.DateTime.compile_format("%Y-%m-%dT%H:%M:%S.%f")
+    report("CompiledFormat.parse", lambda: parser.parse(s))
+    s = "2012-07-14T09:30:15.123456789+02:00"
+    report("DateTime.fromisoformat (ns, offset)", lambda:
+           datetimeng.DateTime.fromisoformat(s))
+
+def bench_strftime():
+    "strftime() with a few log-record patterns"
+    dt = datetimeng.DateTime(2012, 7, 14, 9, 30, 15, 123456)
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%d/%b/%Y:%H:%M:%S %z",
+                "%H:%M:%S.%N"):
+        report("DateTime.strftime(%r)" % fmt, lambda: dt.strftime(fmt))
+
+def bench_zones():
+    "utcoffset() of the example tzinfo classes and TzFile"
+    import datetime
+    import US
+    dt = datetime.datetime(2012, 7, 14, 9, 30, tzinfo=US.Eastern)
+    report("US.Eastern.utcoffset", dt.utcoffset)
+    day = [dt + datetime.timedelta(minutes=i) for i in range(1000)]
+    report("US.Eastern.utcoffsets", lambda: US.Eastern.utcoffsets(day),
+           number=NUMBER // len(day), calls=len(day))
+    import EU
+    dt = datetime.datetime(2012, 7, 14, 9, 30, tzinfo=EU.CentralEU)
+    report("EU.CentralEU.utcoffset", dt.utcoffset)
+    utc = dt.astimezone(EU.UTC)
+    report("astimezone(EU.CentralEU)", lambda: utc.astimezone(EU.CentralEU))
+    import Local
+    dt = datetime.datetime(2012, 7, 14, 9, 30, tzinfo=Local.Local)
+    report("Local.Local.utcoffset", dt.utcoffset)
+    from tzfile import TzFile
+    try:
+        tz = TzFile("America/New_York")
+    except ValueError:
+        return
+    dt = datetimeng.DateTime(2012, 7, 14, 9, 30, tzinfo=tz)
+    report("TzFile.utcoffset", dt.utcoffset)
+    report("TzFile('America/New_York')", lambda: TzFile("America/New_York"))
+    utc = dt.astimezone(datetimeng.UTC)
+    report("astimezone(TzFile)", lambda: utc.astimezone(tz))
+
+benchmarks = [(name[6:], func) for name, func in sorted(globals().items())
+              if name.startswith("bench_")]
+
+def main(names):
+    for name, func in benchmarks:
+        if names and name not in names:
+            continue
+        print("%s: %s" % (name, func.__doc__))
+        func()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -21,9 +21,15 @@ Thanks to Tim Peters for suggesting using it.
 """
 
 import datetime
+import os as _os
+import struct as _struct
+import sys as _sys
 import time as _time
 
-from decimal import Decimal, InvalidOperation
+from bisect import bisect_left as _bisect_left
+from itertools import islice as _islice
+
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR
 
 MINYEAR = 1
 MAXYEAR = 9999
@@ -72,7 +78,7 @@ def _days_before_month(year, month):
         raise ValueError('month must be in 1..12', month)
     return _DAYS_BEFORE_MONTH[month] + (month > 2 and _is_leap(year))
 
-def _ymd2ord(year, month, day):
+def _ymd2ord_arith(year, month, day):
     "year, month, day -> ordinal, considering 01-Jan-0001 as day 1."
     if not 1 <= month <= 12:
         raise ValueError('month must be in 1..12', month)
@@ -99,7 +105,7 @@ assert _DI400Y == 4 * _DI100Y + 1
 # pasting together 25 4-year cycles.
 assert _DI100Y == 25 * _DI4Y - 1
 
-def _ord2ymd(n):
+def _ord2ymd_arith(n):
     "ordinal -> (year, month, day), considering 01-Jan-0001 as day 1."
 
     # n is a 1-based index, starting at 1-Jan-1.  The pattern of leap years
@@ -161,6 +167,58 @@ def _ord2ymd(n):
     # start of that month:  we're done!
     return year, month, n+1
 
+# The functions above recompute the 400/100/4-year cycles on every call.
+# Since only MINYEAR..MAXYEAR can ever be represented, it's cheaper to
+# tabulate the ordinal of every year start once, at import time, and
+# answer both conversions with a couple of list lookups (plus a C bisect
+# to find the year of an ordinal).  The tables cost a few hundred KB; set
+# DATETIMENG_CALENDAR_TABLES=0 in the environment to fall back to the
+# arithmetic versions.  Out of range values always take the arithmetic
+# path, which tmxxx and the overflow checks rely on.
+
+# _YEAR_START[y] -> days before January 1st of year y, for 0 <= y <= MAXYEAR+1
+_YEAR_START = [_days_before_year(y) for y in range(MAXYEAR + 2)]
+# _YEAR_LEAP[y] -> 1 if y is a leap year, else 0
+_YEAR_LEAP = [int(_is_leap(y)) for y in range(MAXYEAR + 2)]
+# indexed by _YEAR_LEAP[y], then by month
+_MONTH_DAYS = (_DAYS_IN_MONTH, _DAYS_IN_MONTH[:2] + [29] + _DAYS_IN_MONTH[3:])
+_MONTH_START = (_DAYS_BEFORE_MONTH,
+                _DAYS_BEFORE_MONTH[:3] + [dbm + 1 for dbm in
+                                          _DAYS_BEFORE_MONTH[3:]])
+# indexed by _YEAR_LEAP[y], then by day of the year (1-based) -> month
+_YEARDAY_MONTH = tuple([None] + [m for m in range(1, 13)
+                                 for i in range(dim[m])]
+                       for dim in _MONTH_DAYS)
+_MINORD = _YEAR_START[MINYEAR] + 1
+_MAXORD = _YEAR_START[MAXYEAR + 1]
+
+def _ymd2ord_table(year, month, day):
+    "year, month, day -> ordinal, considering 01-Jan-0001 as day 1."
+    if not MINYEAR <= year <= MAXYEAR:
+        return _ymd2ord_arith(year, month, day)
+    if not 1 <= month <= 12:
+        raise ValueError('month must be in 1..12', month)
+    leap = _YEAR_LEAP[year]
+    dim = _MONTH_DAYS[leap][month]
+    if not 1 <= day <= dim:
+        raise ValueError('day must be in 1..%d' % dim, day)
+    return _YEAR_START[year] + _MONTH_START[leap][month] + day
+
+def _ord2ymd_table(n):
+    "ordinal -> (year, month, day), considering 01-Jan-0001 as day 1."
+    if not _MINORD <= n <= _MAXORD:
+        return _ord2ymd_arith(n)
+    year = _bisect_left(_YEAR_START, n) - 1
+    n -= _YEAR_START[year]
+    leap = _YEAR_LEAP[year]
+    month = _YEARDAY_MONTH[leap][n]
+    return year, month, n - _MONTH_START[leap][month]
+
+if _os.environ.get('DATETIMENG_CALENDAR_TABLES', '1') == '0':
+    _ymd2ord, _ord2ymd = _ymd2ord_arith, _ord2ymd_arith
+else:
+    _ymd2ord, _ord2ymd = _ymd2ord_table, _ord2ymd_table
+
 # Month and day names.  For localized versions, see the calendar module.
 _MONTHNAMES = [None, "Jan", "Feb", "Mar", "Apr", "May", "Jun",
                      "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
@@ -172,9 +230,9 @@ def _build_struct_Time(y, m, d, hh, mm, ss, dstflag):
     dnum = _days_before_month(y, m) + d
     return _time.struct_time((y, m, d, hh, mm, ss, wday, dnum, dstflag))
 
-def _format_Time(hh, mm, ss):
+def _format_Time(hh, mm, ss, ns):
     result = "%02d:%02d:%02d" % (hh, mm, ss)
-    us = _microsecond(ss)
+    us = ns // 1000
     if us:
         result += '.%06d' % us
     return result
@@ -186,6 +244,77 @@ def _pack_string(*args):
     fmt = '%c' * len(args)
     return fmt % args
 
+# The binary codec (to_bytes(), pack_many() and friends) writes fixed-width
+# big-endian records; a record format is a string of struct codes, one per
+# field.  Many records go through one struct call, _CODEC_CHUNK at a time.
+_CODEC_CHUNK = 1024
+_codec_structs = {}
+
+def _codec_struct(fields, count):
+    "Struct for count consecutive records of the given format."
+    try:
+        return _codec_structs[fields, count]
+    except KeyError:
+        pass
+    result = _struct.Struct(">" + fields * count)
+    if count == 1 or count == _CODEC_CHUNK:
+        _codec_structs[fields, count] = result
+    return result
+
+def _unpack_one(fields, build, data):
+    "build(*fields) of the single record that must make up data."
+    record = _codec_struct(fields, 1)
+    if len(data) != record.size:
+        raise ValueError("expected %d bytes, got %d" % (record.size,
+                                                        len(data)))
+    return build(*record.unpack_from(data))
+
+def _pack_many(fields, encode, values):
+    """The records of all values concatenated; encode(value) returns the
+    fields of one record.
+    """
+    pieces = []
+    values = iter(values)
+    count = _CODEC_CHUNK
+    while count == _CODEC_CHUNK:
+        flat = []
+        extend = flat.extend
+        for value in _islice(values, _CODEC_CHUNK):
+            extend(encode(value))
+        count = len(flat) // len(fields)
+        if count:
+            pieces.append(_codec_struct(fields, count).pack(*flat))
+    return "".join(pieces)
+
+def _unpack_many(fields, build, data):
+    """Decode consecutive records from data, which may be any buffer (str,
+    bytearray, memoryview); build(*fields) returns the value of a record.
+    """
+    size = _codec_struct(fields, 1).size
+    n, extra = divmod(len(data), size)
+    if extra:
+        raise ValueError("buffer length %d is not a multiple of %d" %
+                         (len(data), size))
+    width = len(fields)
+    result = []
+    for start in range(0, n, _CODEC_CHUNK):
+        count = min(n - start, _CODEC_CHUNK)
+        flat = _codec_struct(fields, count).unpack_from(data, start * size)
+        result.extend(map(build, *[flat[i::width] for i in range(width)]))
+    return result
+
+def _codec_offset(value, aware):
+    """value's UTC offset in minutes, for a record that must be aware or
+    naive as given.
+    """
+    offset = None
+    if value.tzinfo is not None:
+        offset = value._utcoffset()
+    if aware != (offset is not None):
+        raise ValueError("expected %s value, got %r" %
+                         (("a naive", "an aware")[aware], value))
+    return offset
+
 # we wrap the Decimal constructor for two reasons.  First, we want to
 # quantize everything to nanoseconds.  Seconds, python 2.6 Decimal
 # can't be constructed directly from a float but this wrapper can
@@ -199,83 +328,179 @@ def _to_decimal(d):
     except TypeError:
         return _to_decimal(str(d))
 
-def _make_sec_decimal(s, ns):
-    return _to_decimal(s) + _to_decimal(ns) / 1000000000
+# Internally seconds are always kept as a pair of integers (whole seconds,
+# nanoseconds).  Decimal only comes into play when the user hands us a
+# non-integer value, or explicitly asks for one via second_decimal.
+
+def _to_nanoseconds(value, scale=1000000000, rounding=None):
+    """Given an int, long, float, string or Decimal amount of a unit worth
+    `scale` nanoseconds return it as an integer number of nanoseconds,
+    rounded with the given decimal rounding mode (default: to nearest)
+    """
+    if isinstance(value, (int, long)):
+        return value * scale
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ValueError('invalid literal for Decimal: %r' % (value,))
+    except TypeError:
+        value = Decimal(str(value))
+    return int((value * scale).to_integral_value(rounding))
+
+def _split_second(second, microsecond):
+    """Given a second (possibly fractional) and an optional microsecond
+    return the pair (whole seconds, nanoseconds) as integers
+    """
+    if microsecond is None:
+        microsecond = 0
+    if (isinstance(second, (int, long)) and
+        isinstance(microsecond, (int, long))):
+        return second, microsecond * 1000
+    ns = _to_nanoseconds(second) + _to_nanoseconds(microsecond, 1000)
+    if ns >= 60000000000:
+        # Rounding to whole nanoseconds mustn't carry into the next minute:
+        # 59.9999999999 is truncated to 59.999999999 instead.
+        if (_to_nanoseconds(second, rounding=ROUND_FLOOR) +
+                _to_nanoseconds(microsecond, 1000, ROUND_FLOOR)) >= 60000000000:
+            raise ValueError('second must be in 0..59', second, microsecond)
+        return 59, 999999999
+    return divmod(ns, 1000000000)
+
+def _sec_decimal(s, ns):
+    """Given whole seconds and nanoseconds return the seconds as a Decimal,
+    without trailing zeros
+    """
+    if not ns:
+        return Decimal(s)
+    return Decimal(('%d.%09d' % (s, ns)).rstrip('0'))
 
 def _second_tuple(s):
     """Given a string or Decimal return its integer and fractional parts as Decimal
     """
     return divmod(_to_decimal(s), 1)
 
-def _microsecond(s):
-    """Given a Decimal representing a second returns its microseconds
-    """
-    return int(divmod(Decimal(s), 1)[1]*Decimal(1000000))
+# strfTime() formats are compiled once into a %-template plus a tuple of
+# emitters, and rendered from the object's fields without going through
+# time.strftime() for the common directives (so there's no year >= 1900
+# restriction for those).  Each emitter is called as emitter(fields, object),
+# where fields is (year, month, day, hour, minute, second, nanosecond).
 
-def _nanosecond(s):
-    """Given a Decimal representing a second returns its nanoseconds
-    """
-    return int(divmod(Decimal(s), 1)[1]*Decimal(1000000000))
-
-# Correctly substitute for %z and %Z escapes in strfTime formats.
-def _wrap_strfTime(object, format, timetuple):
-    year = timetuple[0]
-    if year < 1900:
-        raise ValueError("year=%d is before 1900; the DateTime strfTime() "
-                         "methods require year >= 1900" % year)
-    # Don't call _utcoffset() or tzname() unless actually needed.
-    freplace = None # the string to use for %f
-    zreplace = None # the string to use for %z
-    Zreplace = None # the string to use for %Z
-
-    # Scan format for %z and %Z escapes, replacing as needed.
-    newformat = []
-    push = newformat.append
+def _weekday(f):
+    "Day of the week, Monday == 0."
+    return (_ymd2ord(f[0], f[1], f[2]) + 6) % 7
+
+def _yearday(f):
+    "Day of the year, January 1st == 1."
+    return _days_before_month(f[0], f[1]) + f[2]
+
+def _strfTime_z(f, object):
+    offset = None
+    if hasattr(object, "_utcoffset"):
+        offset = object._utcoffset()
+    if offset is None:
+        return ""
+    sign = '+'
+    if offset < 0:
+        offset = -offset
+        sign = '-'
+    h, m = divmod(offset, 60)
+    return '%c%02d%02d' % (sign, h, m)
+
+def _strfTime_Z(f, object):
+    s = None
+    if hasattr(object, "tzname"):
+        s = object.tzname()
+    if s is None:
+        return ""
+    return s
+
+def _strfTime_names(directive):
+    # Locale dependent names only need the month, weekday or hour, so a
+    # dummy year keeps time.strftime() happy.
+    def emit(f, object):
+        return _time.strftime(directive, (1900, f[1], 1, f[3], 0, 0,
+                                          _weekday(f), 1, -1))
+    return emit
+
+def _strfTime_other(directive):
+    def emit(f, object):
+        if f[0] < 1900:
+            raise ValueError("year=%d is before 1900; the DateTime strfTime() "
+                             "methods require year >= 1900 for %s" %
+                             (f[0], directive))
+        return _time.strftime(directive, (f[0], f[1], f[2], f[3], f[4], f[5],
+                                          _weekday(f), _yearday(f), -1))
+    return emit
+
+_STRFTIME_DIRECTIVES = {
+    'Y': ('%04d', lambda f, o: f[0]),
+    'y': ('%02d', lambda f, o: f[0] % 100),
+    'm': ('%02d', lambda f, o: f[1]),
+    'd': ('%02d', lambda f, o: f[2]),
+    'H': ('%02d', lambda f, o: f[3]),
+    'I': ('%02d', lambda f, o: (f[3] + 11) % 12 + 1),
+    'M': ('%02d', lambda f, o: f[4]),
+    'S': ('%02d', lambda f, o: f[5]),
+    'f': ('%06d', lambda f, o: f[6] // 1000),
+    'N': ('%09d', lambda f, o: f[6]),   # nanosecond
+    'j': ('%03d', lambda f, o: _yearday(f)),
+    'w': ('%d', lambda f, o: (_weekday(f) + 1) % 7),
+    'u': ('%d', lambda f, o: _weekday(f) + 1),
+    'U': ('%02d', lambda f, o: (_yearday(f) + 6 - (_weekday(f) + 1) % 7) // 7),
+    'W': ('%02d', lambda f, o: (_yearday(f) + 6 - _weekday(f)) // 7),
+    'z': ('%s', _strfTime_z),
+    'Z': ('%s', _strfTime_Z),
+    }
+for ch in 'aAbBp':
+    _STRFTIME_DIRECTIVES[ch] = ('%s', _strfTime_names('%' + ch))
+del ch
+
+_STRFTIME_CACHE = {}
+_MAXCACHE = 100
+
+def _compile_strfTime(format):
+    "format -> (template, emitters); see _wrap_strfTime()."
+    if not isinstance(format, basestring):
+        raise TypeError("strftime() argument must be a string, not %s" %
+                        type(format).__name__)
+    template = []
+    push = template.append
+    emitters = []
     i, n = 0, len(format)
     while i < n:
         ch = format[i]
         i += 1
-        if ch == '%':
-            if i < n:
-                ch = format[i]
-                i += 1
-                if ch == 'f':
-                    if freplace is None:
-                        seconds = getattr(object, 'second_decimal', 0)
-                        freplace = '%06d' % _microsecond(seconds)
-                    newformat.append(freplace)
-                elif ch == 'z':
-                    if zreplace is None:
-                        zreplace = ""
-                        if hasattr(object, "_utcoffset"):
-                            offset = object._utcoffset()
-                            if offset is not None:
-                                sign = '+'
-                                if offset < 0:
-                                    offset = -offset
-                                    sign = '-'
-                                h, m = divmod(offset, 60)
-                                zreplace = '%c%02d%02d' % (sign, h, m)
-                    assert '%' not in zreplace
-                    newformat.append(zreplace)
-                elif ch == 'Z':
-                    if Zreplace is None:
-                        Zreplace = ""
-                        if hasattr(object, "tzname"):
-                            s = object.tzname()
-                            if s is not None:
-                                # strfTime is going to have at this: escape %
-                                Zreplace = s.replace('%', '%%')
-                    newformat.append(Zreplace)
-                else:
-                    push('%')
-                    push(ch)
-            else:
-                push('%')
-        else:
+        if ch != '%':
             push(ch)
-    newformat = "".join(newformat)
-    return _time.strftime(newformat, timetuple)
+        elif i == n or format[i] == '%':
+            push('%%')
+            i += 1
+        else:
+            ch = format[i]
+            i += 1
+            try:
+                spec, emitter = _STRFTIME_DIRECTIVES[ch]
+            except KeyError:
+                spec, emitter = '%s', _strfTime_other('%' + ch)
+            push(spec)
+            emitters.append(emitter)
+    template = "".join(template)
+    if not emitters:
+        template = template % ()
+    return template, tuple(emitters)
+
+def _wrap_strfTime(object, format, fields):
+    "Format object, whose fields are as described above, according to format."
+    try:
+        template, emitters = _STRFTIME_CACHE[format]
+    except (KeyError, TypeError):
+        if len(_STRFTIME_CACHE) >= _MAXCACHE:
+            _STRFTIME_CACHE.clear()
+        template, emitters = _STRFTIME_CACHE[format] = \
+            _compile_strfTime(format)
+    if not emitters:
+        return template
+    return template % tuple([emit(fields, object) for emit in emitters])
 
 def _call_TzInfo_method(tzinfo, methname, tzinfoarg):
     if tzinfo is None:
@@ -332,7 +557,7 @@ def _check_Time_fields(hour, minute, second, microsecond):
         raise ValueError('hour must be in 0..23', hour)
     if not 0 <= minute <= 59:
         raise ValueError('minute must be in 0..59', minute)
-    if not 0 <= int(second) < 60:
+    if not 0 <= second or int(second) >= 60:
         raise ValueError('second must be in 0..59', second)
     if not 0 <= microsecond <= 999999:
         raise ValueError('microsecond must be in 0..999999')
@@ -379,6 +604,137 @@ def _cmperror(x, y):
 # into the minutes argument (and the constructor will normalize).
 
 _ORD1970 = _ymd2ord(1970, 1, 1) # base ordinal for UNIX epoch
+# range of nanoseconds since the epoch, as used by from_epoch_ns()
+_MIN_EPOCH_NS = (1 - _ORD1970) * 86400000000000
+_MAX_EPOCH_NS = (_MAXORD + 1 - _ORD1970) * 86400000000000 - 1
+
+def _wall_seconds(dt):
+    """The naive fields of dt (a DateTime or a datetime.datetime) as whole
+    seconds counted in toordinal() days; what the tzinfo modules compare
+    against transition times, which fall on whole seconds.
+    """
+    return ((dt.toordinal() * 24 + dt.hour) * 60 + dt.minute) * 60 + dt.second
+
+# Clocks, as integer nanoseconds.  time.time_ns() and time.monotonic_ns()
+# are used where the running Python has them; otherwise (Python 2) the C
+# library's clock_gettime() is called through ctypes, which keeps the full
+# nanosecond resolution that time.time()'s float loses.
+
+# clock_gettime() clock ids that time.CLOCK_* would give on Python 3.3+.
+_CLOCK_REALTIME = 0
+_CLOCK_MONOTONIC = {'linux': 1, 'darwin': 6, 'freebsd': 4}
+
+def _clock_gettime(clock_id):
+    """Return a function reading clock_gettime(clock_id) as integer
+    nanoseconds, or None if ctypes or the C library can't provide one.
+    """
+    try:
+        import ctypes
+        clock_gettime = ctypes.CDLL(None, use_errno=True).clock_gettime
+    except (ImportError, OSError, AttributeError):
+        return None
+
+    class timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+    byref = ctypes.byref
+
+    def read():
+        ts = timespec()
+        if clock_gettime(clock_id, byref(ts)):
+            errno = ctypes.get_errno()
+            raise OSError(errno, _os.strerror(errno))
+        return ts.tv_sec * 1000000000 + ts.tv_nsec
+
+    try:
+        read()
+    except OSError:
+        return None
+    return read
+
+def _platform_clock(monotonic):
+    "clock_gettime() reader of CLOCK_MONOTONIC or CLOCK_REALTIME, or None."
+    for platform, clock_id in _CLOCK_MONOTONIC.items():
+        if _sys.platform.startswith(platform):
+            return _clock_gettime(clock_id if monotonic else _CLOCK_REALTIME)
+    return None
+
+try:
+    _time_ns = _time.time_ns
+except AttributeError:
+    _time_ns = _platform_clock(False)
+    if _time_ns is None:
+        def _time_ns():
+            return int(_time.time() * 1e9)
+
+try:
+    _monotonic_ns = _time.monotonic_ns
+except AttributeError:
+    if hasattr(_time, 'monotonic'):
+        def _monotonic_ns():
+            return int(_time.monotonic() * 1e9)
+    else:
+        _monotonic_ns = _platform_clock(True)
+
+class AnchoredClock(object):
+    """A wall clock read once, then advanced by a monotonic clock.
+
+    Calling the clock returns nanoseconds since the epoch without reading
+    the system wall clock again, so it doesn't jump when the system clock
+    is stepped; call resync() to pick up such adjustments.  Install it with
+    set_clock(AnchoredClock()).
+
+    monotonic_ns, a function returning integer nanoseconds, defaults to
+    time.monotonic_ns(), time.monotonic() or clock_gettime(CLOCK_MONOTONIC).
+    Where none of those exist the wall clock itself is used, so the clock
+    still works but follows any steps of the system clock.
+    """
+
+    def __init__(self, monotonic_ns=None):
+        if monotonic_ns is None:
+            monotonic_ns = _monotonic_ns or _time_ns
+        self.monotonic_ns = monotonic_ns
+        self.resync()
+
+    def resync(self):
+        "Read the wall clock again."
+        self._anchor = _time_ns() - self.monotonic_ns()
+
+    def __call__(self):
+        return self._anchor + self.monotonic_ns()
+
+_clock_ns = _time_ns
+
+def set_clock(clock=None):
+    """Make now_ns(), and so DateTime.now() and utcnow(), read clock: a
+    function returning integer nanoseconds since the epoch, such as an
+    AnchoredClock.  None restores the system clock.  Returns the clock
+    that was in use.
+    """
+    global _clock_ns
+    previous = _clock_ns
+    _clock_ns = clock or _time_ns
+    return previous
+
+def now_ns():
+    "Return the current time as integer nanoseconds since the epoch."
+    return _clock_ns()
+
+# (epoch minute, UTC offset in ns) of the last local time looked up by
+# DateTime.now(); offsets only change on minute boundaries.
+_local_offset = (None, 0)
+
+def _local_offset_ns(seconds):
+    global _local_offset
+    minute = seconds // 60
+    if _local_offset[0] == minute:
+        return _local_offset[1]
+    y, m, d, hh, mm, ss = _time.localtime(seconds)[:6]
+    offset = (((((_ymd2ord(y, m, d) - _ORD1970) * 24 + hh) * 60 + mm) * 60 +
+               ss) - seconds) * 1000000000
+    _local_offset = (minute, offset)
+    return offset
 
 class tmxxx:
 
@@ -481,10 +837,12 @@ class TimeDelta(object):
     returning a timedelta, and addition or subtraction of a datetime
     and a timedelta giving a datetime.
 
-    Representation: (days, seconds, microseconds).  Why?  Because I
+    Representation: (days, seconds, nanoseconds).  Why?  Because I
     felt like it.
     """
 
+    __slots__ = ('__days', '__seconds', '__nanoseconds')
+
     def __new__(cls, days=0, seconds=0, microseconds=0,
                 # XXX The following should only be used as keyword args:
                 milliseconds=0, minutes=0, hours=0, weeks=0):
@@ -498,58 +856,69 @@ class TimeDelta(object):
 
         # XXX Check that all inputs are ints, longs or floats.
 
-        # Final values, all integer.
-        # s and us fit in 32-bit signed ints; d isn't bounded.
-        d = s = 0
-
-        # Normalize everything to days, seconds, microseconds.
-        days += weeks*7
-        seconds += minutes*60 + hours*3600
-        if milliseconds:
-            seconds += _to_decimal(milliseconds)/1000
-        if microseconds:
-            seconds += _to_decimal(microseconds)/1000000
-
-        s = _to_decimal(days*24*3600)+_to_decimal(seconds)
-
-        d, s = divmod(s, 24*3600)
-
-        if s < 0:
-            d -= 1
-            s += 24*3600
-
-        self = object.__new__(cls)
-
-        self.__days = int(d)
-        self.__seconds = s
+        # Normalize everything to a single count of nanoseconds.  When all
+        # the inputs are integers (by far the common case) this is plain
+        # integer arithmetic; anything else goes through Decimal once.
+        if (isinstance(days, (int, long)) and
+            isinstance(seconds, (int, long)) and
+            isinstance(microseconds, (int, long)) and
+            isinstance(milliseconds, (int, long)) and
+            isinstance(minutes, (int, long)) and
+            isinstance(hours, (int, long)) and
+            isinstance(weeks, (int, long))):
+            ns = (((((weeks*7 + days)*24 + hours)*60 + minutes)*60 + seconds)
+                  * 1000000000 + milliseconds * 1000000 + microseconds * 1000)
+        else:
+            days += weeks*7
+            seconds += minutes*60 + hours*3600
+            ns = (_to_nanoseconds(days, 24*3600*1000000000) +
+                  _to_nanoseconds(seconds) +
+                  _to_nanoseconds(milliseconds, 1000000) +
+                  _to_nanoseconds(microseconds, 1000))
 
         #overflow has no sense anymore
         # if abs(d) > 999999999:
         #     raise OverflowError("timedelta # of days is too large: %d" % d)
 
+        return cls._fromnanoseconds(ns)
+
+    @classmethod
+    def _fromnanoseconds(cls, ns):
+        "Construct a TimeDelta from an integer number of nanoseconds."
+        self = object.__new__(cls)
+        s, ns = divmod(ns, 1000000000)
+        d, s = divmod(s, 24*3600)
+        self.__days = int(d)
+        self.__seconds = int(s)
+        self.__nanoseconds = int(ns)
         return self
 
+    def _tonanoseconds(self):
+        "Return the whole duration as an integer number of nanoseconds."
+        return ((self.__days * (24*3600) + self.__seconds) * 1000000000 +
+                self.__nanoseconds)
+
     def __repr__(self):
         # if self.__microseconds:
         #     return "%s(%d, %d, %d)" % ('datetimeng.' + self.__class__.__name__,
         #                                self.__days,
         #                                self.__seconds,
         #                                self.__microseconds)
-        if self.__seconds:
+        if self.__seconds or self.__nanoseconds:
             return "%s(%d, %s)" % ('datetimeng.' + self.__class__.__name__,
                                    self.__days,
-                                   self.__seconds)
+                                   self.seconds_decimal)
         return "%s(%d)" % ('datetimeng.' + self.__class__.__name__, self.__days)
 
     def __str__(self):
         mm, ss = divmod(self.__seconds, 60)
         hh, mm = divmod(mm, 60)
-        s = "%d:%02d:%02d" % (hh, mm, int(ss))
+        s = "%d:%02d:%02d" % (hh, mm, ss)
         if self.__days:
             def plural(n):
                 return n, abs(n) != 1 and "s" or ""
             s = ("%d day%s, " % plural(self.__days)) + s
-        us = _microsecond(self.__seconds)
+        us = self.__nanoseconds // 1000
         if us:
             s = s + '.%06d' % us
         return s
@@ -557,25 +926,28 @@ class TimeDelta(object):
     def total_seconds(self):
         return (self.days * 86400 + self.seconds_decimal)
     days = property(lambda self: self.__days, doc="days")
-    seconds = property(lambda self: int(self.__seconds), doc="seconds")
-    seconds_decimal = property(lambda self: self.__seconds, doc="seconds as Decimal")
-    microseconds = property(lambda self: _microsecond(self.__seconds),
+    seconds = property(lambda self: self.__seconds, doc="seconds")
+    seconds_decimal = property(lambda self: Decimal('%d.%09d' % (self.__seconds,
+                                                                 self.__nanoseconds)),
+                               doc="seconds as Decimal")
+    microseconds = property(lambda self: self.__nanoseconds // 1000,
                             doc="microseconds")
-    nanosecond = property(lambda self: _nanosecond(self.__seconds), doc="nanosecond (0-999999999)")
+    nanosecond = property(lambda self: self.__nanoseconds, doc="nanosecond (0-999999999)")
 
     def __add__(self, other):
         if isinstance(other, TimeDelta):
             # for CPython compatibility, we cannot use
             # our __class__ here, but need a real TimeDelta
-            return TimeDelta(self.__days + other.__days,
-                             self.__seconds + other.__seconds)
+            return TimeDelta._fromnanoseconds(self._tonanoseconds() +
+                                              other._tonanoseconds())
         return NotImplemented
 
     __radd__ = __add__
 
     def __sub__(self, other):
         if isinstance(other, TimeDelta):
-            return self + -other
+            return TimeDelta._fromnanoseconds(self._tonanoseconds() -
+                                              other._tonanoseconds())
         return NotImplemented
 
     def __rsub__(self, other):
@@ -586,7 +958,7 @@ class TimeDelta(object):
     def __neg__(self):
         # for CPython compatibility, we cannot use
         # our __class__ here, but need a real TimeDelta
-        return TimeDelta(-self.__days, -self.__seconds)
+        return TimeDelta._fromnanoseconds(-self._tonanoseconds())
 
     def __pos__(self):
         return self
@@ -601,16 +973,14 @@ class TimeDelta(object):
         if isinstance(other, (int, long)):
             # for CPython compatibility, we cannot use
             # our __class__ here, but need a real timedelta
-            return TimeDelta(self.__days * other,
-                             self.__seconds * other)
+            return TimeDelta._fromnanoseconds(self._tonanoseconds() * other)
         return NotImplemented
 
     __rmul__ = __mul__
 
     def __div__(self, other):
         if isinstance(other, (int, long)):
-            sec = (self.__days * (24*3600L) + self.__seconds)
-            return TimeDelta(0, sec / other)
+            return TimeDelta._fromnanoseconds(self._tonanoseconds() // other)
         return NotImplemented
 
     __floordiv__ = __div__
@@ -655,25 +1025,71 @@ class TimeDelta(object):
 
     def __cmp(self, other):
         assert isinstance(other, TimeDelta)
-        return cmp(self.__getstate(), other.__getstate())
+        return cmp((self.__days, self.__seconds, self.__nanoseconds),
+                   (other.__days, other.__seconds, other.__nanoseconds))
 
     def __hash__(self):
-        return hash(self.__getstate())
+        # Hashed from the total in integer nanoseconds, a few int operations.
+        # There is no slot to keep the hash in: TimeDelta stays within the
+        # 9 word budget checked by TestMemoryLayout.
+        return hash((self.__days * 86400 + self.__seconds) * 1000000000 +
+                    self.__nanoseconds)
 
     def __nonzero__(self):
         return (self.__days != 0 or
-                self.__seconds != 0)
+                self.__seconds != 0 or
+                self.__nanoseconds != 0)
 
     # Pickle support.
 
     __safe_for_unpickling__ = True      # For Python 2.2
 
     def __getstate(self):
-        return (self.__days, self.__seconds)
+        return (self.__days, self.seconds_decimal)
 
     def __reduce__(self):
         return (self.__class__, self.__getstate())
 
+    # Binary codec: days as a signed 32 bit int, then the nanoseconds into
+    # the last day as an unsigned 64 bit one; 12 bytes.
+
+    def _record(self):
+        days = self.__days
+        if not -999999999 <= days <= 999999999:
+            raise OverflowError("TimeDelta of %d days outside the binary "
+                                "codec's range" % days)
+        return days, self.__seconds * 1000000000 + self.__nanoseconds
+
+    @classmethod
+    def _from_record(cls, days, ns):
+        if not (-999999999 <= days <= 999999999 and ns < 86400000000000):
+            raise ValueError("invalid TimeDelta record")
+        self = object.__new__(cls)
+        self.__days = days
+        self.__seconds, self.__nanoseconds = divmod(ns, 1000000000)
+        return self
+
+    def to_bytes(self):
+        "Return the 12 byte binary form; see from_bytes() and pack_many()."
+        return _codec_struct("iQ", 1).pack(*self._record())
+
+    @classmethod
+    def from_bytes(cls, data):
+        "Construct a TimeDelta from the bytes to_bytes() returns."
+        return _unpack_one("iQ", cls._from_record, data)
+
+    @staticmethod
+    def pack_many(values):
+        "Return the to_bytes() of every TimeDelta in values, concatenated."
+        return _pack_many("iQ", TimeDelta._record, values)
+
+    @classmethod
+    def unpack_many(cls, data):
+        """Return a list of the TimeDeltas in data, as pack_many() returns;
+        data may be any buffer, including a memoryview.
+        """
+        return _unpack_many("iQ", cls._from_record, data)
+
 TimeDelta.min = TimeDelta(-999999999)
 TimeDelta.max = TimeDelta(days=999999999, hours=23, minutes=59, seconds=59,
                           microseconds=999999)
@@ -708,6 +1124,8 @@ class Date(object):
     year, month, day
     """
 
+    __slots__ = ('_year', '_month', '_day')
+
     def __new__(cls, year, month=None, day=None):
         """Constructor.
 
@@ -723,9 +1141,18 @@ class Date(object):
             return self
         _check_Date_fields(year, month, day)
         self = object.__new__(cls)
-        self.__year = year
-        self.__month = month
-        self.__day = day
+        self._year = year
+        self._month = month
+        self._day = day
+        return self
+
+    @classmethod
+    def _fromfields(cls, year, month, day):
+        "Construct a Date from already validated fields."
+        self = object.__new__(cls)
+        self._year = year
+        self._month = month
+        self._day = day
         return self
 
     # Additional constructors
@@ -748,6 +1175,9 @@ class Date(object):
         January 1 of year 1 is day 1.  Only the year, month and day are
         non-zero in the result.
         """
+        if (cls is Date and isinstance(n, (int, long)) and
+                _MINORD <= n <= _MAXORD):
+            return _date_from_ordinal(n)
         y, m, d = _ord2ymd(n)
         return cls(y, m, d)
     fromordinal = classmethod(fromordinal)
@@ -757,9 +1187,9 @@ class Date(object):
     def __repr__(self):
         "Convert to formal string, for repr()."
         return "%s(%d, %d, %d)" % ('DateTime.' + self.__class__.__name__,
-                                   self.__year,
-                                   self.__month,
-                                   self.__day)
+                                   self._year,
+                                   self._month,
+                                   self._day)
     # XXX These shouldn't depend on Time.localtime(), because that
     # clips the usable Dates to [1970 .. 2038).  At least cTime() is
     # easily done without using strftime() -- that's better too because
@@ -767,11 +1197,12 @@ class Date(object):
 
     def ctime(self):
         "Format a la ctime()."
-        return tmxxx(self.__year, self.__month, self.__day).ctime()
+        return tmxxx(self._year, self._month, self._day).ctime()
 
     def strftime(self, fmt):
         "Format using strftime()."
-        return _wrap_strfTime(self, fmt, self.timetuple())
+        return _wrap_strfTime(self, fmt,
+                              (self._year, self._month, self._day, 0, 0, 0, 0))
 
     def __format__(self, fmt):
         if len(fmt) != 0:
@@ -787,21 +1218,21 @@ class Date(object):
         - http://www.w3.org/TR/NOTE-DateTime
         - http://www.cl.cam.ac.uk/~mgk25/iso-Time.html
         """
-        return "%04d-%02d-%02d" % (self.__year, self.__month, self.__day)
+        return "%04d-%02d-%02d" % (self._year, self._month, self._day)
 
     __str__ = isoformat
 
     # Read-only field accessors
-    year = property(lambda self: self.__year,
+    year = property(lambda self: self._year,
                     doc="year (%d-%d)" % (MINYEAR, MAXYEAR))
-    month = property(lambda self: self.__month, doc="month (1-12)")
-    day = property(lambda self: self.__day, doc="day (1-31)")
+    month = property(lambda self: self._month, doc="month (1-12)")
+    day = property(lambda self: self._day, doc="day (1-31)")
 
     # Standard conversions, __cmp__, __hash__ (and helpers)
 
     def timetuple(self):
         "Return local Time tuple compatible with Time.localtime()."
-        return _build_struct_Time(self.__year, self.__month, self.__day,
+        return _build_struct_Time(self._year, self._month, self._day,
                                   0, 0, 0, -1)
 
     def toordinal(self):
@@ -810,16 +1241,16 @@ class Date(object):
         January 1 of year 1 is day 1.  Only the year, month and day values
         contribute to the result.
         """
-        return _ymd2ord(self.__year, self.__month, self.__day)
+        return _ymd2ord(self._year, self._month, self._day)
 
     def replace(self, year=None, month=None, day=None):
         """Return a new Date with new values for the specified fields."""
         if year is None:
-            year = self.__year
+            year = self._year
         if month is None:
-            month = self.__month
+            month = self._month
         if day is None:
-            day = self.__day
+            day = self._day
         _check_Date_fields(year, month, day)
         return Date(year, month, day)
 
@@ -875,13 +1306,15 @@ class Date(object):
 
     def __cmp(self, other):
         assert isinstance(other, Date)
-        y, m, d = self.__year, self.__month, self.__day
-        y2, m2, d2 = other.__year, other.__month, other.__day
+        y, m, d = self._year, self._month, self._day
+        y2, m2, d2 = other._year, other._month, other._day
         return cmp((y, m, d), (y2, m2, d2))
 
     def __hash__(self):
         "Hash."
-        return hash(self.__getstate())
+        # Cheaper to recompute than to store: a slot for the hash would take
+        # Date past its memory budget (see TestMemoryLayout).
+        return hash((self._year << 9) | (self._month << 5) | self._day)
 
     # Computations
 
@@ -893,12 +1326,10 @@ class Date(object):
     def __add__(self, other):
         "Add a Date to a TimeDelta."
         if isinstance(other, TimeDelta):
-            t = tmxxx(self.__year,
-                      self.__month,
-                      self.__day + other.days)
-            self._checkOverflow(t.year)
-            result = Date(t.year, t.month, t.day)
-            return result
+            n = self.toordinal() + other.days
+            if not _MINORD <= n <= _MAXORD:
+                self._checkOverflow(_ord2ymd(n)[0])
+            return _date_from_ordinal(n)
         raise TypeError
         # XXX Should be 'return NotImplemented', but there's a bug in 2.2...
 
@@ -937,9 +1368,9 @@ class Date(object):
         ISO calendar algorithm taken from
         http://www.phys.uu.nl/~vgent/calendar/isocalendar.htm
         """
-        year = self.__year
+        year = self._year
         week1monday = _isoweek1monday(year)
-        today = _ymd2ord(self.__year, self.__month, self.__day)
+        today = _ymd2ord(self._year, self._month, self._day)
         # Internally, week and day have origin 0
         week, day = divmod(today - week1monday, 7)
         if week < 0:
@@ -957,20 +1388,101 @@ class Date(object):
     __safe_for_unpickling__ = True      # For Python 2.2
 
     def __getstate(self):
-        yhi, ylo = divmod(self.__year, 256)
-        return _pack_string(yhi, ylo, self.__month, self.__day),
+        yhi, ylo = divmod(self._year, 256)
+        return _pack_string(yhi, ylo, self._month, self._day),
 
     def __setstate(self, string):
         if len(string) != 4 or not (1 <= ord(string[2]) <= 12):
             raise TypeError("not enough arguments")
-        yhi, ylo, self.__month, self.__day = map(ord, string)
-        self.__year = yhi * 256 + ylo
+        yhi, ylo, self._month, self._day = map(ord, string)
+        self._year = yhi * 256 + ylo
 
     def __reduce__(self):
         return (self.__class__, self.__getstate())
 
+    # Binary codec: the proleptic ordinal as an unsigned 32 bit int.
+
+    @classmethod
+    def _from_record(cls, n):
+        if not _MINORD <= n <= _MAXORD:
+            raise ValueError("invalid Date record")
+        if cls is Date:
+            return _date_from_ordinal(n)
+        return cls._fromfields(*_ord2ymd(n))
+
+    def to_bytes(self):
+        "Return the 4 byte binary form; see from_bytes() and pack_many()."
+        return _codec_struct("I", 1).pack(self.toordinal())
+
+    @classmethod
+    def from_bytes(cls, data):
+        "Construct a Date from the bytes to_bytes() returns."
+        return _unpack_one("I", cls._from_record, data)
+
+    @staticmethod
+    def pack_many(values):
+        "Return the to_bytes() of every Date in values, concatenated."
+        return _pack_many("I", lambda date: (date.toordinal(),), values)
+
+    @classmethod
+    def unpack_many(cls, data):
+        """Return a list of the Dates in data, as pack_many() returns; data
+        may be any buffer, including a memoryview.
+        """
+        return _unpack_many("I", cls._from_record, data)
+
 _date_class = Date  # so functions w/ args named "Date" can get at the class
 
+# Dates built from an ordinal (fromordinal(), Date +/- TimeDelta,
+# DateTime.date(), from_bytes()) are interned: a workload touching a few
+# thousand days then shares one object per day.  The cache holds at most
+# _date_cache_size Dates and starts over when full; set_date_cache() or
+# $DATETIMENG_DATE_CACHE changes the size, 0 turns interning off.
+_DATE_CACHE = {}
+
+def _env_cache_size(name, default):
+    """The cache size set in environment variable name, or default if it
+    isn't set; a value that isn't an integer >= 0 is ignored with a warning.
+    """
+    value = _os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        size = -1
+    if size < 0:
+        import warnings
+        warnings.warn("ignoring $%s=%r: not an integer >= 0" % (name, value),
+                      RuntimeWarning)
+        return default
+    return size
+
+_date_cache_size = _env_cache_size('DATETIMENG_DATE_CACHE', 4096)
+
+def _date_from_ordinal(n):
+    "The Date for a valid ordinal, interned when the cache is on."
+    self = _DATE_CACHE.get(n)
+    if self is None:
+        self = Date._fromfields(*_ord2ymd(n))
+        if _date_cache_size:
+            if len(_DATE_CACHE) >= _date_cache_size:
+                _DATE_CACHE.clear()
+            _DATE_CACHE[n] = self
+    return self
+
+def set_date_cache(size):
+    """Set how many Dates are kept interned (0 for none), emptying the
+    cache; return the previous size.
+    """
+    global _date_cache_size
+    if size < 0:
+        raise ValueError("cache size must be >= 0")
+    previous = _date_cache_size
+    _date_cache_size = size
+    _DATE_CACHE.clear()
+    return previous
+
 Date.min = Date(1, 1, 1)
 Date.max = Date(9999, 12, 31)
 Date.resolution = TimeDelta(days=1)
@@ -979,8 +1491,15 @@ class TzInfo(object):
     """Abstract base class for Time zone info classes.
 
     Subclasses must override the name(), utcoffset() and dst() methods.
+
+    An aware DateTime or Time asks its tzinfo for utcoffset() once and
+    keeps the answer, since neither can change.  A subclass whose
+    utcoffset() may answer differently for the same argument must set
+    cache_offsets to False to be asked every time.
     """
 
+    cache_offsets = True
+
     def tzname(self, dt):
         "DateTime -> string name of Time zone."
         raise NotImplementedError("TzInfo subclass must override tzname()")
@@ -1027,6 +1546,24 @@ class TzInfo(object):
         else:
             return dt
 
+    def _offset_interval(self, key, utc):
+        """Return (offset, start, end) for a key in DateTime._sortkey()
+        units: offset is the UTC offset in nanoseconds at key, which is a
+        UTC time if utc is true and a wall clock time otherwise, and
+        start <= key < end is a range of keys sharing it (None for no
+        bound).  astimezone_many() and DateTimeArray ask once per range.
+
+        This knows nothing of the zone's transitions, so the range is key
+        alone; subclasses that know better override it.
+        """
+        dt = DateTime._fromsortkey(key, self)
+        if utc:
+            return self.fromutc(dt)._sortkey() - key, key, key + 1
+        offset = dt._utcoffset()
+        if offset is None:
+            raise ValueError("astimezone() requires an aware DateTime")
+        return offset * 60000000000, key, key + 1
+
     # Pickle support.
 
     __safe_for_unpickling__ = True      # For Python 2.2
@@ -1049,6 +1586,78 @@ class TzInfo(object):
 
 _tzinfo_class = TzInfo   # so functions w/ args named "tinfo" can get at it
 
+
+class FixedOffset(TzInfo):
+    """Fixed offset in minutes east of UTC, with no DST.
+
+    The name defaults to the offset formatted as '+HH:MM' ('UTC' for 0).
+    Zones with the default name are interned: FixedOffset(0) is UTC, and
+    every FixedOffset(330) is the same object.  DateTime and Time
+    recognise this class and read the offset directly instead of going
+    through utcoffset().
+    """
+
+    _interned = {}
+
+    def __new__(cls, offset, name=None):
+        if not isinstance(offset, (int, long)):
+            raise TypeError("offset must be an integer number of minutes")
+        if not -1440 < offset < 1440:
+            raise ValueError("offset must be in -1439..1439", offset)
+        if cls is FixedOffset:
+            self = FixedOffset._interned.get(offset)
+            if self is not None and (name is None or name == self.__name):
+                return self
+        hh, mm = divmod(abs(offset), 60)
+        isoformat = "%c%02d:%02d" % ("+-"[offset < 0], hh, mm)
+        if offset:
+            default = isoformat
+        else:
+            default = "UTC"
+        if name is None:
+            name = default
+        self = TzInfo.__new__(cls)
+        self._minutes = offset
+        self._isoformat = isoformat
+        self.__offset = TimeDelta(minutes=offset)
+        self.__name = name
+        if cls is FixedOffset and name == default:
+            self = FixedOffset._interned.setdefault(offset, self)
+        return self
+
+    def __getinitargs__(self):
+        return self._minutes, self.__name
+
+    def __getstate__(self):
+        return None
+
+    def __repr__(self):
+        return "%s.%s(%d, %r)" % (self.__class__.__module__,
+                                  self.__class__.__name__,
+                                  self._minutes, self.__name)
+
+    def utcoffset(self, dt):
+        return self.__offset
+
+    def tzname(self, dt):
+        return self.__name
+
+    def dst(self, dt):
+        return _ZERO
+
+    def fromutc(self, dt):
+        if not isinstance(dt, DateTime):
+            raise TypeError("fromutc() requires a DateTime argument")
+        if dt.tzinfo is not self:
+            raise ValueError("dt.TzInfo is not self")
+        return dt + self.__offset
+
+    def _offset_interval(self, key, utc):
+        return self._minutes * 60000000000, None, None
+
+_ZERO = TimeDelta(0)
+UTC = FixedOffset(0, "UTC")
+
 class Time(object):
     """Time with Time zone.
 
@@ -1073,6 +1682,9 @@ class Time(object):
     hour, minute, second, microsecond, tzinfo
     """
 
+    __slots__ = ('__hour', '__minute', '__second', '__nanosecond', '_tzinfo',
+                 '__offset')
+
     def __new__(cls, hour=0, minute=0, second=0, microsecond=0, tzinfo=None):
         """Constructor.
 
@@ -1091,21 +1703,30 @@ class Time(object):
         _check_Time_fields(hour, minute, second, microsecond)
         self.__hour = hour
         self.__minute = minute
-        if second:
-            second = Decimal(str(second))
-        else:
-            second = Decimal(0)
-        self.__second = Decimal(str(second)) + Decimal(str(microsecond))/Decimal(1000000)
+        self.__second, self.__nanosecond = _split_second(second, microsecond)
+        self._tzinfo = tzinfo
+        return self
+
+    @classmethod
+    def _fromfields(cls, hour, minute, second, nanosecond, tzinfo):
+        "Construct a Time from already validated integer fields."
+        self = object.__new__(cls)
+        self.__hour = hour
+        self.__minute = minute
+        self.__second = second
+        self.__nanosecond = nanosecond
         self._tzinfo = tzinfo
         return self
 
     # Read-only field accessors
     hour = property(lambda self: self.__hour, doc="hour (0-23)")
     minute = property(lambda self: self.__minute, doc="minute (0-59)")
-    second = property(lambda self: int(self.__second), doc="second (0-59)")
-    second_decimal = property(lambda self: self.__second, doc="second as Decimal")
-    microsecond = property(lambda self: _microsecond(self.__second), doc="microsecond (0-99999)")
-    nanosecond = property(lambda self: _nanosecond(self.__second), doc="nanosecond (0-999999999)")
+    second = property(lambda self: self.__second, doc="second (0-59)")
+    second_decimal = property(lambda self: _sec_decimal(self.__second,
+                                                        self.__nanosecond),
+                              doc="second as Decimal")
+    microsecond = property(lambda self: self.__nanosecond // 1000, doc="microsecond (0-999999)")
+    nanosecond = property(lambda self: self.__nanosecond, doc="nanosecond (0-999999999)")
     tzinfo = property(lambda self: self._tzinfo, doc="Timezone info object")
 
     # Standard conversions, __hash__ (and helpers)
@@ -1162,25 +1783,23 @@ class Time(object):
             base_compare = myoff == otoff
 
         if base_compare:
-            return cmp((self.__hour, self.__minute, self.__second),
-                       (other.__hour, other.__minute, other.__second))
+            return cmp((self.__hour, self.__minute, self.__second,
+                        self.__nanosecond),
+                       (other.__hour, other.__minute, other.__second,
+                        other.__nanosecond))
         if myoff is None or otoff is None:
             # XXX Buggy in 2.2.2.
             raise TypeError("cannot compare naive and aware Times")
         myhhmm = self.__hour * 60 + self.__minute - myoff
         othhmm = other.__hour * 60 + other.__minute - otoff
-        return cmp((myhhmm, self.__second),
-                   (othhmm, other.__second))
+        return cmp((myhhmm, self.__second, self.__nanosecond),
+                   (othhmm, other.__second, other.__nanosecond))
 
     def __hash__(self):
         """Hash."""
-        tzoff = self._utcoffset()
-        if not tzoff: # zero or None
-            return hash(self.__getstate()[0])
-        h, m = divmod(self.hour * 60 + self.minute - tzoff, 60)
-        if 0 <= h < 24:
-            return hash(Time(h, m, self.second))
-        return hash((h, m, self.second))
+        minutes = self.__hour * 60 + self.__minute - (self._utcoffset() or 0)
+        return hash((minutes * 60 + self.__second) * 1000000000 +
+                    self.__nanosecond)
 
     # Conversion to string
 
@@ -1200,8 +1819,8 @@ class Time(object):
 
     def __repr__(self):
         """Convert to formal string, for repr()."""
-        if self.__second != 0:
-            s = ", %s" % str(self.__second)
+        if self.__second or self.__nanosecond:
+            s = ", %s" % self.second_decimal
         else:
             s = ""
         s = "%s(%d, %d%s)" % ('DateTime.' + self.__class__.__name__,
@@ -1217,7 +1836,8 @@ class Time(object):
         This is 'HH:MM:SS.mmmmmm+zz:zz', or 'HH:MM:SS+zz:zz' if
         self.microsecond == 0.
         """
-        s = _format_Time(self.__hour, self.__minute, self.__second)
+        s = _format_Time(self.__hour, self.__minute, self.__second,
+                         self.__nanosecond)
         tz = self._tzstr()
         if tz:
             s += tz
@@ -1226,15 +1846,12 @@ class Time(object):
     __str__ = isoformat
 
     def strftime(self, fmt):
-        """Format using strfTime().  The Date part of the Timestamp passed
-        to underlying strfTime should not be used.
+        """Format using strfTime().  The Date part of the format should not
+        be used; it is rendered as 1900-01-01.
         """
-        # The year must be >= 1900 else Python's strfTime implementation
-        # can raise a bogus exception.
-        timetuple = (1900, 1, 1,
-                     self.__hour, self.__minute, self.__second,
-                     0, 1, -1)
-        return _wrap_strfTime(self, fmt, timetuple)
+        return _wrap_strfTime(self, fmt, (1900, 1, 1,
+                                          self.__hour, self.__minute,
+                                          self.__second, self.__nanosecond))
 
     def __format__(self, fmt):
         if len(fmt) != 0:
@@ -1246,16 +1863,25 @@ class Time(object):
     def utcoffset(self):
         """Return the Timezone offset in minutes east of UTC (negative west of
         UTC)."""
-        offset = _call_TzInfo_method(self._tzinfo, "utcoffset", None)
-        offset = _check_utc_offset("utcoffset", offset)
+        offset = self._utcoffset()
         if offset is not None:
             offset = TimeDelta(minutes=offset)
         return offset
 
     # Return an integer (or None) instead of a TimeDelta (or None).
+    # Checked once and kept, unless the tzinfo opts out (see TzInfo).
     def _utcoffset(self):
-        offset = _call_TzInfo_method(self._tzinfo, "utcoffset", None)
+        tzinfo = self._tzinfo
+        if tzinfo.__class__ is FixedOffset:
+            return tzinfo._minutes
+        try:
+            return self.__offset
+        except AttributeError:
+            pass
+        offset = _call_TzInfo_method(tzinfo, "utcoffset", None)
         offset = _check_utc_offset("utcoffset", offset)
+        if getattr(tzinfo, "cache_offsets", True):
+            self.__offset = offset
         return offset
 
     def tzname(self):
@@ -1287,6 +1913,8 @@ class Time(object):
     def replace(self, hour=None, minute=None, second=None, microsecond=None,
                 tzinfo=True):
         """Return a new Time with new values for the specified fields."""
+        # sub-microsecond digits survive unless the second is replaced
+        keep_nanosecond = second is None and microsecond is None
         if hour is None:
             hour = self.hour
         if minute is None:
@@ -1299,7 +1927,10 @@ class Time(object):
             tzinfo = self.tzinfo
         _check_Time_fields(hour, minute, second, microsecond)
         _check_TzInfo_arg(tzinfo)
-        return Time(hour, minute, second, microsecond, tzinfo)
+        result = Time(hour, minute, second, microsecond, tzinfo)
+        if keep_nanosecond:
+            result.__nanosecond = self.__nanosecond
+        return result
 
     # Return an integer (or None) instead of a TimeDelta (or None).
     def _dst(self):
@@ -1308,7 +1939,7 @@ class Time(object):
         return offset
 
     def __nonzero__(self):
-        if self.second_decimal:
+        if self.__second or self.__nanosecond:
             return 1
         offset = self._utcoffset() or 0
         return self.hour * 60 + self.minute - offset != 0
@@ -1318,11 +1949,11 @@ class Time(object):
     __safe_for_unpickling__ = True      # For Python 2.2
 
     def __getstate(self):
-        ns3, ns4 = divmod(self.nanosecond, 256)
+        ns3, ns4 = divmod(self.__nanosecond, 256)
         ns2, ns3 = divmod(ns3, 256)
         ns1, ns2 = divmod(ns2, 256)
-        basestate = _pack_string(self.__hour, self.__minute, self.second,
-                                  ns1, ns2, ns3, ns4)
+        basestate = _pack_string(self.__hour, self.__minute, self.__second,
+                                 ns1, ns2, ns3, ns4)
         if self._tzinfo is None:
             return (basestate,)
         else:
@@ -1333,13 +1964,66 @@ class Time(object):
             raise TypeError("an integer is required")
         self.__hour, self.__minute, self.__second, ns1, ns2, ns3, ns4 = \
           map(ord, string)
-        ns = (((((ns1 << 8) | ns2) << 8) | ns3) << 8) | ns4
-        self.__second = _make_sec_decimal(self.__second, ns)
+        self.__nanosecond = (((((ns1 << 8) | ns2) << 8) | ns3) << 8) | ns4
         self._tzinfo = tzinfo
 
     def __reduce__(self):
         return (Time, self.__getstate())
 
+    # Binary codec: nanoseconds since midnight as an unsigned 64 bit int,
+    # 8 bytes; an aware Time adds its UTC offset in minutes as a signed
+    # 16 bit int, and comes back with the FixedOffset zone for it.
+
+    def _record(self, aware):
+        ns = (((self.__hour * 60 + self.__minute) * 60 + self.__second) *
+              1000000000 + self.__nanosecond)
+        offset = _codec_offset(self, aware)
+        if aware:
+            return ns, offset
+        return ns,
+
+    @classmethod
+    def _from_record(cls, ns, offset=None):
+        if ns >= 86400000000000:
+            raise ValueError("invalid Time record")
+        tzinfo = None
+        if offset is not None:
+            tzinfo = FixedOffset(offset)
+        ss, ns = divmod(ns, 1000000000)
+        mm, ss = divmod(ss, 60)
+        hh, mm = divmod(mm, 60)
+        return cls._fromfields(hh, mm, ss, ns, tzinfo)
+
+    def to_bytes(self):
+        """Return the binary form: 8 bytes for a naive Time, 10 for an aware
+        one.  See from_bytes() and pack_many().
+        """
+        aware = self.tzinfo is not None and self._utcoffset() is not None
+        fields = ("Q", "Qh")[aware]
+        return _codec_struct(fields, 1).pack(*self._record(aware))
+
+    @classmethod
+    def from_bytes(cls, data):
+        "Construct a Time from the bytes to_bytes() returns."
+        return _unpack_one(("Q", "Qh")[len(data) == 10], cls._from_record,
+                           data)
+
+    @staticmethod
+    def pack_many(values, aware=False):
+        """Return the to_bytes() of every Time in values, concatenated.
+        They must all be naive, or all aware if aware is true.
+        """
+        aware = bool(aware)
+        return _pack_many(("Q", "Qh")[aware],
+                          lambda time: time._record(aware), values)
+
+    @classmethod
+    def unpack_many(cls, data, aware=False):
+        """Return a list of the Times in data, as pack_many() returns with
+        the same aware flag; data may be any buffer, including a memoryview.
+        """
+        return _unpack_many(("Q", "Qh")[bool(aware)], cls._from_record, data)
+
 _time_class = Time  # so functions w/ args named "Time" can get at the class
 
 Time.min = Time(0, 0, 0)
@@ -1351,6 +2035,10 @@ class DateTime(Date):
     # XXX needs docstrings
     # See http://www.zope.org/Members/fdrake/DateTimeWiki/TimeZoneInfo
 
+    # year, month and day live in the Date slots
+    __slots__ = ('__hour', '__minute', '__second', '__nanosecond', '_tzinfo',
+                 '__key', '__offset')
+
     def __new__(cls, year, month=None, day=None, hour=0, minute=0,
                 second=0, microsecond=0, tzinfo=None):
         if isinstance(year, bytes) and len(year) == 11:
@@ -1360,27 +2048,61 @@ class DateTime(Date):
             return self
         _check_TzInfo_arg(tzinfo)
         _check_Time_fields(hour, minute, second, microsecond)
-        self = Date.__new__(cls, year, month, day)
-        # XXX This duplicates __year, __month, __day for convenience :-(
-        self.__year = year
-        self.__month = month
-        self.__day = day
+        _check_Date_fields(year, month, day)
+        second, nanosecond = _split_second(second, microsecond)
+        return cls._fromfields(year, month, day, hour, minute, second,
+                               nanosecond, tzinfo)
+
+    @classmethod
+    def _fromfields(cls, year, month, day, hour, minute, second, nanosecond,
+                    tzinfo):
+        "Construct a DateTime from already validated integer fields."
+        self = object.__new__(cls)
+        self._year = year
+        self._month = month
+        self._day = day
         self.__hour = hour
         self.__minute = minute
-        self.__second = Decimal(str(second))
-        if microsecond is not None:
-            self.__second += Decimal(str(microsecond))/Decimal(1000000)
+        self.__second = second
+        self.__nanosecond = nanosecond
         self._tzinfo = tzinfo
+        self.__key = None
+        return self
+
+    def _sortkey(self):
+        """Return the naive DateTime as a single integer: nanoseconds since
+        1970-01-01 00:00 (so that contemporary values stay machine sized).
+        Computed once and cached, since the fields can't change.
+        """
+        key = self.__key
+        if key is None:
+            key = self.__key = ((((self.toordinal() - _ORD1970) * 24 +
+                                  self.__hour) * 60 + self.__minute) * 60 +
+                                self.__second) * 1000000000 + self.__nanosecond
+        return key
+
+    @classmethod
+    def _fromsortkey(cls, key, tzinfo=None):
+        "Inverse of _sortkey(); no range checking is done."
+        days, ns = divmod(key, 86400000000000)
+        y, m, d = _ord2ymd(int(days) + _ORD1970)
+        ss, ns = divmod(int(ns), 1000000000)
+        mm, ss = divmod(ss, 60)
+        hh, mm = divmod(mm, 60)
+        self = cls._fromfields(y, m, d, hh, mm, ss, ns, tzinfo)
+        self.__key = key
         return self
 
     # Read-only field accessors
     hour = property(lambda self: self.__hour, doc="hour (0-23)")
     minute = property(lambda self: self.__minute, doc="minute (0-59)")
-    second = property(lambda self: int(self.__second), doc="second (0-59)")
-    second_decimal = property(lambda self: self.__second, doc="second as Decimal")
+    second = property(lambda self: self.__second, doc="second (0-59)")
+    second_decimal = property(lambda self: _sec_decimal(self.__second,
+                                                        self.__nanosecond),
+                              doc="second as Decimal")
     tzinfo = property(lambda self: self._tzinfo, doc="Timezone info object")
-    microsecond = property(lambda self: _microsecond(self.__second), doc="microsecond (0-99999)")
-    nanosecond = property(lambda self: _nanosecond(self.__second), doc="nanosecond (0-999999999)")
+    microsecond = property(lambda self: self.__nanosecond // 1000, doc="microsecond (0-999999)")
+    nanosecond = property(lambda self: self.__nanosecond, doc="nanosecond (0-999999999)")
     @classmethod
     def fromdatetime(cls, dt):
         """Given a python datetime object converto to datetimeng
@@ -1409,13 +2131,12 @@ class DateTime(Date):
         else:
             converter = _time.gmtime
 
-        seconds, fractional = _second_tuple(t)
+        seconds, nanosecond = divmod(_to_nanoseconds(t), 1000000000)
 
         y, m, d, hh, mm, ss, weekday, jday, dst = converter(seconds)
-        # us = int((t % 1.0) * 1000000)
-        ss = _to_decimal(ss) + fractional.quantize(_to_decimal(1.000000000))
         #ss = min(ss, 59)    # clamp out leap seconds if the platform has them
         result = cls(y, m, d, hh, mm, ss, tzinfo=tz)
+        result.__nanosecond = nanosecond
         if tz is not None:
             result = tz.fromutc(result)
         return result
@@ -1428,19 +2149,64 @@ class DateTime(Date):
         the timestamp will be discarded.
         """
         if epoch is None:
-            if self.tzinfo:
-                epoch = DateTime(1970, 1, 1, tzinfo=self.tzinfo)
-            else:
-                epoch = DateTime(1970, 1, 1)
-        since_epoch = self - epoch
-        res = self.second_decimal + \
-              since_epoch.days * 60 * 60 * 24 + since_epoch.seconds_decimal
-        res = res * scale
+            # 1/1/1970 in self's own tzinfo, so the difference is naive.
+            ns = self._sortkey()
+        else:
+            ns = (self - epoch)._tonanoseconds()
+        res = Decimal(ns).scaleb(-9) * scale
         if integer:
             integer, fractional = _second_tuple(res)
             return int(integer)
         return res
 
+    @classmethod
+    def from_epoch_ns(cls, ns, tz=None):
+        """Construct a DateTime from integer nanoseconds since the UNIX
+        epoch, 1970-01-01 00:00 UTC.
+
+        Without tz the result is naive, in UTC (unlike fromtimestamp(),
+        which gives local time); with tz it is tz.fromutc() of that.  Only
+        integer arithmetic is involved.
+        """
+        if not isinstance(ns, (int, long)):
+            raise TypeError("integer nanoseconds expected, not %s" %
+                            type(ns).__name__)
+        _check_TzInfo_arg(tz)
+        if not _MIN_EPOCH_NS <= ns <= _MAX_EPOCH_NS:
+            raise ValueError("epoch nanoseconds out of range", ns)
+        result = cls._fromsortkey(ns, tz)
+        if tz is not None:
+            result = tz.fromutc(result)
+        return result
+
+    @classmethod
+    def from_epoch_us(cls, us, tz=None):
+        "As from_epoch_ns(), for integer microseconds since the epoch."
+        return cls.from_epoch_ns(us * 1000, tz)
+
+    @classmethod
+    def from_epoch_ms(cls, ms, tz=None):
+        "As from_epoch_ns(), for integer milliseconds since the epoch."
+        return cls.from_epoch_ns(ms * 1000000, tz)
+
+    def to_epoch_ns(self):
+        """Return integer nanoseconds since 1970-01-01 00:00 UTC; a naive
+        DateTime is taken to be in UTC.  Inverse of from_epoch_ns().
+        """
+        key = self._sortkey()
+        if self._tzinfo is not None:
+            offset = self._utcoffset()
+            if offset:
+                key -= offset * 60000000000
+        return key
+
+    def to_epoch_us(self):
+        "As to_epoch_ns(), in whole microseconds (rounded down)."
+        return self.to_epoch_ns() // 1000
+
+    def to_epoch_ms(self):
+        "As to_epoch_ns(), in whole milliseconds (rounded down)."
+        return self.to_epoch_ns() // 1000000
 
     def utcfromtimestamp(cls, t):
         "Construct a UTC DateTime from a POSIX Timestamp (like time.time())."
@@ -1460,15 +2226,20 @@ class DateTime(Date):
     # XXX available from Python.  So now() may return different results
     # XXX across the implementations.
     def now(cls, tz=None):
-        "Construct a DateTime from Time.Time() and optional Time zone info."
-        t = _time.time()
-        return cls.fromtimestamp(t, tz)
+        """Construct a DateTime from now_ns() and optional Time zone info.
+
+        Without tz this is local time; the UTC offset is looked up at
+        most once a minute.
+        """
+        ns = _clock_ns()
+        if tz is not None:
+            return cls.from_epoch_ns(ns, tz)
+        return cls._fromsortkey(ns + _local_offset_ns(ns // 1000000000))
     now = classmethod(now)
 
     def utcnow(cls):
-        "Construct a UTC DateTime from Time.Time()."
-        t = _time.time()
-        return cls.utcfromtimestamp(t)
+        "Construct a UTC DateTime from now_ns()."
+        return cls._fromsortkey(_clock_ns())
     utcnow = classmethod(utcnow)
 
     def combine(cls, date, time):
@@ -1477,11 +2248,19 @@ class DateTime(Date):
             raise TypeError("Date argument must be a Date instance")
         if not isinstance(time, _time_class):
             raise TypeError("Time argument must be a Time instance")
-        return cls(date.year, date.month, date.day,
-                   time.hour, time.minute, time.second_decimal, 0,
-                   time.tzinfo)
+        result = cls(date.year, date.month, date.day,
+                     time.hour, time.minute, time.second, 0,
+                     time.tzinfo)
+        result.__nanosecond = time.nanosecond
+        return result
     combine = classmethod(combine)
 
+    def strftime(self, fmt):
+        "Format using strftime()."
+        return _wrap_strfTime(self, fmt, (self._year, self._month, self._day,
+                                          self.__hour, self.__minute,
+                                          self.__second, self.__nanosecond))
+
     def timetuple(self):
         "Return local Time tuple compatible with Time.localtime()."
         dst = self._dst()
@@ -1506,20 +2285,23 @@ class DateTime(Date):
 
     def date(self):
         "Return the Date part."
-        return Date(self.__year, self.__month, self.__day)
+        return _date_from_ordinal(self.toordinal())
 
     def time(self):
         "Return the Time part, with TzInfo None."
-        return Time(self.hour, self.minute, self.second_decimal)
+        return Time._fromfields(self.__hour, self.__minute, self.__second,
+                                self.__nanosecond, None)
 
     def timetz(self):
         "Return the Time part, with same TzInfo."
-        return Time(self.hour, self.minute, self.second_decimal,
-                    tzinfo=self._tzinfo)
+        return Time._fromfields(self.__hour, self.__minute, self.__second,
+                                self.__nanosecond, self._tzinfo)
 
     def replace(self, year=None, month=None, day=None, hour=None,
                 minute=None, second=None, microsecond=None, tzinfo=True):
         """Return a new DateTime with new values for the specified fields."""
+        # sub-microsecond digits survive unless the second is replaced
+        keep_nanosecond = second is None and microsecond is None
         if year is None:
             year = self.year
         if month is None:
@@ -1540,7 +2322,11 @@ class DateTime(Date):
         _check_Date_fields(year, month, day)
         _check_Time_fields(hour, minute, second, microsecond)
         _check_TzInfo_arg(tzinfo)
-        return DateTime(year, month, day, hour, minute, second, microsecond, tzinfo)
+        result = DateTime(year, month, day, hour, minute, second, microsecond,
+                          tzinfo)
+        if keep_nanosecond:
+            result.__nanosecond = self.__nanosecond
+        return result
 
     def astimezone(self, tz):
         if not isinstance(tz, TzInfo):
@@ -1553,6 +2339,16 @@ class DateTime(Date):
         if tz is mytz:
             return self
 
+        if tz.__class__ is FixedOffset:
+            # Shift the sort key; no need for the tzinfo protocol.
+            myoffset = self._utcoffset()
+            if myoffset is None:
+                raise ValueError("asTimezone() requires an aware DateTime")
+            key = self._sortkey() + (tz._minutes - myoffset) * 60000000000
+            if not _MIN_EPOCH_NS <= key <= _MAX_EPOCH_NS:
+                raise OverflowError("date value out of range")
+            return DateTime._fromsortkey(key, tz)
+
         # Convert self to UTC, and attach the new Time zone object.
         myoffset = self.utcoffset()
         if myoffset is None:
@@ -1566,8 +2362,8 @@ class DateTime(Date):
 
     def ctime(self):
         "Format a la ctime()."
-        t = tmxxx(self.__year, self.__month, self.__day, self.__hour,
-                  self.__minute, self.__second)
+        t = tmxxx(self._year, self._month, self._day, self.__hour,
+                  self.__minute, self.__second, self.__nanosecond)
         return t.ctime()
 
     def isoformat(self, sep='T'):
@@ -1582,9 +2378,13 @@ class DateTime(Date):
         Optional argument sep specifies the separator between Date and
         Time, default 'T'.
         """
-        s = ("%04d-%02d-%02d%c" % (self.__year, self.__month, self.__day,
+        s = ("%04d-%02d-%02d%c" % (self._year, self._month, self._day,
                                   sep) +
-                _format_Time(self.__hour, self.__minute, self.__second))
+                _format_Time(self.__hour, self.__minute, self.__second,
+                             self.__nanosecond))
+        tzinfo = self._tzinfo
+        if tzinfo.__class__ is FixedOffset:
+            return s + tzinfo._isoformat
         off = self._utcoffset()
         if off is not None:
             if off < 0:
@@ -1598,8 +2398,8 @@ class DateTime(Date):
 
     def __repr__(self):
         "Convert to formal string, for repr()."
-        L = [self.__year, self.__month, self.__day, # These are never zero
-             self.__hour, self.__minute, self.__second]
+        L = [self._year, self._month, self._day, # These are never zero
+             self.__hour, self.__minute, self.second_decimal]
         if L[-1] == 0:
             del L[-1]
         if L[-1] == 0:
@@ -1615,6 +2415,24 @@ class DateTime(Date):
         "Convert to string, for str()."
         return self.isoformat(sep=' ')
 
+    @classmethod
+    def fromisoformat(cls, date_string):
+        """Construct a DateTime from an ISO 8601 string.
+
+        Accepts 'YYYY-MM-DD', optionally followed by 'T' or ' ' and
+        'HH:MM[:SS[.fffffffff]]' (1 to 9 fractional digits) and a UTC offset
+        'Z', '+HH:MM', '+HHMM' or '+HH'.  An offset gives a FixedOffset
+        tzinfo; the same offset always gives the same tzinfo object.
+        """
+        return cls._fromfields(*_parse_isoformat(date_string))
+
+    @classmethod
+    def compile_format(cls, format):
+        """Compile a strptime() format into a CompiledFormat, whose parse()
+        and parse_many() methods return instances of cls.
+        """
+        return CompiledFormat(format, cls)
+
     @classmethod
     def strptime(cls, date_string, format):
         'string, format -> new DateTime parsed from a string (like Time.strptime()).'
@@ -1625,16 +2443,25 @@ class DateTime(Date):
     def utcoffset(self):
         """Return the Timezone offset in minutes east of UTC (negative west of
         UTC)."""
-        offset = _call_TzInfo_method(self._tzinfo, "utcoffset", self)
-        offset = _check_utc_offset("utcoffset", offset)
+        offset = self._utcoffset()
         if offset is not None:
             offset = TimeDelta(minutes=offset)
         return offset
 
     # Return an integer (or None) instead of a TimeDelta (or None).
+    # Checked once and kept, unless the tzinfo opts out (see TzInfo).
     def _utcoffset(self):
-        offset = _call_TzInfo_method(self._tzinfo, "utcoffset", self)
+        tzinfo = self._tzinfo
+        if tzinfo.__class__ is FixedOffset:
+            return tzinfo._minutes
+        try:
+            return self.__offset
+        except AttributeError:
+            pass
+        offset = _call_TzInfo_method(tzinfo, "utcoffset", self)
         offset = _check_utc_offset("utcoffset", offset)
+        if getattr(tzinfo, "cache_offsets", True):
+            self.__offset = offset
         return offset
 
     def tzname(self):
@@ -1735,36 +2562,41 @@ class DateTime(Date):
             base_compare = myoff == otoff
 
         if base_compare:
-            return cmp((self.__year, self.__month, self.__day,
-                        self.__hour, self.__minute, self.__second),
-                       (other.__year, other.__month, other.__day,
-                        other.__hour, other.__minute, other.__second))
+            return cmp(self._sortkey(), other._sortkey())
         if myoff is None or otoff is None:
             # XXX Buggy in 2.2.2.
             raise TypeError("cannot compare naive and aware DateTimes")
-        # XXX What follows could be done more efficiently...
-        diff = self - other     # this will take offsets into account
-        if diff.days < 0:
-            return -1
-        return diff and 1 or 0
+        return cmp(self._sortkey() - myoff * 60000000000,
+                   other._sortkey() - otoff * 60000000000)
 
     def __add__(self, other):
         "Add a DateTime and a TimeDelta."
         if not (hasattr(other, 'days') and hasattr(other, 'seconds')):
             return NotImplemented
-        t = tmxxx(self.__year,
-                  self.__month,
-                  self.__day + other.days,
-                  self.__hour,
-                  self.__minute,
-                  self.second + other.seconds,
-                  self.nanosecond + other.nanosecond)
-        self._checkOverflow(t.year)
-        result = DateTime(t.year, t.month, t.day,
-                          t.hour, t.minute,
-                          _make_sec_decimal(t.second, t.nanosecond),
-                          tzinfo=self._tzinfo)
-        return result
+        # Work on (days, nanoseconds into the day) integers: the calendar is
+        # only consulted when the sum crosses midnight, and then with a
+        # single _ord2ymd() call unless the day stays in the same month.
+        if isinstance(other, TimeDelta):
+            days, ns = divmod(other._tonanoseconds(), 86400000000000)
+        else:
+            days = other.days
+            ns = other.seconds * 1000000000 + other.nanosecond
+        ns += (((self.__hour * 60 + self.__minute) * 60 + self.__second) *
+               1000000000 + self.__nanosecond)
+        if ns >= 86400000000000:
+            ns -= 86400000000000
+            days += 1
+        year, month, day = self._year, self._month, self._day
+        if days:
+            day += days
+            if not (0 < day <= 28 or 0 < day <= _days_in_month(year, month)):
+                year, month, day = _ord2ymd(self.toordinal() + days)
+                self._checkOverflow(year)
+        ss, ns = divmod(int(ns), 1000000000)
+        mm, ss = divmod(ss, 60)
+        hh, mm = divmod(mm, 60)
+        return DateTime._fromfields(year, month, day, hh, mm, ss, ns,
+                                    self._tzinfo)
 
     __radd__ = __add__
 
@@ -1784,42 +2616,40 @@ class DateTime(Date):
                              other.hour, other.minute, other.second,
                              other.microsecond)
 
-        days1 = self.toordinal()
-        days2 = other.toordinal()
-        secs1 = self.__second + self.__minute * 60 + self.__hour * 3600
-        secs2 = other.__second + other.__minute * 60 + other.__hour * 3600
-        base = TimeDelta(days1 - days2,
-                         secs1 - secs2)
-        if self._tzinfo is other._tzinfo:
-            return base
-        myoff = self._utcoffset()
-        otoff = other._utcoffset()
-        if myoff == otoff:
-            return base
-        if myoff is None or otoff is None:
-            raise TypeError, "cannot mix naive and Timezone-aware Time"
-        return base + TimeDelta(minutes = otoff-myoff)
+        diff = self._sortkey() - other._sortkey()
+        if self._tzinfo is not other._tzinfo:
+            myoff = self._utcoffset()
+            otoff = other._utcoffset()
+            if myoff != otoff:
+                if myoff is None or otoff is None:
+                    raise TypeError, "cannot mix naive and Timezone-aware Time"
+                diff += (otoff - myoff) * 60000000000
+        return TimeDelta._fromnanoseconds(diff)
 
     def __hash__(self):
-        tzoff = self._utcoffset()
-        if tzoff is None:
-            return hash(self.__getstate()[0])
-        days = _ymd2ord(self.year, self.month, self.day)
-        seconds = self.hour * 3600 + (self.minute - tzoff) * 60 + self.second
-        return hash(TimeDelta(days, seconds))
+        # Both the sort key and the offset are computed once and kept, so
+        # this needs no hash slot of its own.
+        key = self.__key
+        if key is None:
+            key = self._sortkey()
+        if self._tzinfo is not None:
+            tzoff = self._utcoffset()
+            if tzoff:
+                key -= tzoff * 60000000000
+        return hash(key)
 
     # Pickle support.
 
     __safe_for_unpickling__ = True      # For Python 2.2
 
     def __getstate(self):
-        yhi, ylo = divmod(self.__year, 256)
-        ns3, ns4 = divmod(self.nanosecond, 256)
+        yhi, ylo = divmod(self._year, 256)
+        ns3, ns4 = divmod(self.__nanosecond, 256)
         ns2, ns3 = divmod(ns3, 256)
         ns1, ns2 = divmod(ns2, 256)
 
-        basestate = _pack_string(yhi, ylo, self.__month, self.__day,
-                                 self.__hour, self.__minute, self.second,
+        basestate = _pack_string(yhi, ylo, self._month, self._day,
+                                 self.__hour, self.__minute, self.__second,
                                  ns1, ns2, ns3, ns4)
         if self._tzinfo is None:
             return (basestate,)
@@ -1827,16 +2657,314 @@ class DateTime(Date):
             return (basestate, self._tzinfo)
 
     def __setstate(self, string, tzinfo):
-        (yhi, ylo, self.__month, self.__day, self.__hour,
+        (yhi, ylo, self._month, self._day, self.__hour,
          self.__minute, self.__second, ns1, ns2, ns3, ns4) = map(ord, string)
-        self.__year = yhi * 256 + ylo
-        ns = (((((ns1 << 8) | ns2) << 8) | ns3) << 8) | ns4
-        self.__second = _make_sec_decimal(self.__second, ns)
+        self._year = yhi * 256 + ylo
+        self.__nanosecond = (((((ns1 << 8) | ns2) << 8) | ns3) << 8) | ns4
         self._tzinfo = tzinfo
+        self.__key = None
 
     def __reduce__(self):
         return (self.__class__, self.__getstate())
 
+    # Binary codec: the naive time as seconds since 1970-01-01 (signed 64
+    # bit) and nanoseconds (unsigned 32 bit), 12 bytes; an aware DateTime
+    # adds its UTC offset in minutes as a signed 16 bit int, and comes back
+    # with the FixedOffset zone for it.
+
+    def _record(self, aware):
+        seconds, ns = divmod(self._sortkey(), 1000000000)
+        offset = _codec_offset(self, aware)
+        if aware:
+            return seconds, ns, offset
+        return seconds, ns
+
+    @classmethod
+    def _from_record(cls, seconds, ns, offset=None):
+        key = seconds * 1000000000 + ns
+        if not (ns < 1000000000 and _MIN_EPOCH_NS <= key <= _MAX_EPOCH_NS):
+            raise ValueError("invalid DateTime record")
+        tzinfo = None
+        if offset is not None:
+            tzinfo = FixedOffset(offset)
+        return cls._fromsortkey(key, tzinfo)
+
+    def to_bytes(self):
+        """Return the binary form: 12 bytes for a naive DateTime, 14 for an
+        aware one.  See from_bytes() and pack_many().
+        """
+        aware = self._tzinfo is not None and self._utcoffset() is not None
+        fields = ("qI", "qIh")[aware]
+        return _codec_struct(fields, 1).pack(*self._record(aware))
+
+    @classmethod
+    def from_bytes(cls, data):
+        "Construct a DateTime from the bytes to_bytes() returns."
+        return _unpack_one(("qI", "qIh")[len(data) == 14], cls._from_record,
+                           data)
+
+    @staticmethod
+    def pack_many(values, aware=False):
+        """Return the to_bytes() of every DateTime in values, concatenated.
+        They must all be naive, or all aware if aware is true.
+        """
+        aware = bool(aware)
+        return _pack_many(("qI", "qIh")[aware],
+                          lambda dt: dt._record(aware), values)
+
+    @classmethod
+    def unpack_many(cls, data, aware=False):
+        """Return a list of the DateTimes in data, as pack_many() returns
+        with the same aware flag; data may be any buffer, including a
+        memoryview.
+        """
+        return _unpack_many(("qI", "qIh")[bool(aware)], cls._from_record,
+                            data)
+
+
+_POW10 = tuple([10 ** i for i in range(10)])
+def _iso_tzinfo(sign, hh, mm):
+    offset = hh * 60 + mm
+    if offset > 1439 or mm > 59:
+        raise ValueError("UTC offset must be in -23:59..+23:59")
+    if sign == '-':
+        offset = -offset
+    try:
+        return FixedOffset._interned[offset]
+    except KeyError:
+        return FixedOffset(offset)
+
+def _ascii_digits(s):
+    """Whether s is one or more of 0-9; unicode.isdigit() would also let
+    through other scripts' digits, which ISO 8601 doesn't allow.
+    """
+    return s != '' and not s.lstrip('0123456789')
+
+def _parse_isoformat(s):
+    """ISO 8601 string -> DateTime fields (year, month, day, hour, minute,
+    second, nanosecond, tzinfo), checked.
+    """
+    if not isinstance(s, basestring):
+        raise TypeError("fromisoformat: argument must be str")
+    n = len(s)
+    if n < 10 or s[4] != '-' or s[7] != '-':
+        raise ValueError("Invalid isoformat string: %r" % (s,))
+    ymd = s[0:4] + s[5:7] + s[8:10]
+    if not _ascii_digits(ymd):
+        raise ValueError("Invalid isoformat string: %r" % (s,))
+    year, md = divmod(int(ymd), 10000)
+    month, day = divmod(md, 100)
+    _check_Date_fields(year, month, day)
+    if n == 10:
+        return year, month, day, 0, 0, 0, 0, None
+    # Time: 'HH:MM', then ':SS' and '.fffffffff' are optional.
+    if n >= 19 and s[16] == ':':
+        hms = s[11:13] + s[14:16] + s[17:19]
+        i = 19
+    else:
+        hms = s[11:13] + s[14:16] + '00'
+        i = 16
+    if (n < 16 or s[10] not in 'T ' or s[13] != ':' or len(hms) != 6 or
+            not _ascii_digits(hms)):
+        raise ValueError("Invalid isoformat string: %r" % (s,))
+    hour, second = divmod(int(hms), 10000)
+    minute, second = divmod(second, 100)
+    nanosecond = 0
+    if i == 19 and i < n and s[i] in '.,':
+        i += 1
+        digits = n - i - len(s[i:].lstrip('0123456789'))
+        if not 0 < digits <= 9:
+            raise ValueError("Invalid isoformat string: %r" % (s,))
+        nanosecond = int(s[i:i + digits]) * _POW10[9 - digits]
+        i += digits
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError("Invalid isoformat string: %r" % (s,))
+    # UTC offset
+    if i == n:
+        return year, month, day, hour, minute, second, nanosecond, None
+    sign = s[i]
+    rest = s[i + 1:]
+    if sign in 'Zz' and not rest:
+        tz = UTC
+    elif sign in '+-' and len(rest) in (2, 4, 5):
+        if len(rest) == 2:
+            hhmm = rest + '00'
+        else:
+            hhmm = rest[:2] + rest[-2:]
+        if not _ascii_digits(hhmm) or (len(rest) == 5 and rest[2] != ':'):
+            raise ValueError("Invalid isoformat string: %r" % (s,))
+        tz = _iso_tzinfo(sign, int(hhmm[:2]), int(hhmm[2:]))
+    else:
+        raise ValueError("Invalid isoformat string: %r" % (s,))
+    return year, month, day, hour, minute, second, nanosecond, tz
+
+# strptime() formats compiled by DateTime.compile_format().  The regular
+# expressions come from the stdlib's _strptime.TimeRE (so locale dependent
+# names work the same way), with %f widened to nine digits, and %N (an alias
+# for it, matching strftime()) and %z added.
+
+_YEAR, _MONTH, _DAY, _HOUR, _MINUTE, _SECOND, _NANOSECOND, _TZ, _AMPM, \
+    _JULIAN, _WEEKDAY, _WEEK, _WEEKSTART = range(13)
+
+_TIME_RE = None
+
+def _strptime_re():
+    """The TimeRE for the current locale; rebuilt, as _strptime does, when
+    the LC_TIME language or the time zone names have changed.
+    """
+    global _TIME_RE
+    import _strptime
+    time_re = _TIME_RE
+    if time_re is not None:
+        locale_time = time_re.locale_time
+        if (_strptime._getlang() != locale_time.lang or
+                _time.tzname != locale_time.tzname or
+                _time.daylight != locale_time.daylight):
+            time_re = None
+    if time_re is None:
+        time_re = _strptime.TimeRE()
+        time_re['f'] = r"(?P<f>[0-9]{1,9})"
+        time_re['N'] = r"(?P<N>[0-9]{1,9})"
+        time_re['z'] = r"(?P<z>[+-]\d\d:?[0-5]\d|Z)"
+        _TIME_RE = time_re
+    return time_re
+
+# Directives whose regular expression depends on the locale.
+_LOCALE_DIRECTIVES = frozenset('aAbBcpxXZ')
+
+def _strptime_handler(directive, locale_time):
+    """Return a function(fields, matched_text) that stores what the
+    directive matched in the fields list, indexed by _YEAR etc.
+    """
+    def store(index, convert=int):
+        def handler(f, value):
+            f[index] = convert(value)
+        return handler
+    def name_index(names):
+        return lambda value: names.index(value.lower())
+    def two_digit_year(value):
+        year = int(value)
+        # Open Group: 69..99 are 19xx, 00..68 are 20xx.
+        if year <= 68:
+            return year + 2000
+        return year + 1900
+    def fraction(value):
+        return int(value) * _POW10[9 - len(value)]
+    def offset(value):
+        if value in 'Zz':
+            return UTC
+        return _iso_tzinfo(value[0], int(value[1:3]), int(value[-2:]))
+    def week(f, value):
+        f[_WEEK] = int(value)
+        f[_WEEKSTART] = directive == 'W'
+    return {
+        'Y': store(_YEAR), 'y': store(_YEAR, two_digit_year),
+        'm': store(_MONTH), 'd': store(_DAY),
+        'B': store(_MONTH, name_index(locale_time.f_month)),
+        'b': store(_MONTH, name_index(locale_time.a_month)),
+        'H': store(_HOUR), 'I': store(_HOUR), 'M': store(_MINUTE),
+        'S': store(_SECOND),
+        'f': store(_NANOSECOND, fraction), 'N': store(_NANOSECOND, fraction),
+        'p': store(_AMPM, name_index(locale_time.am_pm)),
+        'j': store(_JULIAN),
+        'A': store(_WEEKDAY, name_index(locale_time.f_weekday)),
+        'a': store(_WEEKDAY, name_index(locale_time.a_weekday)),
+        'w': store(_WEEKDAY, lambda value: (int(value) + 6) % 7),
+        'U': week, 'W': week,
+        'z': store(_TZ, offset),
+        }.get(directive)
+
+class CompiledFormat(object):
+    """A strptime() format compiled once for repeated parsing.
+
+    Made by DateTime.compile_format(format).  Supports the same directives
+    as DateTime.strptime(), plus %z ('+HHMM', '+HH:MM' or 'Z', giving a
+    FixedOffset tzinfo) and nanosecond fractions: %f and %N match one to
+    nine digits.  %Z is matched but, as for strptime(), ignored.
+
+    Like strptime(), a format using locale dependent directives (names of
+    days and months, %p, %c, %x, %X, %Z) follows locale.setlocale(): each
+    parse() checks the locale and recompiles if it changed.  Numeric
+    formats skip that check.
+    """
+
+    def __init__(self, format, cls=None):
+        import re
+        self.format = format
+        self.cls = cls or DateTime
+        self._locale_dependent = bool(
+            _LOCALE_DIRECTIVES.intersection(re.findall('%(.)', format)))
+        self._compile()
+
+    def _compile(self):
+        import re
+        time_re = self._time_re = _strptime_re()
+        format = self.format
+        self._regex = re.compile(time_re.pattern(format), re.IGNORECASE)
+        handlers = []
+        for name, index in sorted(self._regex.groupindex.items(),
+                                  key=lambda item: item[1]):
+            handler = _strptime_handler(name, time_re.locale_time)
+            if handler is not None:
+                handlers.append((index - 1, handler))
+        self._handlers = tuple(handlers)
+        self._twelve_hour = 'I' in self._regex.groupindex
+
+    def __repr__(self):
+        return "%s.%s(%r)" % (self.__class__.__module__,
+                              self.__class__.__name__, self.format)
+
+    def parse(self, string):
+        "string -> new DateTime (of the class the format was compiled for)."
+        if self._locale_dependent and _strptime_re() is not self._time_re:
+            self._compile()
+        found = self._regex.match(string)
+        if found is None or found.end() != len(string):
+            raise ValueError("time data %r does not match format %r" %
+                             (string, self.format))
+        values = found.groups()
+        f = [None, 1, 1, 0, 0, 0, 0, None, None, None, None, None, None]
+        for index, handler in self._handlers:
+            handler(f, values[index])
+        year = f[_YEAR]
+        if year is None:
+            # Without a year, 1900, as for strptime() (so February 29th is
+            # out of range).
+            year = 1900
+        hour = f[_HOUR]
+        if self._twelve_hour:
+            hour %= 12
+            if f[_AMPM] == 1:
+                hour += 12
+        julian = f[_JULIAN]
+        if julian is None and f[_WEEK] is not None and \
+                f[_WEEKDAY] is not None:
+            julian = _julian_from_week(year, f[_WEEK], f[_WEEKDAY],
+                                       f[_WEEKSTART])
+        if julian is not None:
+            year, month, day = _ord2ymd(_ymd2ord(year, 1, 1) + julian - 1)
+        else:
+            month, day = f[_MONTH], f[_DAY]
+        _check_Date_fields(year, month, day)
+        if f[_SECOND] > 59:
+            raise ValueError('second must be in 0..59', f[_SECOND])
+        return self.cls._fromfields(year, month, day, hour, f[_MINUTE],
+                                    f[_SECOND], f[_NANOSECOND], f[_TZ])
+
+    def parse_many(self, strings):
+        "Parse each string of an iterable; returns a list of DateTime."
+        parse = self.parse
+        return [parse(s) for s in strings]
+
+def _julian_from_week(year, week, weekday, week_starts_monday):
+    "Day of the year from a %U or %W week number and a weekday (Monday=0)."
+    first_weekday = (_ymd2ord(year, 1, 1) + 6) % 7
+    if not week_starts_monday:
+        first_weekday = (first_weekday + 1) % 7
+        weekday = (weekday + 1) % 7
+    if week == 0:
+        return 1 + weekday - first_weekday
+    return 1 + (7 - first_weekday) % 7 + 7 * (week - 1) + weekday
 
 DateTime.min = DateTime(1, 1, 1)
 DateTime.max = DateTime(9999, 12, 31, 23, 59, 59, 999999)
@@ -1844,6 +2972,61 @@ DateTime.resolution = TimeDelta(seconds=10**-9)
 DateTime.MINYEAR = MINYEAR
 DateTime.MAXYEAR = MAXYEAR
 
+parse_iso = DateTime.fromisoformat
+
+_INF = float("inf")
+
+def _offset_lookup(tz, utc):
+    """Return a function giving tz's UTC offset in nanoseconds at a key (see
+    TzInfo._offset_interval()), which only asks tz again once a key falls
+    outside the last range it answered for.
+    """
+    last = [0, 0, 0]
+    def lookup(key):
+        offset, start, end = last
+        if start <= key < end:
+            return offset
+        offset, start, end = tz._offset_interval(key, utc)
+        if start is None:
+            start = -_INF
+        if end is None:
+            end = _INF
+        last[:] = offset, start, end
+        return offset
+    return lookup
+
+def astimezone_many(iterable, tz):
+    """Return [dt.astimezone(tz) for dt in iterable], but asking each zone
+    for an offset once per transition interval rather than once per
+    DateTime, which pays off when neighbouring values share an interval --
+    as sorted or clustered timestamps do.  See also
+    DateTimeArray.astimezone().
+    """
+    if not isinstance(tz, TzInfo):
+        raise TypeError("tz argument must be an instance of tzinfo")
+    target = _offset_lookup(tz, True)
+    sources = {}
+    result = []
+    append = result.append
+    for dt in iterable:
+        mytz = dt.tzinfo
+        if mytz is tz:
+            append(dt)
+            continue
+        if mytz is None:
+            raise ValueError("astimezone() requires an aware DateTime")
+        try:
+            source = sources[mytz]
+        except KeyError:
+            source = sources[mytz] = _offset_lookup(mytz, False)
+        key = dt._sortkey()
+        key -= source(key)
+        key += target(key)
+        if not _MIN_EPOCH_NS <= key <= _MAX_EPOCH_NS:
+            raise OverflowError("date value out of range")
+        append(dt._fromsortkey(key, tz))
+    return result
+
 
 def _isoweek1monday(year):
     # Helper to calculate the day number of the Monday starting week 1
@@ -1,27 +1,170 @@
-import datetime, _datetime
-if 1:
+"""picklesize.py [--json] [--count N] [name] ...
+
+Measure what serialising timestamps costs: bytes per object and encode and
+decode time per object for a list of values, for each of
+
+    Date, DateTime, DateTime (UTC), Time, TimeDelta
+
+under every pickle protocol, for the stdlib datetime equivalents, and for
+datetimeng's binary codec (pack_many()/unpack_many()) and array types.
+Naming types limits the run to them.
+
+The default output is a table; --json prints one JSON document instead,
+to keep as a record and compare against later runs.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+
+try:
     import cPickle as pickle
-else:
+except ImportError:
     import pickle
 
-cases = (datetime, "Python"), (_datetime, "C")
+import datetimeng
+from arrays import DateTimeArray, TimeDeltaArray
+
+COUNT = 10000
+REPEAT = 3
+
+def samples(count):
+    """Return {type name: (datetimeng values, stdlib values or None)}, count
+    of each; times are spaced like timestamps from a log, dates a day apart.
+    """
+    step = datetimeng.TimeDelta(microseconds=1234567)
+    start = datetimeng.DateTime(2012, 7, 14, 9, 30, 15, 123456)
+    dts = [start + step * i for i in range(count)]
+    day = datetimeng.TimeDelta(days=1)
+    std_utc = getattr(datetime, "timezone", None)
+    if std_utc is not None:
+        std_utc = std_utc.utc
+
+    def std(dt, tzinfo=None):
+        return datetime.datetime(dt.year, dt.month, dt.day, dt.hour,
+                                 dt.minute, dt.second, dt.microsecond,
+                                 tzinfo)
+
+    result = {
+        "Date": ([(start + day * i).date() for i in range(count)],
+                 [std(start + day * i).date() for i in range(count)]),
+        "DateTime": (dts, [std(dt) for dt in dts]),
+        "DateTime (UTC)": ([dt.replace(tzinfo=datetimeng.UTC) for dt in dts],
+                           None),
+        "Time": ([dt.time() for dt in dts], [std(dt).time() for dt in dts]),
+        "TimeDelta": ([dt - start for dt in dts],
+                      [std(dt) - std(start) for dt in dts]),
+    }
+    if std_utc is not None:
+        result["DateTime (UTC)"] = (result["DateTime (UTC)"][0],
+                                    [std(dt, std_utc) for dt in dts])
+    return result
+
+def best(func, repeat):
+    "Best time of func(), in seconds."
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def measure(typename, implementation, method, values, encode, decode,
+            repeat):
+    """Time encode(values) and decode() of its result; return the result
+    row.  Decoding must give back values.
+    """
+    data = encode(values)
+    if list(decode(data)) != list(values):
+        raise AssertionError("%s via %s %s did not round trip" %
+                             (typename, implementation, method))
+    size = len(data)
+    n = len(values)
+    return {
+        "type": typename,
+        "implementation": implementation,
+        "method": method,
+        "count": n,
+        "bytes_per_object": float(size) / n,
+        "encode_usec": best(lambda: encode(values), repeat) * 1e6 / n,
+        "decode_usec": best(lambda: decode(data), repeat) * 1e6 / n,
+    }
+
+def pickle_methods():
+    "[(method name, encode, decode)] for every pickle protocol."
+    result = []
+    for proto in range(pickle.HIGHEST_PROTOCOL + 1):
+        result.append(("pickle protocol %d" % proto,
+                       lambda values, proto=proto: pickle.dumps(values, proto),
+                       pickle.loads))
+    return result
+
+def codec_methods(typename, values):
+    "[(method name, encode, decode)] for datetimeng's own formats."
+    cls = type(values[0])
+    kw = {}
+    if typename == "DateTime (UTC)":
+        kw["aware"] = True
+    result = [("pack_many",
+               lambda values: cls.pack_many(values, **kw),
+               lambda data: cls.unpack_many(data, **kw))]
+    array_class = {datetimeng.DateTime: DateTimeArray,
+                   datetimeng.TimeDelta: TimeDeltaArray}.get(cls)
+    if array_class is not None:
+        proto = pickle.HIGHEST_PROTOCOL
+        result.append(("%s, pickle protocol %d" % (array_class.__name__,
+                                                   proto),
+                       lambda values: pickle.dumps(array_class(values), proto),
+                       lambda data: pickle.loads(data).tolist()))
+    return result
 
-def pickleit(thing):
-    s = pickle.dumps(thing, 1)
-    return len(s)
+def run(names=(), count=COUNT, repeat=REPEAT):
+    "Return the result rows, for the named types or all of them."
+    rows = []
+    for typename, (ours, theirs) in sorted(samples(count).items()):
+        if names and typename not in names:
+            continue
+        for method, encode, decode in pickle_methods():
+            rows.append(measure(typename, "datetimeng", method, ours,
+                                encode, decode, repeat))
+            if theirs is not None:
+                rows.append(measure(typename, "datetime", method, theirs,
+                                    encode, decode, repeat))
+        for method, encode, decode in codec_methods(typename, ours):
+            rows.append(measure(typename, "datetimeng", method, ours,
+                                encode, decode, repeat))
+    return rows
 
-typenames = "date", "datetime", "timedelta"
+def report(rows):
+    print("%-15s %-11s %-32s %8s %8s %8s" % ("type", "module", "method",
+                                             "bytes", "enc us", "dec us"))
+    for row in rows:
+        print("%-15s %-11s %-32s %8.2f %8.3f %8.3f" % (
+            row["type"], row["implementation"], row["method"],
+            row["bytes_per_object"], row["encode_usec"], row["decode_usec"]))
 
-for typename in typenames:
-    for mod, way in cases:
-        obj = getattr(mod, typename)(2000, 12, 13)
-        print "pickling", obj, "via", way, "-- pickle length", pickleit(obj)
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Serialization size and speed of datetimeng values.")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help="type to measure (default: all)")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    parser.add_argument("--count", type=int, default=COUNT,
+                        help="values per list (default %d)" % COUNT)
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help="timing repeats, best kept (default %d)" % REPEAT)
+    args = parser.parse_args(argv)
+    rows = run(args.names, args.count, args.repeat)
+    if args.json:
+        json.dump({"python": platform.python_version(),
+                   "implementation": platform.python_implementation(),
+                   "pickle": pickle.__name__,
+                   "count": args.count,
+                   "results": rows}, sys.stdout, indent=1, sort_keys=True)
+        print()
+    else:
+        report(rows)
 
-for typename in typenames:
-    for i in range(1, 11):
-        for mod, way in cases:
-            ctor = getattr(mod, typename)
-            objs = [ctor(j+1, 3, 4) for j in range(i**2)]
-            plen = pickleit(objs)
-            print "list of %3d %ss via %6s -- %4d bytes, %5.2f bytes/obj" % (
-                  len(objs), typename, way, plen, float(plen)/len(objs))
+if __name__ == "__main__":
+    main(sys.argv[1:])
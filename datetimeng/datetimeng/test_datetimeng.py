@@ -13,6 +13,7 @@ from datetimeng import TimeDelta
 from datetimeng import TzInfo
 from datetimeng import Time
 from datetimeng import Date, DateTime
+from datetimeng import _wall_seconds
 
 pickle_choices = [(pickler, unpickler, proto)
                   for pickler in pickle, cPickle
@@ -45,6 +46,20 @@ class TestModule(unittest.TestCase):
         self.assertEqual(DateTime.MINYEAR, 1)
         self.assertEqual(DateTime.MAXYEAR, 9999)
 
+    def test_calendar_tables(self):
+        import datetimeng
+        first = datetimeng._ymd2ord_arith(MINYEAR, 1, 1)
+        last = datetimeng._ymd2ord_arith(MAXYEAR, 12, 31)
+        ordinals = range(first - 800, first + 800) + \
+                   range(first, last, 97) + range(last - 800, last + 800)
+        for n in ordinals:
+            ymd = datetimeng._ord2ymd_arith(n)
+            self.assertEqual(datetimeng._ord2ymd_table(n), ymd)
+            if MINYEAR <= ymd[0] <= MAXYEAR:
+                self.assertEqual(datetimeng._ymd2ord_table(*ymd), n)
+        self.assertRaises(ValueError, datetimeng._ymd2ord_table, 2001, 2, 29)
+        self.assertRaises(ValueError, datetimeng._ymd2ord_table, 2001, 13, 1)
+
 #############################################################################
 # TzInfo tests
 
@@ -131,6 +146,67 @@ class TestTZInfo(unittest.TestCase):
             self.assertEqual(derived.utcoffset(None), offset)
             self.assertEqual(derived.tzname(None), 'cookie')
 
+class TestFixedOffsetZone(unittest.TestCase):
+
+    def test_fixed_offset(self):
+        from datetimeng import UTC, FixedOffset as Fixed
+        tz = Fixed(-330)
+        dt = DateTime(2002, 3, 1, 12, tzinfo=tz)
+        self.assertEqual(dt.utcoffset(), TimeDelta(minutes=-330))
+        self.assertEqual(dt.dst(), TimeDelta(0))
+        self.assertEqual(dt.tzname(), "-05:30")
+        self.assertEqual(UTC.tzname(None), "UTC")
+        self.assertEqual(Fixed(90, "EXT").tzname(None), "EXT")
+        utc = dt.astimezone(UTC)
+        self.assertEqual(utc, DateTime(2002, 3, 1, 17, 30, tzinfo=UTC))
+        self.assertEqual(utc.astimezone(tz), dt)
+        self.assertRaises(ValueError, Fixed, 1440)
+        for pickler, unpickler, proto in pickle_choices:
+            derived = unpickler.loads(pickler.dumps(tz, proto))
+            self.assertEqual(derived.utcoffset(None), tz.utcoffset(None))
+            self.assertEqual(derived.tzname(None), "-05:30")
+            self.assertEqual(repr(derived), repr(tz))
+            self.assertTrue(derived is tz)
+
+    def test_interned(self):
+        from datetimeng import UTC, FixedOffset as Fixed
+        self.assertTrue(Fixed(0) is UTC)
+        self.assertTrue(Fixed(330) is Fixed(330, "+05:30"))
+        self.assertFalse(Fixed(330, "IST") is Fixed(330, "IST"))
+        self.assertEqual(Fixed(330).tzname(None), "+05:30")
+        class Sub(Fixed):
+            pass
+        self.assertFalse(Sub(0) is UTC)
+        self.assertRaises(TypeError, Fixed, 1.5)
+        # Bad arguments fail whether or not the zone is interned already.
+        self.assertTrue(Fixed(330) is Fixed._interned[330])
+        for bad in 330.0, Decimal(330), 0.0:
+            self.assertRaises(TypeError, Fixed, bad)
+            self.assertRaises(TypeError, Fixed, bad, "+05:30")
+        self.assertRaises(ValueError, Fixed, 1440)
+        self.assertTrue(DateTime.fromisoformat("2002-03-01T12:00+05:30")
+                        .tzinfo is Fixed(330))
+
+    def test_fast_paths(self):
+        from datetimeng import UTC, FixedOffset as Fixed
+        ist = Fixed(330)
+        dt = DateTime(2002, 3, 1, 12, tzinfo=ist)
+        other = DateTime(2002, 3, 1, 6, 30, tzinfo=FixedOffset(0, "Z"))
+        self.assertEqual(dt, other)
+        self.assertEqual(hash(dt), hash(other))
+        self.assertEqual(dt - other, TimeDelta(0))
+        self.assertEqual(dt.isoformat(), "2002-03-01T12:00:00+05:30")
+        for tz in UTC, Fixed(-90), FixedOffset(-90, "custom"):
+            converted = dt.astimezone(tz)
+            self.assertTrue(converted.tzinfo is tz)
+            self.assertEqual(converted, other)
+            self.assertEqual(converted.replace(tzinfo=None),
+                             other.replace(tzinfo=None) + tz.utcoffset(None))
+        self.assertRaises(OverflowError,
+                          DateTime(1, 1, 1, tzinfo=ist).astimezone, UTC)
+        self.assertEqual(Time(12, tzinfo=ist).utcoffset(),
+                         TimeDelta(minutes=330))
+
 #############################################################################
 # Base clase for testing a particular aspect of TimeDelta, Time, Date and
 # DateTime comparisons.
@@ -486,6 +562,59 @@ class TestDateOnly(unittest.TestCase):
         dt2 = dt - delta
         self.assertEqual(dt2, dt - days)
 
+    def test_cache_size_from_environment(self):
+        import os, warnings
+        from datetimeng import _env_cache_size
+        name = 'DATETIMENG_TEST_CACHE'
+        try:
+            for value, expected in [(None, 7), ('0', 0), ('100', 100),
+                                    ('-1', 7), ('lots', 7), ('', 7)]:
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always')
+                    self.assertEqual(_env_cache_size(name, 7), expected)
+                self.assertEqual(len(caught), int(expected == 7 and
+                                                  value is not None))
+        finally:
+            os.environ.pop(name, None)
+
+    def test_interned(self):
+        from datetimeng import set_date_cache
+        previous = set_date_cache(100)
+        try:
+            d = Date.fromordinal(730000)
+            self.assertTrue(Date.fromordinal(730000) is d)
+            self.assertTrue(d + TimeDelta(1) is Date.fromordinal(730001))
+            self.assertTrue(d - TimeDelta(-1) is Date.fromordinal(730001))
+            self.assertTrue(DateTime(1999, 8, 3, 12).date() is
+                            DateTime(1999, 8, 3, 18).date())
+            self.assertTrue(Date.from_bytes(d.to_bytes()) is d)
+            self.assertFalse(SubclassDate.fromordinal(730000) is d)
+            self.assertEqual(type(SubclassDate.fromordinal(730000)),
+                             SubclassDate)
+            self.assertRaises(OverflowError, lambda: Date.max + TimeDelta(1))
+            set_date_cache(0)
+            self.assertFalse(Date.fromordinal(730000) is
+                             Date.fromordinal(730000))
+            self.assertEqual(Date.fromordinal(730000), d)
+        finally:
+            set_date_cache(previous)
+        self.assertRaises(ValueError, set_date_cache, -1)
+
+    def test_hash_distinct(self):
+        days = [Date.fromordinal(n) for n in range(730000, 732000)]
+        self.assertEqual(len(set(map(hash, days))), len(days))
+        self.assertEqual(hash(Date(2002, 3, 1)), hash(Date(2002, 3, 1)))
+        t1 = Time(23, 30, tzinfo=FixedOffset(-60, ""))
+        t2 = Time(0, 30, tzinfo=FixedOffset(0, ""))
+        t3 = Time(1, 0, 0, 1, tzinfo=FixedOffset(30, ""))
+        self.assertEqual(hash(t2), hash(Time(0, 30)))
+        self.assertNotEqual(hash(t2), hash(t3))
+        self.assertEqual(t1 == t2, hash(t1) == hash(t2))
+
 class SubclassDate(Date):
     sub_var = 1
 
@@ -1013,11 +1142,27 @@ class TestDate(HarmlessMixedComparison, unittest.TestCase):
         self.assertTrue(self.theclass.max)
 
     def test_strftime_out_of_range(self):
-        # For nasty technical reasons, we can't handle years before 1900.
+        # The common directives are rendered without time.strftime(), so
+        # years before 1900 work; the rest still need year >= 1900.
         cls = self.theclass
         self.assertEqual(cls(1900, 1, 1).strftime("%Y"), "1900")
         for y in 1, 49, 51, 99, 100, 1000, 1899:
-            self.assertRaises(ValueError, cls(y, 1, 1).strftime, "%Y")
+            self.assertEqual(cls(y, 1, 1).strftime("%Y-%m-%d %y"),
+                             "%04d-01-01 %02d" % (y, y % 100))
+            self.assertEqual(cls(y, 1, 1).strftime("%a %b"),
+                             cls(y, 1, 1).ctime()[:7])
+            self.assertRaises(ValueError, cls(y, 1, 1).strftime, "%c")
+
+    def test_strftime_directives(self):
+        # Compare against time.strftime() for each natively rendered
+        # directive, over a couple of years' worth of days.
+        import time
+        fmt = "%Y %y %m %d %H %I %M %S %j %w %u %U %W %a %A %b %B %p %%"
+        t = self.theclass(2003, 12, 20)
+        for i in range(0, 800, 7):
+            d = t + TimeDelta(i, 3600 * (i % 24))
+            self.assertEqual(d.strftime(fmt),
+                             time.strftime(fmt, d.timetuple()))
 
     def test_replace(self):
         cls = self.theclass
@@ -1214,7 +1359,8 @@ class TestDateTime(TestDate):
         # self.assertTrue(dt1 < dt2)          
 
     def test_strftime_with_bad_tzname_replace(self):
-        # verify ok if TzInfo.tzname().replace() returns a non-string
+        # %Z is no longer escaped for time.strftime(), so what
+        # TzInfo.tzname().replace() returns doesn't matter
         class MyTzInfo(FixedOffset):
             def tzname(self, dt):
                 class MyStr(str):
@@ -1222,7 +1368,7 @@ class TestDateTime(TestDate):
                         return None
                 return MyStr('name')
         t = self.theclass(2005, 3, 2, 0, 0, 0, tzinfo=MyTzInfo(3, 'name'))
-        self.assertRaises(TypeError, t.strftime, '%Z')
+        self.assertEqual(t.strftime('%Z %z'), 'name +0003')
 
     def test_bad_constructor_arguments(self):
         # bad years
@@ -1504,6 +1650,218 @@ class TestDateTime(TestDate):
         got = self.theclass.strptime(string, format)
         self.assertEqual(expected, got)
 
+    def test_epoch_ns(self):
+        from datetimeng import FixedOffset as Fixed
+        cls = self.theclass
+        ns = 1234567890123456789
+        dt = cls.from_epoch_ns(ns)
+        self.assertEqual(dt, cls(2009, 2, 13, 23, 31,
+                                 _to_decimal('30.123456789')))
+        self.assertTrue(type(dt) is cls)
+        self.assertEqual(dt.to_epoch_ns(), ns)
+        self.assertEqual(dt.to_epoch_us(), ns // 1000)
+        self.assertEqual(dt.to_epoch_ms(), ns // 1000000)
+        self.assertEqual(cls.from_epoch_us(ns // 1000),
+                         cls(2009, 2, 13, 23, 31, 30, 123456))
+        self.assertEqual(cls.from_epoch_ms(ns // 1000000),
+                         cls(2009, 2, 13, 23, 31, 30, 123000))
+        self.assertEqual(cls.from_epoch_ns(-1),
+                         cls(1969, 12, 31, 23, 59, _to_decimal('59.999999999')))
+        self.assertEqual(cls.from_epoch_ns(-1).to_epoch_ns(), -1)
+        self.assertEqual(cls.from_epoch_ms(-1).to_epoch_us(), -1000)
+        tz = Fixed(-300)
+        dt = cls.from_epoch_ns(ns, tz)
+        self.assertEqual(dt.tzinfo, tz)
+        self.assertEqual((dt.hour, dt.nanosecond), (18, 123456789))
+        self.assertEqual(dt.to_epoch_ns(), ns)
+        for dt in cls.min, cls.max:
+            self.assertEqual(cls.from_epoch_ns(dt.to_epoch_ns()), dt)
+        self.assertRaises(ValueError, cls.from_epoch_ns,
+                          cls.min.to_epoch_ns() - 1)
+        self.assertRaises(ValueError, cls.from_epoch_ns, 10 ** 30)
+        self.assertRaises(TypeError, cls.from_epoch_ns, 1.5)
+
+    def test_clock(self):
+        import time
+        from datetimeng import (now_ns, set_clock, AnchoredClock,
+                                FixedOffset as Fixed)
+        cls = self.theclass
+        self.assertTrue(abs(now_ns() - time.time() * 1e9) < 1e9)
+        ns = 1234567890123456789
+        previous = set_clock(lambda: ns)
+        try:
+            self.assertEqual(now_ns(), ns)
+            self.assertEqual(cls.utcnow(), cls.from_epoch_ns(ns))
+            self.assertEqual(cls.now(Fixed(60)), cls.from_epoch_ns(ns, Fixed(60)))
+            now = cls.now()
+            self.assertTrue(type(now) is cls)
+            self.assertEqual(now.nanosecond, 123456789)
+            self.assertEqual(now - TimeDelta(0, _to_decimal('0.123456789')),
+                             cls.fromtimestamp(ns // 10**9))
+            ticks = [5000, 5000, 7500]
+            clock = AnchoredClock(lambda: ticks.pop(0))
+            set_clock(clock)
+            anchored = now_ns()
+            self.assertTrue(abs(anchored - time.time() * 1e9) < 1e9)
+            self.assertEqual(cls.utcnow() - cls.from_epoch_ns(anchored),
+                             TimeDelta(0, 0, 2.5))
+            self.assertTrue(set_clock(None) is clock)
+        finally:
+            set_clock(previous)
+        self.assertTrue(abs(now_ns() - time.time() * 1e9) < 1e9)
+
+    def test_default_clocks(self):
+        import time
+        from datetimeng import now_ns, set_clock, AnchoredClock
+        cls = self.theclass
+        if sys.platform.startswith('linux'):
+            # clock_gettime() through ctypes keeps whole nanoseconds, where
+            # time.time() * 1e9 would end in rounded-off digits.
+            samples = [now_ns() for i in range(10)]
+            self.assertTrue([ns for ns in samples if ns % 1000], samples)
+        clock = AnchoredClock()
+        previous = set_clock(clock)
+        try:
+            readings = [now_ns() for i in range(100)]
+            self.assertEqual(readings, sorted(readings))
+            self.assertTrue(abs(readings[0] - time.time() * 1e9) < 1e9)
+            before = cls.utcnow()
+            self.assertTrue(abs(before - cls.utcfromtimestamp(time.time())) <
+                            TimeDelta(seconds=1))
+            clock.resync()
+            self.assertTrue(cls.utcnow() >= before - TimeDelta(seconds=1))
+        finally:
+            set_clock(previous)
+
+    def test_to_timestamp(self):
+        cls = self.theclass
+        dt = cls(1970, 1, 2, 0, 0, 1, 500000)
+        self.assertEqual(dt.to_timestamp(), Decimal('86401.5'))
+        self.assertEqual(dt.to_timestamp(scale=1000, integer=True), 86401500)
+        self.assertEqual(dt.to_timestamp(epoch=cls(1970, 1, 2)),
+                         Decimal('1.5'))
+        self.assertEqual(cls(1969, 12, 31, 23, 59, 59).to_timestamp(), -1)
+
+    def test_compile_format(self):
+        import _strptime
+        from datetimeng import UTC, FixedOffset as Fixed
+        cls = self.theclass
+        for string, format in (
+                ('2004-12-01 13:02:47.197', '%Y-%m-%d %H:%M:%S.%f'),
+                ('01/Dec/04:01:05:59 pm', '%d/%b/%y:%I:%M:%S %p'),
+                ('Wednesday 1 december 2004 12', '%A %d %B %Y %I'),
+                ('2004 48 3', '%Y %U %w'),
+                ('2004 48 Wed', '%Y %W %a'),
+                ('336/2004 13:02', '%j/%Y %H:%M'),
+                ('02/28', '%m/%d')):
+            result, frac = _strptime._strptime(string, format)
+            expected = cls(*(result[0:6]+(frac,)))
+            parser = cls.compile_format(format)
+            self.assertEqual(parser.parse(string), expected, string)
+            self.assertTrue(type(parser.parse(string)) is cls)
+        parser = cls.compile_format('%Y%m%d %H%M%S.%f %z')
+        self.assertEqual(parser.parse('20041201 130247.123456789 -0500'),
+                         cls(2004, 12, 1, 13, 2, _to_decimal('47.123456789'),
+                             tzinfo=Fixed(-300)))
+        self.assertEqual(parser.parse('20041201 130247.000000001 +01:30')
+                         .nanosecond, 1)
+        self.assertTrue(parser.parse('20041201 130247.5 Z').tzinfo is UTC)
+        self.assertEqual(parser.parse_many(['20041201 130247.5 Z',
+                                            '20041202 130247.25 Z']),
+                         [cls(2004, 12, 1, 13, 2, 47, 500000, tzinfo=UTC),
+                          cls(2004, 12, 2, 13, 2, 47, 250000, tzinfo=UTC)])
+        parser = cls.compile_format('%H:%M:%S.%N')
+        self.assertEqual(parser.parse('13:02:47.000000004').nanosecond, 4)
+        for bad in ('13:02:47', '13:02:47.0000000001', '13:02:60.1',
+                    '13:02:47.1 '):
+            self.assertRaises(ValueError, parser.parse, bad)
+        self.assertRaises(ValueError, cls.compile_format('%Y-%m-%d').parse,
+                          '2003-02-29')
+        # No year means 1900, which has no February 29th.
+        self.assertRaises(ValueError, cls.strptime, '02/29', '%m/%d')
+        self.assertRaises(ValueError, cls.compile_format('%m/%d').parse,
+                          '02/29')
+
+    def test_compile_format_follows_locale(self):
+        # %Z matches the current time zone names; like strptime(), a
+        # compiled format sees a change (as it would a setlocale()).
+        import os, time
+        if not hasattr(time, 'tzset'):
+            return
+        cls = self.theclass
+        saved = os.environ.get('TZ')
+        try:
+            os.environ['TZ'] = 'EST5EDT,M3.2.0,M11.1.0'
+            time.tzset()
+            parser = cls.compile_format('%H:%M %Z')
+            numeric = cls.compile_format('%H:%M')
+            self.assertEqual(parser.parse('12:00 EST'), cls(1900, 1, 1, 12))
+            self.assertRaises(ValueError, parser.parse, '12:00 CET')
+            os.environ['TZ'] = 'CET-1CEST,M3.5.0,M10.5.0/3'
+            time.tzset()
+            for string in '12:00 CET', '12:00 EST':
+                try:
+                    expected = cls.strptime(string, '%H:%M %Z')
+                except ValueError:
+                    self.assertRaises(ValueError, parser.parse, string)
+                else:
+                    self.assertEqual(parser.parse(string), expected)
+            self.assertEqual(parser.parse('12:00 CET'), cls(1900, 1, 1, 12))
+            self.assertEqual(numeric.parse('12:00'), cls(1900, 1, 1, 12))
+        finally:
+            if saved is None:
+                os.environ.pop('TZ', None)
+            else:
+                os.environ['TZ'] = saved
+            time.tzset()
+
+    def test_fromisoformat(self):
+        from datetimeng import UTC, FixedOffset as Fixed, parse_iso
+        cls = self.theclass
+        for string, expected in (
+                ('2004-12-01', cls(2004, 12, 1)),
+                ('2004-12-01T13:02', cls(2004, 12, 1, 13, 2)),
+                ('2004-12-01 13:02:47', cls(2004, 12, 1, 13, 2, 47)),
+                ('2004-12-01T13:02:47.197', cls(2004, 12, 1, 13, 2, 47, 197000)),
+                ('2004-12-01T13:02:47,000000001',
+                 cls(2004, 12, 1, 13, 2, _to_decimal('47.000000001'))),
+                ('2004-12-01T13:02:47.123456789Z',
+                 cls(2004, 12, 1, 13, 2, _to_decimal('47.123456789'),
+                     tzinfo=UTC)),
+                ('2004-12-01T13:02:47-05:00',
+                 cls(2004, 12, 1, 13, 2, 47, tzinfo=Fixed(-300))),
+                ('2004-12-01T13:02+0530',
+                 cls(2004, 12, 1, 13, 2, tzinfo=Fixed(330))),
+                ('2004-12-01T13:02+01', cls(2004, 12, 1, 13, 2, tzinfo=Fixed(60)))):
+            got = cls.fromisoformat(string)
+            self.assertEqual(got, expected, string)
+            self.assertEqual(got.nanosecond, expected.nanosecond, string)
+            self.assertEqual(got.utcoffset(), expected.utcoffset(), string)
+            self.assertTrue(type(got) is cls)
+            self.assertEqual(parse_iso(string), expected)
+        self.assertTrue(parse_iso('2004-12-01T13:02Z').tzinfo is UTC)
+        self.assertTrue(parse_iso('2004-12-01T13:02-05:00').tzinfo is
+                        parse_iso('2005-01-01T00:00-0500').tzinfo)
+        dt = cls(2004, 12, 1, 13, 2, _to_decimal('47.123456'), tzinfo=Fixed(-90))
+        self.assertEqual(cls.fromisoformat(dt.isoformat()), dt)
+        for bad in ('2004-12-1', '2004/12/01', '2004-12-01T', '2004-12-01T13',
+                    '2004-12-01T13:2', '2004-12-01T13:02:4', '2004-12-32',
+                    '2004-12-01T24:00', '2004-12-01T13:60',
+                    '2004-12-01T13:02:47.', '2004-12-01T13:02:47.1234567890',
+                    '2004-12-01T13:02+24:00', '2004-12-01T13:02+01:60',
+                    '2004-12-01T13:02+1:30', '2004-12-01T13:02Zulu',
+                    '2004-12-01x13:02', ' 2004-12-01',
+                    # Digits from other scripts (Arabic-Indic, fullwidth).
+                    u'\u0662\u0660\u0660\u0664-12-01',
+                    u'2004-12-01T\u0661\u0663:02',
+                    u'2004-12-01T13:02:\uff14\uff17',
+                    u'2004-12-01T13:02:47.\u0661',
+                    u'2004-12-01T13:02+\u0660\u0661:00'):
+            self.assertRaises(ValueError, cls.fromisoformat, bad)
+        self.assertEqual(cls.fromisoformat(u'2004-12-01T13:02+01:00'),
+                         cls.fromisoformat('2004-12-01T13:02+01:00'))
+        self.assertRaises(TypeError, cls.fromisoformat, 20041201)
+
     def test_more_Timetuple(self):
         # This tests fields beyond those tested by the TestDate.test_Timetuple.
         t = self.theclass(2004, 12, 31, 6, 22, 33)
@@ -1531,6 +1889,9 @@ class TestDateTime(TestDate):
         t = self.theclass(2004, 12, 31, 6, 22, 33, 47)
         self.assertEqual(t.strftime("%m %d %y %f %S %M %H %j"),
                                     "12 31 04 000047 33 22 06 366")
+        t = self.theclass(2004, 12, 31, 6, 22, _to_decimal('33.123456789'))
+        self.assertEqual(t.strftime("%S.%f %S.%N"),
+                         "33.123456 33.123456789")
 
     def test_extract(self):
         dt = self.theclass(2002, 3, 4, 18, 45, 3.1234,)
@@ -1804,6 +2165,8 @@ class TestTime(HarmlessMixedComparison, unittest.TestCase):
     def test_strftime(self):
         t = self.theclass(1, 2, 3, 4)
         self.assertEqual(t.strftime('%H %M %S %f'), "01 02 03 000004")
+        t = self.theclass(1, 2, _to_decimal('3.000000004'))
+        self.assertEqual(t.strftime('%H %M %S %N %%N'), "01 02 03 000000004 %N")
         # A naive object replaces %z and %Z with empty strings.
         self.assertEqual(t.strftime("'%z' '%Z'"), "'' ''")
 
@@ -2305,6 +2668,7 @@ class TestTimeTZ(TestTime, TZInfoBase, unittest.TestCase):
 
         # In Time w/ identical TzInfo objects, utcoffset is ignored.
         class Varies(TzInfo):
+            cache_offsets = False
             def __init__(self):
                 self.offset = TimeDelta(minutes=22)
             def utcoffset(self, t):
@@ -2913,6 +3277,7 @@ class TestDateTimeTZ(TestDateTime, TZInfoBase, unittest.TestCase):
 
         # In DateTime w/ identical TzInfo objects, utcoffset is ignored.
         class Varies(TzInfo):
+            cache_offsets = False
             def __init__(self):
                 self.offset = TimeDelta(minutes=22)
             def utcoffset(self, t):
@@ -2930,6 +3295,46 @@ class TestDateTimeTZ(TestDateTime, TZInfoBase, unittest.TestCase):
         t2 = t2.replace(tzinfo=Varies())
         self.assertTrue(t1 < t2)  # t1's offset counter still going up
 
+    def test_utcoffset_cached(self):
+        class Counting(TzInfo):
+            calls = 0
+            def utcoffset(self, dt):
+                self.calls += 1
+                return TimeDelta(minutes=-300)
+        class Varies(Counting):
+            cache_offsets = False
+        for tz in Counting(), Varies():
+            dt = self.theclass(2002, 3, 1, 12, tzinfo=tz)
+            other = self.theclass(2002, 3, 1, 12, tzinfo=FixedOffset(0, ""))
+            hash(dt)
+            dt == other
+            dt - other
+            dt.isoformat()
+            self.assertEqual(dt.utcoffset(), TimeDelta(minutes=-300))
+            if tz.cache_offsets:
+                self.assertEqual(tz.calls, 1)
+            else:
+                self.assertEqual(tz.calls, 5)
+
+    def test_sort_mixed_tzinfo(self):
+        utc = FixedOffset(0, "UTC", 0)
+        zones = utc, FixedOffset(-300, "EST", 0), FixedOffset(330, "IST", 0)
+        base = DateTime(2012, 3, 4, 5, 6, 7, 8, tzinfo=utc)
+        values = []
+        for i in range(60):
+            dt = base + TimeDelta(minutes=37*i, microseconds=i)
+            values.append(dt.astimezone(zones[i % 3]))
+        values.reverse()
+        got = sorted(values)
+        self.assertEqual([dt.astimezone(utc) for dt in got],
+                         sorted(dt.astimezone(utc) for dt in values))
+        for x, y in zip(got, got[1:]):
+            self.assertTrue(x < y and y > x and x <= y and x != y)
+            self.assertEqual(y - x, TimeDelta(minutes=37, microseconds=1))
+        self.assertEqual(len(set(values)), 60)
+        self.assertEqual(len(set(values + [dt.astimezone(utc)
+                                           for dt in values])), 60)
+
     def test_subclass_DateTimetz(self):
 
         class C(self.theclass):
@@ -3268,6 +3673,24 @@ class TestTimezoneConversions(unittest.TestCase):
             start += HOUR
             fstart += HOUR
 
+    def test_astimezone_many(self):
+        from datetimeng import astimezone_many, UTC
+        start = DateTime(2002, 4, 6, 22, tzinfo=Eastern)
+        dts = [start + TimeDelta(minutes=20 * i) for i in range(40)]
+        dts.append(DateTime(2002, 10, 27, 1, 30, tzinfo=Pacific))
+        for tz in Central, utc_real, UTC, Eastern:
+            converted = astimezone_many(dts, tz)
+            self.assertEqual(converted, [dt.astimezone(tz) for dt in dts])
+            for dt in converted:
+                self.assertTrue(dt.tzinfo is tz)
+        self.assertEqual(astimezone_many(iter(dts[:2]), Eastern), dts[:2])
+        self.assertEqual(astimezone_many([], UTC), [])
+        self.assertRaises(TypeError, astimezone_many, dts, None)
+        self.assertRaises(ValueError, astimezone_many, [DateTime(2002, 1, 1)],
+                          UTC)
+        self.assertRaises(OverflowError, astimezone_many,
+                          [DateTime(1, 1, 1, tzinfo=utc_real)], Eastern)
+
 
 #############################################################################
 # oddballs
@@ -3311,6 +3734,35 @@ class Oddballs(unittest.TestCase):
         self.assertEqual(as_DateTime, DateTime_sc)
         self.assertEqual(DateTime_sc, as_DateTime)
 
+#############################################################################
+# Memory layout
+
+class TestMemoryLayout(unittest.TestCase):
+
+    # per-object budget, in machine words, as reported by sys.getsizeof
+    budget = ((Date(2002, 3, 1), 9),
+              (DateTime(2002, 3, 1, 12, 0, 59, 123456), 16),
+              (Time(12, 0, 59, 123456), 12),
+              (TimeDelta(1, 2, 3), 9))
+
+    def test_no_instance_dict(self):
+        for obj, words in self.budget:
+            self.assertFalse(hasattr(obj, '__dict__'))
+            self.assertRaises(AttributeError, setattr, obj, 'extra', 1)
+
+    def test_size_budget(self):
+        import struct
+        word = struct.calcsize('P')
+        for obj, words in self.budget:
+            self.assertTrue(sys.getsizeof(obj) <= words * word,
+                            (type(obj).__name__, sys.getsizeof(obj)))
+
+    def test_subclass_has_dict(self):
+        dt = SubclassDateTime(2002, 3, 1, 12)
+        dt.extra = 7
+        self.assertEqual(dt.extra, 7)
+        self.assertEqual(dt, DateTime(2002, 3, 1, 12))
+
 #############################################################################
 # Nanosecond
 
@@ -3319,7 +3771,694 @@ class TestNanosecond(unittest.TestCase):
         ts = DateTime.fromtimestamp(_to_decimal('1093460999.533066'))
         self.assertEqual(ts.microsecond, 533066)
         self.assertEqual(ts.nanosecond, 533066000)
-        
+
+    def test_integer_fields(self):
+        dt = DateTime(2002, 3, 1, 12, 0, _to_decimal('59.123456789'))
+        self.assertEqual(dt.second, 59)
+        self.assertEqual(dt.microsecond, 123456)
+        self.assertEqual(dt.nanosecond, 123456789)
+        for value in dt.second, dt.microsecond, dt.nanosecond:
+            self.assertTrue(isinstance(value, int))
+        self.assertEqual(dt.second_decimal, Decimal('59.123456789'))
+        t = Time(12, 0, _to_decimal('59.123456789'))
+        self.assertEqual(t.nanosecond, 123456789)
+        self.assertEqual(t.second_decimal, Decimal('59.123456789'))
+        td = TimeDelta(0, _to_decimal('1.000000001'))
+        self.assertEqual((td.seconds, td.microseconds, td.nanosecond),
+                         (1, 0, 1))
+
+    def test_accessors_read_slots(self):
+        # The same stored int comes back every time, and stays read-only.
+        ns = _to_decimal('59.123456789')
+        for obj in (DateTime(2002, 3, 1, 12, 0, ns), Time(12, 0, ns),
+                    TimeDelta(0, ns)):
+            self.assertTrue(obj.nanosecond is obj.nanosecond)
+            self.assertEqual(obj.nanosecond, 123456789)
+            self.assertRaises(AttributeError, setattr, obj, 'nanosecond', 1)
+        dt = SubclassDateTime(2002, 3, 1, 12, 0, ns)
+        self.assertEqual((dt.microsecond, dt.nanosecond), (123456, 123456789))
+
+    def test_rounding_stays_in_the_minute(self):
+        # More than nine fractional digits round to nanoseconds, but never
+        # up to second 60.
+        for second in (Decimal('59.9999999999'), Decimal('59.99999999999'),
+                       59.9999999999):
+            dt = DateTime(2002, 12, 31, 23, 59, second)
+            self.assertEqual((dt.second, dt.nanosecond), (59, 999999999))
+            self.assertEqual(dt.date(), Date(2002, 12, 31))
+            t = Time(23, 59, second)
+            self.assertEqual((t.second, t.nanosecond), (59, 999999999))
+        t = Time(0, 0, Decimal('58.9999999999'))
+        self.assertEqual((t.second, t.nanosecond), (59, 0))
+        self.assertRaises(ValueError, Time, 0, 0, Decimal('59.5'), 500000)
+        # Negative fractions are out of range too, not stored floor-divided.
+        for second in -0.5, Decimal('-0.000000001'), Decimal('-1'):
+            self.assertRaises(ValueError, Time, 0, 0, second)
+            self.assertRaises(ValueError, DateTime, 2002, 3, 1, 0, 0, second)
+
+    def test_add_carries_nanoseconds(self):
+        ns = TimeDelta(0, _to_decimal('0.000000001'))
+        dt = DateTime(2002, 12, 31, 23, 59, _to_decimal('59.999999999'))
+        self.assertEqual(dt + ns, DateTime(2003, 1, 1))
+        self.assertEqual(DateTime(2003, 1, 1) - ns, dt)
+        self.assertEqual(dt + TimeDelta(59) + ns, DateTime(2003, 3, 1))
+        self.assertEqual(DateTime(2004, 2, 28, 12) + TimeDelta(hours=12),
+                         DateTime(2004, 2, 29))
+        self.assertEqual(DateTime(2004, 3, 1) + TimeDelta(days=-1, hours=1),
+                         DateTime(2004, 2, 29, 1))
+
+    def test_nanosecond_preserved(self):
+        dt = DateTime(2002, 3, 1, 12, 0, _to_decimal('59.123456789'))
+        self.assertEqual(dt.replace(hour=1).nanosecond, 123456789)
+        self.assertEqual(dt.time().nanosecond, 123456789)
+        self.assertEqual(DateTime.combine(dt.date(), dt.time()), dt)
+        self.assertEqual((dt + TimeDelta(0, 0, 1)).nanosecond, 123457789)
+        self.assertEqual((dt + TimeDelta(1)) - dt, TimeDelta(1))
+        later = dt + TimeDelta(0, _to_decimal('0.000000001'))
+        self.assertEqual(later - dt, TimeDelta(0, _to_decimal('0.000000001')))
+        self.assertTrue(dt < later)
+        for pickler, unpickler, proto in pickle_choices:
+            derived = unpickler.loads(pickler.dumps(later, proto))
+            self.assertEqual(derived.nanosecond, 123456790)
+
+
+#############################################################################
+# Binary codec
+
+class TestBinaryCodec(unittest.TestCase):
+
+    def check(self, cls, values, size, aware=False):
+        kw = {}
+        if aware:
+            kw['aware'] = True
+        for value in values:
+            data = value.to_bytes()
+            self.assertEqual(len(data), size)
+            self.assertEqual(cls.from_bytes(data), value)
+        data = cls.pack_many(iter(values), **kw)
+        self.assertEqual(data, ''.join([value.to_bytes() for value in values]))
+        for buf in data, bytearray(data), memoryview(data):
+            unpacked = cls.unpack_many(buf, **kw)
+            self.assertEqual(unpacked, values)
+            self.assertEqual([type(x) for x in unpacked], [cls] * len(values))
+        self.assertEqual(cls.unpack_many(cls.pack_many([], **kw), **kw), [])
+        self.assertRaises(ValueError, cls.from_bytes, data[:size - 1])
+        self.assertRaises(ValueError, cls.unpack_many, data[1:], **kw)
+
+    def test_timedelta(self):
+        values = [TimeDelta(0), TimeDelta(-1, 5, 7), TimeDelta.min,
+                  TimeDelta.max, TimeDelta(0, _to_decimal('0.000000001'))]
+        self.check(TimeDelta, values, 12)
+        self.assertEqual(TimeDelta(1, 2, 3).to_bytes(),
+                         '\0\0\0\1\0\0\0\0\x77\x35\x9f\xb8')
+        self.assertRaises(ValueError, TimeDelta.from_bytes,
+                          '\0\0\0\1' + '\xff' * 8)
+        # Only TimeDelta.min..max fit; arithmetic can go beyond.
+        for td in (TimeDelta.max + TimeDelta(1), TimeDelta.min * 3,
+                   TimeDelta(2 ** 31)):
+            self.assertRaises(OverflowError, td.to_bytes)
+            self.assertRaises(OverflowError, TimeDelta.pack_many,
+                              [TimeDelta(0), td])
+
+    def test_date(self):
+        self.check(Date, [Date.min, Date(2002, 3, 1), Date.max], 4)
+        self.assertEqual(Date(1, 1, 1).to_bytes(), '\0\0\0\1')
+        self.assertRaises(ValueError, Date.from_bytes, '\0\0\0\0')
+
+    def test_datetime(self):
+        from datetimeng import UTC, FixedOffset as Fixed
+        values = [DateTime.min, DateTime.max,
+                  DateTime(1969, 12, 31, 23, 59, _to_decimal('59.999999999')),
+                  DateTime(2002, 3, 1, 12, 0, _to_decimal('59.123456789'))]
+        self.check(DateTime, values, 12)
+        self.assertEqual(DateTime(1970, 1, 1, 0, 0, 1, 1).to_bytes(),
+                         '\0' * 7 + '\1\0\0\x03\xe8')
+        aware = [dt.replace(tzinfo=UTC) for dt in values[2:]]
+        aware.append(DateTime(2002, 3, 1, 12, tzinfo=Fixed(-330)))
+        self.check(DateTime, aware, 14, aware=True)
+        # Other zones come back as the FixedOffset in force.
+        dt = DateTime(2002, 7, 1, 12, tzinfo=Eastern)
+        back = DateTime.from_bytes(dt.to_bytes())
+        self.assertEqual(back, dt)
+        self.assertTrue(back.tzinfo is Fixed(-240))
+        self.assertRaises(ValueError, DateTime.pack_many, aware)
+        self.assertRaises(ValueError, DateTime.pack_many, values, aware=True)
+        self.assertRaises(ValueError, DateTime.from_bytes,
+                          '\x7f' + '\0' * 11)
+        self.assertRaises(ValueError, DateTime.from_bytes,
+                          '\0' * 8 + '\xff' * 4)
+        self.assertRaises(ValueError, DateTime.from_bytes,
+                          '\0' * 12 + '\x10\0')
+
+    def test_time(self):
+        from datetimeng import FixedOffset as Fixed
+        values = [Time(0), Time(23, 59, _to_decimal('59.999999999')),
+                  Time(12, 30)]
+        self.check(Time, values, 8)
+        aware = [t.replace(tzinfo=Fixed(60)) for t in values]
+        self.check(Time, aware, 10, aware=True)
+        self.assertRaises(ValueError, Time.from_bytes, '\xff' * 8)
+
+
+#############################################################################
+# Arrays
+
+class TestDateTimeArray(unittest.TestCase):
+
+    def setUp(self):
+        from arrays import DateTimeArray
+        self.theclass = DateTimeArray
+        self.values = [DateTime(1969, 12, 31, 23, 59, _to_decimal('59.5')),
+                       DateTime(2002, 3, 1, 12, 0, _to_decimal('59.123456789')),
+                       DateTime(2004, 2, 29),
+                       DateTime(2262, 4, 11)]
+
+    def test_pickle(self):
+        import arrays
+        from datetimeng import FixedOffset as Fixed
+        values = [dt.replace(tzinfo=Fixed(60)) for dt in self.values] * 250
+        arr = self.theclass(values)
+        for pickler, unpickler, proto in pickle_choices:
+            data = pickler.dumps(arr, proto)
+            derived = unpickler.loads(data)
+            self.assertEqual(derived.tolist(), values)
+            self.assertTrue(derived.tzinfo is arr.tzinfo)
+            self.assertEqual(derived.nanoseconds.typecode,
+                             arr.nanoseconds.typecode)
+            if proto:
+                # One buffer, not an object per element.
+                self.assertTrue(len(data) < 8 * len(arr) + 200, len(data))
+        # Pickles from a machine of the other byte order.
+        swapped = arr.nanoseconds[:]
+        swapped.byteswap()
+        other = {'little': 'big', 'big': 'little'}[sys.byteorder]
+        derived = arrays._unpickle(self.theclass, swapped.tostring(), other,
+                                   arr.tzinfo)
+        self.assertEqual(derived.tolist(), values)
+        if hasattr(pickle, 'PickleBuffer'):
+            buffers = []
+            data = pickle.dumps(arr, 5, buffer_callback=buffers.append)
+            self.assertEqual(len(buffers), 1)
+            self.assertTrue(len(data) < 200)
+            derived = pickle.loads(data, buffers=buffers)
+            self.assertEqual(derived.tolist(), values)
+
+    def test_astimezone(self):
+        from datetimeng import UTC
+        values = [dt.replace(tzinfo=Eastern) for dt in self.values[1:3]]
+        values += [DateTime(2002, 4, 7, 1, 30, tzinfo=Eastern) + i * HOUR
+                   for i in range(3)]
+        arr = self.theclass(values)
+        for tz in UTC, Pacific, utc_fake:
+            converted = arr.astimezone(tz)
+            self.assertTrue(converted.tzinfo is tz)
+            self.assertEqual(converted.tolist(),
+                             [dt.astimezone(tz) for dt in values])
+        self.assertTrue(arr.astimezone(Eastern) is arr)
+        self.assertRaises(TypeError, arr.astimezone, None)
+        self.assertRaises(ValueError, self.theclass(self.values).astimezone,
+                          UTC)
+
+    def test_roundtrip(self):
+        arr = self.theclass(self.values)
+        self.assertEqual(len(arr), 4)
+        self.assertEqual(list(arr), self.values)
+        self.assertEqual(arr.tolist(), self.values)
+        self.assertEqual(arr[1].nanosecond, 123456789)
+        self.assertEqual(arr[-1], self.values[-1])
+        self.assertEqual(arr[1:3].tolist(), self.values[1:3])
+        self.assertEqual(arr.nanoseconds[0], -500000000)
+        same = self.theclass.fromnanoseconds(arr.nanoseconds)
+        self.assertTrue(same.nanoseconds is arr.nanoseconds)
+        self.assertRaises(TypeError, self.theclass, [Date(2002, 3, 1)])
+        for pickler, unpickler, proto in pickle_choices:
+            derived = unpickler.loads(pickler.dumps(arr, proto))
+            self.assertEqual(derived.tolist(), self.values)
+
+    def test_arithmetic(self):
+        arr = self.theclass(self.values[:3])
+        delta = TimeDelta(1, 1, 1, 1, 1, 1, 1)
+        self.assertEqual((arr + delta).tolist(),
+                         [dt + delta for dt in self.values[:3]])
+        self.assertEqual((delta + arr).tolist(), (arr + delta).tolist())
+        self.assertEqual((arr - delta).tolist(),
+                         [dt - delta for dt in self.values[:3]])
+        base = self.values[1]
+        self.assertEqual((arr - base).tolist(),
+                         [dt - base for dt in self.values[:3]])
+        self.assertEqual(list((arr - arr).nanoseconds), [0, 0, 0])
+        self.assertEqual((arr - (arr - base)).tolist(), [base] * 3)
+        self.assertEqual((base - arr).tolist(),
+                         [base - dt for dt in self.values[:3]])
+        aware = arr.fromnanoseconds(arr.nanoseconds, FixedOffset(60, "one"))
+        utc = base.replace(tzinfo=FixedOffset(0, "utc"))
+        self.assertEqual((utc - aware).tolist(), [utc - dt for dt in aware])
+        self.assertRaises(TypeError, lambda: utc - arr)
+        self.assertRaises(TypeError, lambda: Date(2002, 3, 1) - arr)
+        self.assertRaises(ValueError, lambda: arr - arr[:2])
+        try:
+            arr - arr[:2]
+        except ValueError, e:
+            self.assertEqual(str(e), "DateTimeArray lengths differ: 3 and 2")
+
+    def test_comparisons(self):
+        arr = self.theclass(self.values)
+        pivot = self.values[1]
+        self.assertEqual(arr < pivot, [True, False, False, False])
+        self.assertEqual(arr >= pivot, [False, True, True, True])
+        self.assertEqual(arr == pivot, [False, True, False, False])
+        self.assertEqual(arr != arr, [False] * 4)
+        self.assertEqual(arr <= arr + TimeDelta(-1), [False] * 4)
+        aware = DateTime(2002, 3, 1, tzinfo=FixedOffset(60, "one"))
+        self.assertRaises(TypeError, lambda: arr < aware)
+        # Foreign operands aren't equal, rather than an error.
+        self.assertEqual(arr.__eq__(0), NotImplemented)
+        self.assertFalse(arr == 0)
+        self.assertTrue(arr != Date(2002, 3, 1))
+        self.assertFalse(arr == arr - pivot)
+        self.assertRaises(TypeError, lambda: arr < 0)
+
+    def test_mixed_tzinfo(self):
+        east = FixedOffset(60, "east")
+        west = FixedOffset(-300, "west")
+        values = [dt.replace(tzinfo=east) for dt in self.values[:3]]
+        arr = self.theclass(values)
+        self.assertTrue(arr.tzinfo is east)
+        self.assertEqual(arr[0].tzinfo, east)
+        other = self.theclass([dt.astimezone(west) for dt in values])
+        self.assertEqual(arr == other, [True] * 3)
+        self.assertEqual((arr - other).tolist(), [TimeDelta(0)] * 3)
+        pivot = values[1].astimezone(west)
+        self.assertEqual(arr < pivot, [True, False, False])
+        self.assertEqual(arr == pivot, [False, True, False])
+        self.assertRaises(ValueError, self.theclass,
+                          [values[0], values[1].astimezone(west)])
+
+    def test_fields(self):
+        arr = self.theclass(self.values)
+        for name in ('year', 'month', 'day', 'hour', 'minute', 'second',
+                     'microsecond', 'nanosecond'):
+            self.assertEqual(list(getattr(arr, name)),
+                             [getattr(dt, name) for dt in self.values], name)
+
+    def test_isoformat(self):
+        arr = self.theclass(self.values)
+        for sep in 'T', ' ':
+            self.assertEqual(arr.isoformat(sep),
+                             [dt.isoformat(sep) for dt in self.values])
+        tz = FixedOffset(-90, "minus")
+        values = [dt.replace(tzinfo=tz) for dt in self.values]
+        self.assertEqual(self.theclass(values).isoformat(),
+                         [dt.isoformat() for dt in values])
+
+
+class TestTimeDeltaArray(unittest.TestCase):
+
+    def setUp(self):
+        from arrays import TimeDeltaArray
+        self.theclass = TimeDeltaArray
+        self.values = [TimeDelta(0, _to_decimal('0.000000001')),
+                       TimeDelta(-1, 5),
+                       TimeDelta(3, 600, 250),
+                       TimeDelta(0)]
+
+    def test_roundtrip(self):
+        arr = self.theclass(self.values)
+        self.assertEqual(arr.tolist(), self.values)
+        self.assertEqual(arr[2], self.values[2])
+        self.assertEqual(arr[::2].tolist(), self.values[::2])
+        self.assertEqual(list(arr.nanoseconds[:2]), [1, -86395000000000])
+        self.assertRaises(TypeError, self.theclass, [1])
+        for pickler, unpickler, proto in pickle_choices:
+            derived = unpickler.loads(pickler.dumps(arr, proto))
+            self.assertEqual(derived.tolist(), self.values)
+            self.assertTrue(isinstance(derived, self.theclass))
+
+    def test_arithmetic(self):
+        arr = self.theclass(self.values)
+        one = TimeDelta(0, 1)
+        for result, expected in (
+                (arr + one, [td + one for td in self.values]),
+                (one + arr, [td + one for td in self.values]),
+                (arr - one, [td - one for td in self.values]),
+                (one - arr, [one - td for td in self.values]),
+                (arr + arr, [td * 2 for td in self.values]),
+                (arr - arr, [TimeDelta(0)] * 4),
+                (-arr, [-td for td in self.values]),
+                (abs(arr), [abs(td) for td in self.values]),
+                (arr * 3, [td * 3 for td in self.values]),
+                (3 * arr, [td * 3 for td in self.values]),
+                (arr // 7, [td // 7 for td in self.values])):
+            self.assertEqual(result.tolist(), expected)
+        base = DateTime(2002, 3, 1)
+        self.assertEqual((arr + base).tolist(),
+                         [base + td for td in self.values])
+        self.assertEqual(list(arr.total_seconds()),
+                         [float(td.total_seconds()) for td in self.values])
+
+    def test_comparisons(self):
+        arr = self.theclass(self.values)
+        self.assertEqual(arr > TimeDelta(0), [True, False, True, False])
+        self.assertEqual(arr == arr, [True] * 4)
+        self.assertEqual(arr < abs(arr), [False, True, False, False])
+        self.assertRaises(ValueError, lambda: arr == arr[1:])
+        self.assertRaises(TypeError, lambda: arr < 0)
+
+    def test_reductions(self):
+        arr = self.theclass(self.values)
+        self.assertEqual(arr.sum(), sum(self.values, TimeDelta(0)))
+        self.assertEqual(arr.mean(), sum(self.values, TimeDelta(0)) // 4)
+        self.assertEqual(arr.min(), TimeDelta(-1, 5))
+        self.assertEqual(arr.max(), TimeDelta(3, 600, 250))
+        self.assertRaises(ValueError, self.theclass().mean)
+
+    def test_percentile(self):
+        arr = self.theclass([TimeDelta(0, 0, i) for i in range(100, 0, -1)])
+        self.assertEqual(arr.percentile(0), TimeDelta(0, 0, 1))
+        self.assertEqual(arr.percentile(100), TimeDelta(0, 0, 100))
+        self.assertEqual(arr.percentile(50),
+                         TimeDelta(0, _to_decimal('0.0000505')))
+        self.assertEqual(arr.percentile([25, 99]),
+                         [TimeDelta(0, _to_decimal('0.00002575')),
+                          TimeDelta(0, _to_decimal('0.00009901'))])
+        self.assertEqual(arr[:1].percentile(99), TimeDelta(0, 0, 100))
+        self.assertRaises(ValueError, arr.percentile, 101)
+        self.assertRaises(ValueError, self.theclass().percentile, 50)
+
+
+#############################################################################
+# TzFile
+
+def _tzif(transitions, types, footer):
+    """Build a TZif version 2 file: transitions is [(time, type index)],
+    types [(utoff, isdst, abbr)].
+    """
+    import struct
+    chars = ''
+    ttinfos = ''
+    for utoff, isdst, abbr in types:
+        ttinfos += struct.pack('>lBB', utoff, isdst, len(chars))
+        chars += abbr + '\0'
+    def block(fmt):
+        header = struct.pack('>4sc15x6l', 'TZif', '2', 0, 0, 0,
+                             len(transitions), len(types), len(chars))
+        return (header +
+                ''.join(struct.pack(fmt, t) for t, i in transitions) +
+                ''.join(chr(i) for t, i in transitions) + ttinfos + chars)
+    return block('>l') + block('>q') + '\n%s\n' % footer
+
+class TestTzFile(unittest.TestCase):
+
+    def setUp(self):
+        import os, tempfile
+        from tzfile import TzFile
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'Test'))
+        # Local mean time until 1902, then +01:00 with an EU style rule;
+        # two explicit DST periods, in 1999 and 2000, and the footer after.
+        types = [(1050, 0, 'LMT'), (3600, 0, 'TST'), (7200, 1, 'TDT')]
+        transitions = [(-2145916800, 1),
+                       (922582800, 2), (941331600, 1),  # 1999-03-28, 10-31
+                       (954032400, 2), (972781200, 1)]  # 2000-03-26, 10-29
+        f = open(os.path.join(self.directory, 'Test', 'Zone'), 'wb')
+        f.write(_tzif(transitions, types, 'TST-1TDT,M3.5.0,M10.5.0/3'))
+        f.close()
+        self.tz = TzFile('Test/Zone', self.directory)
+
+    def tearDown(self):
+        import shutil
+        from tzfile import TzFile
+        TzFile.clear_cache()
+        shutil.rmtree(self.directory)
+
+    def test_offsets(self):
+        tz = self.tz
+        for args, offset, dst, name in [
+                ((1901, 12, 31, 23, 59), 18, 0, 'LMT'),
+                ((1902, 1, 1, 1, 30), 60, 0, 'TST'),
+                ((1999, 3, 28, 1, 59), 60, 0, 'TST'),
+                ((1999, 3, 28, 2, 30), 120, 60, 'TDT'),   # skipped
+                ((1999, 10, 31, 2, 30), 120, 60, 'TDT'),  # repeated
+                ((1999, 10, 31, 3), 60, 0, 'TST'),
+                ((2000, 7, 1), 120, 60, 'TDT'),
+                ((2000, 12, 1), 60, 0, 'TST'),
+                # From the footer's rule.
+                ((2012, 3, 25, 1, 59), 60, 0, 'TST'),
+                ((2012, 3, 25, 2), 120, 60, 'TDT'),
+                ((2012, 10, 28, 2, 59), 120, 60, 'TDT'),
+                ((2012, 10, 28, 3), 60, 0, 'TST'),
+                ((2400, 8, 1), 120, 60, 'TDT')]:
+            dt = DateTime(*args, **{'tzinfo': tz})
+            self.assertEqual(dt.utcoffset(), TimeDelta(minutes=offset), dt)
+            self.assertEqual(dt.dst(), TimeDelta(minutes=dst), dt)
+            self.assertEqual(dt.tzname(), name, dt)
+        self.assertEqual(tz.utcoffset(None), None)
+        self.assertEqual(tz.tzname(None), None)
+
+    def test_fromutc(self):
+        from datetimeng import UTC
+        tz = self.tz
+        for year in 2000, 2012:
+            for utc in (DateTime(year, 3, 20), DateTime(year, 7, 1),
+                        DateTime(year, 11, 1)):
+                for minutes in range(0, 60 * 24 * 10, 37):
+                    u = (utc + TimeDelta(minutes=minutes)).replace(tzinfo=UTC)
+                    local = u.astimezone(tz)
+                    self.assertEqual(local.astimezone(UTC), u)
+        # Clocks go back at 01:00 UTC: the repeated hour is seen twice.
+        u = DateTime(2012, 10, 28, 0, 30, tzinfo=UTC)
+        self.assertEqual(u.astimezone(tz).replace(tzinfo=None),
+                         DateTime(2012, 10, 28, 2, 30))
+        self.assertEqual((u + HOUR).astimezone(tz).replace(tzinfo=None),
+                         DateTime(2012, 10, 28, 2, 30))
+
+    def test_astimezone_many(self):
+        from datetimeng import astimezone_many, UTC
+        from arrays import DateTimeArray
+        tz = self.tz
+        for year in 1901, 1999, 2012, 2040:
+            start = DateTime(year, 3, 20, tzinfo=UTC)
+            utc = [start + TimeDelta(minutes=37 * i) for i in range(2000)]
+            local = [dt.astimezone(tz) for dt in utc]
+            self.assertEqual(astimezone_many(utc, tz), local)
+            self.assertEqual(astimezone_many(local, UTC), utc)
+            arr = DateTimeArray(local).astimezone(UTC)
+            self.assertEqual(arr.tolist(), utc)
+            self.assertEqual(arr.astimezone(tz).tolist(), local)
+
+    def test_cache_and_pickle(self):
+        from tzfile import TzFile
+        tz = self.tz
+        self.assertTrue(TzFile('Test/Zone', self.directory) is tz)
+        self.assertEqual(repr(tz), "tzfile.TzFile('Test/Zone')")
+        for pickler, unpickler, proto in pickle_choices:
+            self.assertTrue(unpickler.loads(pickler.dumps(tz, proto)) is tz)
+        TzFile.clear_cache()
+        self.assertFalse(TzFile('Test/Zone', self.directory) is tz)
+        self.assertRaises(ValueError, TzFile, 'Test/Missing', self.directory)
+        self.assertRaises(ValueError, TzFile, '../Test/Zone', self.directory)
+        self.assertRaises(ValueError, TzFile, 'Test', self.directory)
+
+    def test_bad_files(self):
+        import os
+        from tzfile import TzFile
+        data = open(os.path.join(self.directory, 'Test', 'Zone'), 'rb').read()
+        bad = _tzif([(0, 1), (3600, 5)], [(0, 0, 'A'), (60, 0, 'B')], 'A0')
+        for i, content in enumerate([data[:len(data) // 2], data[:60],
+                                     data[:10], 'TZif', '', 'nonsense',
+                                     bad]):
+            name = 'Bad%d' % i
+            f = open(os.path.join(self.directory, 'Test', name), 'wb')
+            f.write(content)
+            f.close()
+            self.assertRaises(ValueError, TzFile, 'Test/' + name,
+                              self.directory)
+
+    def test_system_zone(self):
+        from tzfile import TzFile
+        try:
+            tz = TzFile('America/New_York')
+        except ValueError:
+            return  # no zoneinfo database here
+        dt = DateTime(2002, 4, 7, 3, tzinfo=tz)
+        self.assertEqual(dt.utcoffset(), -4 * HOUR)
+        self.assertEqual(dt.tzname(), 'EDT')
+        dt = DateTime(2040, 12, 25, tzinfo=tz)
+        self.assertEqual(dt.utcoffset(), -5 * HOUR)
+
+
+#############################################################################
+# The example tzinfo modules
+
+class TestLocalTimezone(unittest.TestCase):
+
+    def setUp(self):
+        import os, time
+        self.saved = os.environ.get('TZ')
+        if not hasattr(time, 'tzset'):
+            self.skipTest('no time.tzset()')
+        self.tz = self.zone('EST5EDT,M3.2.0,M11.1.0')
+
+    def tearDown(self):
+        import os, time
+        if self.saved is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = self.saved
+        time.tzset()
+
+    def zone(self, spec, tz=None):
+        import os
+        from Local import LocalTimezone
+        os.environ['TZ'] = spec
+        if tz is None:
+            return LocalTimezone()
+        tz.refresh()
+        return tz
+
+    def check(self, tz, when, offset, dst):
+        import datetime
+        dt = datetime.datetime(*when, tzinfo=tz)
+        self.assertEqual((dt.utcoffset(), dt.dst()),
+                         (datetime.timedelta(hours=offset),
+                          datetime.timedelta(hours=dst)), when)
+
+    def test_transitions(self):
+        tz = self.tz
+        for when, offset, dst in [
+                ((2013, 3, 10, 1, 59, 59), -5, 0),
+                ((2013, 3, 10, 2), -4, 1),          # skipped, taken as DST
+                ((2013, 3, 10, 2, 30), -4, 1),
+                ((2013, 3, 10, 3), -4, 1),
+                ((2013, 11, 3, 0, 59, 59), -4, 1),
+                ((2013, 11, 3, 1, 30), -4, 1),      # repeated, taken as DST
+                ((2013, 11, 3, 2), -5, 0),
+                ((2013, 12, 31, 23, 59, 59), -5, 0),
+                ((2014, 1, 1), -5, 0)]:
+            self.check(tz, when, offset, dst)
+        import datetime
+        self.assertEqual(datetime.datetime(2013, 7, 1, tzinfo=tz).tzname(),
+                         'EDT')
+        self.assertEqual(datetime.datetime(2013, 1, 1, tzinfo=tz).tzname(),
+                         'EST')
+        # The tables agree with mktime() every 30 minutes around both.
+        for start in (datetime.datetime(2013, 3, 9, 12),
+                      datetime.datetime(2013, 11, 2, 12)):
+            for i in range(48):
+                dt = start + datetime.timedelta(minutes=30 * i)
+                self.assertEqual(tz._find(dt), tz._fallback[tz._mktime_isdst(dt)],
+                                 dt)
+
+    def test_mktime_fallback(self):
+        tz = self.tz
+        def unavailable(year):
+            raise OverflowError(year)
+        tz._probe_year = unavailable
+        self.check(tz, (2013, 1, 15, 12), -5, 0)
+        self.check(tz, (2013, 7, 15, 12), -4, 1)
+        self.assertEqual(tz._years, {})
+
+    def test_refresh(self):
+        tz = self.tz
+        self.check(tz, (2013, 7, 1), -4, 1)
+        self.zone('CET-1CEST,M3.5.0,M10.5.0/3', tz)
+        self.check(tz, (2013, 7, 1), 2, 1)
+        self.check(tz, (2013, 10, 27, 2, 30), 2, 1)
+        self.check(tz, (2013, 10, 27, 3), 1, 0)
+        # Aware datetimeng objects don't keep a stale offset.
+        from datetimeng import DateTime
+        dt = DateTime(2013, 7, 1, tzinfo=tz)
+        self.assertEqual(dt.utcoffset(), 2 * HOUR)
+        self.zone('UTC0', tz)
+        self.assertEqual(dt.utcoffset(), 0 * HOUR)
+        self.check(tz, (2013, 7, 1), 0, 0)
+
+    def test_historical_offsets(self):
+        import os
+        if not os.path.exists('/usr/share/zoneinfo/Europe/Moscow'):
+            return  # no zoneinfo database here
+        tz = self.zone('Europe/Moscow', self.tz)
+        self.check(tz, (2010, 7, 1), 4, 1)
+        self.check(tz, (2012, 7, 1), 4, 0)  # permanent +04:00, 2011-2014
+        self.check(tz, (2015, 7, 1), 3, 0)
+
+class TestUSTimeZone(unittest.TestCase):
+
+    def test_utcoffsets(self):
+        import datetime
+        import US
+        for tz in US.Eastern, US.Pacific:
+            for start in [datetime.datetime(1986, 4, 27),   # before the rules
+                          datetime.datetime(2006, 4, 2),
+                          datetime.datetime(2006, 10, 29),
+                          datetime.datetime(2007, 3, 11),
+                          datetime.datetime(2007, 11, 4)]:
+                dts = [start.replace(tzinfo=tz) +
+                       datetime.timedelta(minutes=15 * i) for i in range(16)]
+                offsets = tz.utcoffsets(dts)
+                self.assertEqual(offsets, [dt.utcoffset() for dt in dts])
+                self.assertEqual(len(set(offsets)),
+                                 1 if start.year < 1987 else 2, start)
+        self.assertEqual(US.Eastern.utcoffsets(iter([])), [])
+
+    def test_cache_bounded(self):
+        import datetime
+        import US
+        tz = US.USTimeZone(-5, "EST", "EDT")
+        limit = tz.max_cached_years
+        for year in range(1900, 1900 + 2 * limit + 7):
+            dt = datetime.datetime(year, 7, 1, tzinfo=tz)
+            self.assertEqual(dt.dst(),
+                             datetime.timedelta(hours=year >= 1987))
+            self.assertTrue(len(tz._transitions) <= limit)
+        self.assertTrue(tz._transitions)
+
+
+class TestEU(unittest.TestCase):
+
+    def around(self, when):
+        "Naive UTC times every 15 minutes from 3 hours before to 3 after."
+        import datetime
+        return [when + datetime.timedelta(minutes=15 * i)
+                for i in range(-12, 13)]
+
+    def test_transitions(self):
+        import datetime
+        import EU
+        for year, on, off in [(2002, 31, 27), (2013, 31, 27), (2014, 30, 26)]:
+            self.assertEqual(EU._year_transitions(year),
+                             (_wall_seconds(datetime.datetime(year, 3, on, 1)),
+                              _wall_seconds(datetime.datetime(year, 10, off, 1))))
+
+    def test_fromutc_matches_generic(self):
+        # The direct fromutc() agrees with tzinfo.fromutc(), which works
+        # from utcoffset() and dst(), around both changes.
+        import datetime
+        import EU
+        zones = [EU.WesternEU, EU.CentralEU, EU.EasternEU, EU.UTC,
+                 EU.Fixed(datetime.timedelta(hours=-3), "-03")]
+        for year in 2002, 2013:
+            on, off = [datetime.datetime.fromordinal(s // 86400) +
+                       datetime.timedelta(seconds=s % 86400)
+                       for s in EU._year_transitions(year)]
+            HOUR = datetime.timedelta(hours=1)
+            for utc in self.around(on) + self.around(off):
+                for tz in zones:
+                    dt = utc.replace(tzinfo=tz)
+                    local = tz.fromutc(dt)
+                    self.assertEqual(local,
+                                     datetime.tzinfo.fromutc(tz, dt))
+                    if off - HOUR <= utc < off:
+                        continue    # the last hour of DST can't be spelled
+                    self.assertEqual(local.replace(tzinfo=None) -
+                                     local.utcoffset(), utc)
+                    self.assertEqual(local.dst(), datetime.timedelta(
+                        hours=isinstance(tz, EU.Europe) and on <= utc < off))
+        self.assertRaises(ValueError, EU.CentralEU.fromutc,
+                          datetime.datetime(2002, 3, 31, tzinfo=EU.WesternEU))
+        self.assertRaises(TypeError, EU.UTC.fromutc, datetime.date(2002, 3, 31))
+
+
 if __name__ == "__main__":
     from test import test_support
     test_support.run_unittest(__name__)
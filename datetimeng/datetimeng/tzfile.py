@@ -0,0 +1,379 @@
+"""TzInfo objects read from compiled TZif (zoneinfo) files.
+
+TzFile('Europe/Amsterdam') loads <directory>/Europe/Amsterdam, where the
+directory defaults to $TZDIR or /usr/share/zoneinfo, and answers offset
+queries by bisecting the transition times.  Instances are cached by
+(directory, zone name), so loading a zone twice is cheap and gives the
+same object.  Times after the last transition in the file follow the
+POSIX TZ rule in its footer (TZif version 2 and later).
+
+The TzInfo interface works in whole minutes, so offsets that aren't (local
+mean time before standard time was adopted, mostly) are rounded to the
+nearest minute.
+
+Wall clock times are resolved as the clock read just before each
+transition: the hour skipped when clocks go forward gets the new offset,
+the hour repeated when they go back keeps the old one.
+
+See RFC 8536 for the file format.
+"""
+
+import os
+import re
+import struct
+from bisect import bisect_right
+
+from datetimeng import TzInfo, DateTime, TimeDelta
+from datetimeng import _ymd2ord, _ord2ymd, _days_in_month, _ORD1970
+from datetimeng import _wall_seconds
+
+__all__ = ['TzFile']
+
+DEFAULT_DIRECTORY = os.environ.get('TZDIR') or '/usr/share/zoneinfo'
+
+_EPOCH = _ORD1970 * 86400   # the epoch, in _wall_seconds() units
+
+def _minutes(seconds):
+    "UTC offset in seconds -> nearest whole minutes."
+    return (seconds + 30) // 60
+
+
+class _Info(tuple):
+    "(utcoffset, dst, tzname, offset in seconds) for one interval."
+    __slots__ = ()
+
+    def __new__(cls, offset_minutes, dst_minutes, name):
+        return tuple.__new__(cls, (TimeDelta(minutes=offset_minutes),
+                                   TimeDelta(minutes=dst_minutes), name,
+                                   offset_minutes * 60))
+
+
+def _read_tzif(data):
+    """Parse TZif data (a string) into
+    (transition times, type index of each, [(utoff, isdst, abbr)], footer).
+    The 64 bit body is used when the file has one.  Raises ValueError if
+    the data is truncated or otherwise not a valid TZif file.
+    """
+    try:
+        times, indices, types, footer = _parse_tzif(data)
+    except struct.error:
+        raise ValueError("truncated TZif file")
+    if not types or [i for i in indices if i >= len(types)]:
+        raise ValueError("corrupt TZif file: bad type index")
+    return times, indices, types, footer
+
+def _parse_tzif(data):
+    if data[:4] != 'TZif':
+        raise ValueError("not a TZif file")
+    header = struct.Struct('>4sc15x6l')
+    magic, version, isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = \
+        header.unpack_from(data, 0)
+    pos = header.size
+    time_size = 4
+    if version >= '2':
+        # Skip the version 1 body; the second header is followed by the
+        # 64 bit one.
+        pos += (timecnt * 5 + typecnt * 6 + charcnt + leapcnt * 8 +
+                isstdcnt + isutcnt)
+        magic, version, isutcnt, isstdcnt, leapcnt, timecnt, typecnt, \
+            charcnt = header.unpack_from(data, pos)
+        pos += header.size
+        time_size = 8
+    times = struct.unpack_from('>%d%s' % (timecnt, 'lq'[time_size == 8]),
+                               data, pos)
+    pos += timecnt * time_size
+    indices = struct.unpack_from('>%dB' % timecnt, data, pos)
+    pos += timecnt
+    types = []
+    for i in range(typecnt):
+        utoff, isdst, abbrind = struct.unpack_from('>lBB', data, pos)
+        types.append((utoff, isdst, abbrind))
+        pos += 6
+    chars = data[pos:pos + charcnt]
+    pos += charcnt + leapcnt * (time_size + 4) + isstdcnt + isutcnt
+    if len(chars) < charcnt:
+        raise struct.error("short abbreviation block")
+    try:
+        types = [(utoff, isdst, chars[abbrind:chars.index('\0', abbrind)])
+                 for utoff, isdst, abbrind in types]
+    except ValueError:
+        raise ValueError("corrupt TZif file: bad abbreviation index")
+    footer = None
+    if time_size == 8:
+        end = data.find('\n', pos + 1)
+        if data[pos:pos + 1] == '\n' and end > pos:
+            footer = data[pos + 1:end] or None
+    return list(times), list(indices), types, footer
+
+
+# POSIX TZ strings, as in TZif footers: std offset [dst [offset] [,start[/time],end[/time]]]
+_NAME = r"(<[^>]*>|[A-Za-z]{3,})"
+_OFFSET = r"([+-]?\d{1,3}(?::\d{1,2}(?::\d{1,2})?)?)"
+_DATE = r"(J\d{1,3}|\d{1,3}|M\d{1,2}\.\d\.\d)(?:/" + _OFFSET + r")?"
+_POSIX_TZ = re.compile(_NAME + _OFFSET + r"(?:" + _NAME + _OFFSET + r"?" +
+                       r"(?:," + _DATE + r"," + _DATE + r")?)?$")
+
+def _posix_seconds(text):
+    "'[+-]hh[:mm[:ss]]' -> seconds"
+    sign = 1
+    if text[0] in '+-':
+        if text[0] == '-':
+            sign = -1
+        text = text[1:]
+    seconds = 0
+    for part, scale in zip(text.split(':'), (3600, 60, 1)):
+        seconds += int(part) * scale
+    return sign * seconds
+
+class _PosixRule(object):
+    """A POSIX TZ rule, giving the transitions of any year."""
+
+    def __init__(self, text):
+        match = _POSIX_TZ.match(text)
+        if match is None:
+            raise ValueError("unsupported TZ rule %r" % (text,))
+        (stdname, stdoff, dstname, dstoff, start, start_time, end,
+         end_time) = match.groups()
+        # POSIX offsets are positive west of Greenwich.
+        self.stdoff = -_posix_seconds(stdoff)
+        self.std = _Info(_minutes(self.stdoff), 0, stdname.strip('<>'))
+        self.dst = None
+        self._years = {}
+        if dstname is None:
+            return
+        if dstoff is None:
+            self.dstoff = self.stdoff + 3600
+        else:
+            self.dstoff = -_posix_seconds(dstoff)
+        self.dst = _Info(_minutes(self.dstoff),
+                         _minutes(self.dstoff) - _minutes(self.stdoff),
+                         dstname.strip('<>'))
+        if start is None:
+            # The POSIX default, the US rules.
+            start, end = 'M3.2.0', 'M11.1.0'
+        self.start = start, _posix_seconds(start_time or '2')
+        self.end = end, _posix_seconds(end_time or '2')
+
+    @staticmethod
+    def _day(year, spec):
+        "Ordinal of the day a Jn, n or Mm.w.d date spec gives in year."
+        jan1 = _ymd2ord(year, 1, 1)
+        if spec[0] == 'J':
+            n = int(spec[1:])
+            if n >= 60 and _days_in_month(year, 2) == 29:
+                n += 1
+            return jan1 + n - 1
+        if spec[0] != 'M':
+            return jan1 + int(spec)
+        month, week, weekday = map(int, spec[1:].split('.'))
+        first = _ymd2ord(year, month, 1)
+        # Ordinal 1 is a Monday, so ordinal % 7 is the weekday, Sunday == 0.
+        day = first + (weekday - first) % 7 + 7 * (week - 1)
+        while day >= first + _days_in_month(year, month):
+            day -= 7
+        return day
+
+    def transitions(self, year):
+        """(DST start, DST end) in the given year, as UTC _wall_seconds()."""
+        try:
+            return self._years[year]
+        except KeyError:
+            pass
+        spec, time = self.start
+        start = self._day(year, spec) * 86400 + time - self.stdoff
+        spec, time = self.end
+        end = self._day(year, spec) * 86400 + time - self.dstoff
+        if len(self._years) > 400:
+            self._years.clear()
+        result = self._years[year] = start, end
+        return result
+
+    def find(self, seconds, wall):
+        """Info for a UTC time, or a wall clock time if wall is true; times
+        in _wall_seconds() units.
+        """
+        if self.dst is None:
+            return self.std
+        year = _ord2ymd(seconds // 86400)[0]
+        start, end = self.transitions(year)
+        if wall:
+            start += self.stdoff
+            end += self.dstoff
+        if start < end:
+            isdst = start <= seconds < end
+        else:
+            # Southern hemisphere: DST spans the new year.
+            isdst = not (end <= seconds < start)
+        if isdst:
+            return self.dst
+        return self.std
+
+    def interval(self, seconds, wall):
+        """(find(seconds, wall), start, end), where start <= seconds < end
+        is a span with the same info (None for no bound).
+        """
+        info = self.find(seconds, wall)
+        if self.dst is None:
+            return info, None, None
+        # The rule is applied year by year, so spans stop at new year.
+        year = _ord2ymd(seconds // 86400)[0]
+        first = _ymd2ord(year, 1, 1) * 86400
+        last = (_ymd2ord(year, 12, 31) + 1) * 86400
+        bounds = [first, last]
+        start, end = self.transitions(year)
+        if wall:
+            start += self.stdoff
+            end += self.dstoff
+        for t in start, end:
+            if first < t < last:
+                bounds.append(t)
+        bounds.sort()
+        i = bisect_right(bounds, seconds)
+        return info, bounds[i - 1], bounds[i]
+
+
+class TzFile(TzInfo):
+    """A time zone read from a TZif file.
+
+    TzFile(name, directory=None)
+    """
+
+    _cache = {}
+
+    def __new__(cls, name, directory=None):
+        if directory is None:
+            directory = DEFAULT_DIRECTORY
+        key = cls, directory, name
+        try:
+            return cls._cache[key]
+        except KeyError:
+            pass
+        self = TzInfo.__new__(cls)
+        self._load(name, directory)
+        return cls._cache.setdefault(key, self)
+
+    def __init__(self, name, directory=None):
+        pass
+
+    @classmethod
+    def clear_cache(cls):
+        "Forget all loaded zones, so that changed files get read again."
+        cls._cache.clear()
+
+    def __reduce__(self):
+        return (self.__class__, (self.name, self.directory))
+
+    def __repr__(self):
+        return "%s.%s(%r)" % (self.__class__.__module__,
+                              self.__class__.__name__, self.name)
+
+    def _load(self, name, directory):
+        path = os.path.join(directory, *name.split('/'))
+        if (os.path.isabs(name) or '..' in name.split('/') or
+                not os.path.isfile(path)):
+            raise ValueError("unknown time zone %r" % (name,))
+        f = open(path, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        times, indices, types, footer = _read_tzif(data)
+        self.name = name
+        self.directory = directory
+
+        # Each type's DST amount isn't in the file: take it to be the
+        # offset less the most recent standard offset.
+        infos = {}
+        def info(index, stdoff):
+            utoff, isdst, abbr = types[index]
+            key = index, isdst and stdoff
+            try:
+                return infos[key]
+            except KeyError:
+                dst = 0
+                if isdst:
+                    dst = _minutes(utoff) - _minutes(stdoff)
+                    if dst <= 0:
+                        dst = 60
+                result = infos[key] = _Info(_minutes(utoff), dst, abbr)
+                return result
+
+        # The type in force before the first transition: the first
+        # standard time type, per RFC 8536.
+        first = 0
+        for i, (utoff, isdst, abbr) in enumerate(types):
+            if not isdst:
+                first = i
+                break
+        stdoff = types[first][0]
+        before = info(first, stdoff)
+        self._infos = [before]
+        self._utc = []
+        self._wall = []
+        for t, index in zip(times, indices):
+            utc = t + _EPOCH
+            if not types[index][1]:
+                stdoff = types[index][0]
+            self._utc.append(utc)
+            self._wall.append(utc + before[3])
+            before = info(index, stdoff)
+            self._infos.append(before)
+        self._rule = None
+        if footer is not None:
+            self._rule = _PosixRule(footer)
+
+    def _find(self, seconds, wall):
+        if wall:
+            i = bisect_right(self._wall, seconds)
+        else:
+            i = bisect_right(self._utc, seconds)
+        if i == len(self._utc) and self._rule is not None:
+            return self._rule.find(seconds, wall)
+        return self._infos[i]
+
+    def _offset_interval(self, key, utc):
+        seconds = key // 1000000000 + _EPOCH
+        if utc:
+            times = self._utc
+        else:
+            times = self._wall
+        i = bisect_right(times, seconds)
+        if i == len(times) and self._rule is not None:
+            info, start, end = self._rule.interval(seconds, not utc)
+            if i and (start is None or start < times[-1]):
+                start = times[-1]
+        else:
+            info = self._infos[i]
+            start = end = None
+            if i:
+                start = times[i - 1]
+            if i < len(times):
+                end = times[i]
+        if start is not None:
+            start = (start - _EPOCH) * 1000000000
+        if end is not None:
+            end = (end - _EPOCH) * 1000000000
+        return info[3] * 1000000000, start, end
+
+    def utcoffset(self, dt):
+        if dt is None:
+            return None
+        return self._find(_wall_seconds(dt), True)[0]
+
+    def dst(self, dt):
+        if dt is None:
+            return None
+        return self._find(_wall_seconds(dt), True)[1]
+
+    def tzname(self, dt):
+        if dt is None:
+            return None
+        return self._find(_wall_seconds(dt), True)[2]
+
+    def fromutc(self, dt):
+        "DateTime in UTC -> DateTime in local Time."
+        if not isinstance(dt, DateTime):
+            raise TypeError("fromutc() requires a DateTime argument")
+        if dt.tzinfo is not self:
+            raise ValueError("dt.TzInfo is not self")
+        return dt + self._find(_wall_seconds(dt), False)[0]